@@ -8,6 +8,14 @@ from app.routes import (
     transactions_bp, medical_bp, product_agreements_bp, pm_211fz_bp, system_bp
 )
 from app.db import init_app
+from app.cache import init_app as init_cache
+from app.json_provider import FastJSONProvider
+from app.metrics import init_app as init_metrics
+from app.logs import init_app as init_logging
+from app.server import init_app as init_server
+from app.snapshots import init_app as init_snapshots
+from app.idempotency import init_app as init_idempotency
+from app.expiry import init_app as init_expiry
 from app.services.data_service import DataService
 
 def create_app(config_class=None):
@@ -16,8 +24,16 @@ def create_app(config_class=None):
         from app.config import Config
         config_class = Config
     app.config.from_object(config_class)
+    app.json = FastJSONProvider(app)
+    init_metrics(app)
+    init_logging(app)
     Swagger(app)
     init_app(app)
+    init_cache(app)
+    init_server(app)
+    init_snapshots(app)
+    init_idempotency(app)
+    init_expiry(app)
 
     # Регистрация blueprint'ов
     app.register_blueprint(accounts_bp)
@@ -31,11 +47,6 @@ def create_app(config_class=None):
     app.register_blueprint(pm_211fz_bp)
     app.register_blueprint(system_bp)
 
-    # === Настройка логирования ===
-    logging.basicConfig(
-        level=logging.INFO,
-        format='[%(asctime)s] %(levelname)s in %(module)s: %(message)s'
-    )
     logger = logging.getLogger(__name__)
 
     # === Глобальные обработчики ошибок ===
@@ -0,0 +1,169 @@
+"""ASGI-режим: мост к WSGI-приложению Flask с выполнением в пуле потоков.
+
+Соединения, в том числе тысячи простаивающих keep-alive, держит ASGI-сервер
+(uvicorn) в одном потоке событийного цикла; поток из ограниченного пула
+(``SERVER_THREADS``) занят только на время обработки запроса. Асинхронного
+доступа к БД нет: каждый запрос — обычный синхронный вызов WSGI-приложения в
+потоке пула, поэтому маршруты, схемы и конфигурация общие с WSGI-режимом, а
+SQLite работает так же, как под gunicorn. Выигрыш режима — только в числе
+одновременно открытых соединений, не в параллельности запросов.
+
+asgiref.WsgiToAsgi здесь не подходит: по умолчанию он выполняет все запросы
+в одном потоке (thread_sensitive), то есть без параллельности.
+"""
+import asyncio
+import io
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from app import create_app
+from app.cache import configure_entity_cache
+from app.config import Config
+from app.db import get_storage
+from app.statements import STATEMENTS
+
+# Настройки, которые flask serve передаёт воркерам uvicorn (create_worker_app)
+WORKER_CONFIG_ENV = 'MOCKSERVER_ASGI_CONFIG'
+
+
+def build_environ(scope, body):
+    """WSGI environ (PEP 3333) из ASGI HTTP scope"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for raw_name, raw_value in scope.get('headers', []):
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        value = raw_value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        if name in environ:
+            value = environ[name] + ('; ' if name == 'HTTP_COOKIE' else ',') + value
+        environ[name] = value
+    # Тело уже прочитано целиком (в том числе chunked), длина известна точно
+    environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
+
+
+class AsgiAdapter:
+
+    def __init__(self, wsgi_app, max_threads=8):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_threads, thread_name_prefix='asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            body = await self._read_body(receive)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.executor, self._handle, build_environ(scope, body), loop, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # Проверка БД и первое соединение пула до приёма запросов
+                await asyncio.get_running_loop().run_in_executor(self.executor, self._ping)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _ping(self):
+        with self.wsgi_app.app_context():
+            get_storage().execute(STATEMENTS["system"]["ping"]).fetchone()
+
+    @staticmethod
+    async def _read_body(receive):
+        chunks = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        return b''.join(chunks)
+
+    @staticmethod
+    async def _send_all(send, messages):
+        for message in messages:
+            await send(message)
+
+    def _handle(self, environ, loop, send):
+        """Выполняется в потоке пула: вызывает WSGI-приложение и отдаёт ответ в цикл"""
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['start'] = {
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                            for name, value in headers],
+            }
+
+        def deliver(*messages):
+            asyncio.run_coroutine_threadsafe(self._send_all(send, messages), loop).result()
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            # Чанк придерживается до следующего: обычный ответ (один чанк)
+            # уходит в цикл вместе с заголовками за один переход
+            started, previous = False, None
+            for chunk in result:
+                if not chunk:
+                    continue
+                if previous is not None:
+                    messages = [] if started else [response['start']]
+                    started = True
+                    deliver(*messages, {'type': 'http.response.body', 'body': previous, 'more_body': True})
+                previous = chunk
+            messages = [] if started else [response['start']]
+            deliver(*messages, {'type': 'http.response.body', 'body': previous or b''})
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+
+def create_asgi_app(config_class=None):
+    app = create_app(config_class)
+    return AsgiAdapter(app, max_threads=app.config['SERVER_THREADS'])
+
+
+def worker_config(app, settings):
+    """Значения конфигурации ``app``, отличные от Config, — для окружения воркеров"""
+    overrides = {key: app.config[key] for key in dir(Config)
+                 if key.isupper() and app.config.get(key) != getattr(Config, key)}
+    overrides['SERVER_THREADS'] = settings["threads"]
+    overrides['SERVER_WORKERS'] = settings["workers"]
+    return json.dumps(overrides)
+
+
+def create_worker_app():
+    """Фабрика для воркеров uvicorn (factory=True): конфигурация процесса flask serve"""
+    overrides = json.loads(os.environ.get(WORKER_CONFIG_ENV, '{}'))
+    asgi = create_asgi_app(type('WorkerConfig', (Config,), overrides))
+    configure_entity_cache(asgi.wsgi_app, asgi.wsgi_app.config['SERVER_WORKERS'])
+    return asgi
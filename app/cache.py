@@ -0,0 +1,193 @@
+"""Read-through кэш сущностей для GET-by-id маршрутов.
+
+Строки кэшируются как dict по ключу (таблица, id) и читаются через
+``STATEMENTS[table]["select_by_id"]``; проверка типа (physical/legal,
+pm_211fz) выполняется маршрутом над закэшированной строкой, поэтому один
+и тот же платёж или счёт хранится один раз. Промахи не кэшируются, так что
+создание записи инвалидировать нечего — сбрасывают кэш PUT/DELETE.
+
+Кэш живёт в процессе: при нескольких воркерах чужие изменения видны не
+позднее RESPONSE_CACHE_TTL, поэтому flask serve с несколькими процессами
+выключает его (configure_entity_cache), если не задан RESPONSE_CACHE_MULTI_WORKER.
+
+Отдельный кэш ``permission_cache`` хранит результаты проверки разрешений
+TPP (/consent-*/check, app/routes/consents.py) со своим, более коротким
+CONSENT_CHECK_CACHE_TTL.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+from app.db import execute_query
+from app.statements import STATEMENTS
+
+
+class LRUCache:
+    """LRU с TTL и ограничением по числу записей и суммарному размеру в байтах"""
+
+    def __init__(self, max_entries=10000, max_bytes=64 * 1024 * 1024, ttl=30.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries = OrderedDict()  # key -> (value, size, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[2] <= self.clock():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, size):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, self.clock() + self.ttl)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        self._bytes -= self._entries.pop(key)[1]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "lru",
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class CachedRow(dict):
+    """Строка БД как dict с версией ``etag`` — хэшем её содержимого"""
+    __slots__ = ('etag',)
+
+
+def encode_row(row):
+    """Каноничный JSON строки: по нему считаются размер в кэше и версия"""
+    return json.dumps(dict(row), default=str, sort_keys=True, ensure_ascii=False).encode()
+
+
+def row_etag(row, encoded=None):
+    """Версия строки для ETag; для CachedRow уже посчитана при загрузке"""
+    etag = getattr(row, 'etag', None)
+    if etag is None:
+        etag = hashlib.blake2b(encoded or encode_row(row), digest_size=12).hexdigest()
+    return etag
+
+
+class NullCache:
+    """Кэш выключен: каждое чтение идёт в БД"""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, size):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+    def stats(self):
+        return {"backend": "none"}
+
+
+CACHE_BACKENDS = {
+    "lru": lambda config: LRUCache(
+        max_entries=config['RESPONSE_CACHE_MAX_ENTRIES'],
+        max_bytes=config['RESPONSE_CACHE_MAX_BYTES'],
+        ttl=config['RESPONSE_CACHE_TTL']
+    ),
+    "none": lambda config: NullCache(),
+}
+
+
+def get_cache(app=None):
+    return (app or current_app).extensions['entity_cache']
+
+
+def cached_row(table, entity_id):
+    """Строка таблицы по id из кэша или из БД; None, если записи нет.
+
+    Возвращаемый dict общий для всех читателей — его нельзя изменять.
+    Версия строки для ETag доступна как ``row.etag``.
+    """
+    cache = get_cache()
+    key = (table, entity_id)
+    row = cache.get(key)
+    if row is None:
+        found = execute_query(STATEMENTS[table]["select_by_id"], (entity_id,)).fetchone()
+        if found is None:
+            return None
+        row = CachedRow(found)
+        encoded = encode_row(row)
+        row.etag = row_etag(row, encoded)
+        cache.set(key, row, len(encoded))
+    return row
+
+
+def invalidate(table, entity_id):
+    get_cache().delete((table, entity_id))
+
+
+def configure_entity_cache(app, workers):
+    """Выключает кэш сущностей, если запросы обслуживают несколько процессов"""
+    if workers > 1 and not app.config['RESPONSE_CACHE_MULTI_WORKER']:
+        app.extensions['entity_cache'] = NullCache()
+
+
+def get_permission_cache(app=None):
+    return (app or current_app).extensions['permission_cache']
+
+
+def init_app(app):
+    config = app.config
+    app.extensions['entity_cache'] = CACHE_BACKENDS[config['RESPONSE_CACHE_BACKEND']](config)
+    if config['RESPONSE_CACHE_BACKEND'] == "none":
+        app.extensions['permission_cache'] = NullCache()
+    else:
+        app.extensions['permission_cache'] = LRUCache(
+            max_entries=config['CONSENT_CHECK_CACHE_MAX_ENTRIES'],
+            max_bytes=config['RESPONSE_CACHE_MAX_BYTES'],
+            ttl=config['CONSENT_CHECK_CACHE_TTL']
+        )
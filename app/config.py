@@ -6,9 +6,89 @@ class Config:
     DATABASE = os.path.join(BASE_DIR, 'data', 'mockserver.db')
     TESTING = False
 
+    # Хранилище данных: "sqlite" (файл DATABASE) или "memory" (app/storage.py:
+    # без долговечности, в каждом процессе своё — для замеров задержек и тестов)
+    STORAGE_BACKEND = "sqlite"
+
+    # Пул соединений SQLite
+    DB_POOL_SIZE = 8                      # максимум открытых соединений на файл БД
+    DB_POOL_TIMEOUT = 5.0                 # сек. ожидания свободного соединения
+    DB_BUSY_TIMEOUT_MS = 5000             # PRAGMA busy_timeout
+    DB_CACHE_SIZE_KIB = 16384             # PRAGMA cache_size на соединение (16 MiB)
+    DB_MMAP_SIZE = 256 * 1024 * 1024      # PRAGMA mmap_size
+    DB_SYNCHRONOUS = "NORMAL"             # PRAGMA synchronous; "FULL" — fsync на каждый COMMIT
+    DB_STATEMENT_CACHE_SIZE = 256         # подготовленных выражений на соединение (0 = без кэша)
+    # Снимки содержимого БД (flask db-snapshot, app/snapshots.py)
+    DB_SNAPSHOT_DIR = os.path.join(BASE_DIR, 'data', 'snapshots')
+    DB_SNAPSHOT_COMPRESSION = "none"      # "none" или "gzip"
+
+    # Фиксация записей (app/writer.py): "direct" (COMMIT в потоке запроса),
+    # "group_commit" (поток-писатель собирает записи потоков в одну транзакцию)
+    # или "write_behind" (INSERT отвечает из памяти, на диск — фоновым потоком;
+    # без долговечности до сброса, для генерации нагрузки)
+    WRITE_MODE = "direct"
+    GROUP_COMMIT_MAX_DELAY_MS = 2.0       # сколько писатель дособирает пакет после первой записи
+    GROUP_COMMIT_MAX_BATCH = 64           # записей в одной транзакции
+    WRITE_BEHIND_FLUSH_INTERVAL_MS = 50   # период фонового сброса очереди в SQLite
+    WRITE_BEHIND_BATCH_SIZE = 1000        # строк в одной транзакции сброса (и порог внеочередного сброса)
+    WRITE_BEHIND_MAX_PENDING = 100000     # предел очереди; при переполнении запросы ждут сброса
+
+    # Максимум элементов в одном batch-запросе (POST .../batch)
+    BATCH_MAX_SIZE = 5000
+
+    # Строк, читаемых из курсора за раз при потоковой выдаче списков (?stream=)
+    STREAM_CHUNK_SIZE = 500
+
+    # Кэш GET-by-id (app/cache.py): "lru" или "none"
+    RESPONSE_CACHE_BACKEND = "lru"
+    RESPONSE_CACHE_MAX_ENTRIES = 10000
+    RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+    RESPONSE_CACHE_TTL = 30.0             # сек.
+    # PUT/DELETE сбрасывает кэш только своего процесса: при нескольких воркерах
+    # (flask serve --workers > 1) остальные отдают старую или удалённую строку до
+    # RESPONSE_CACHE_TTL. Поэтому там кэш сущностей по умолчанию выключен;
+    # True оставляет его — GET-by-id быстрее, но чтение после записи не гарантировано
+    RESPONSE_CACHE_MULTI_WORKER = False
+    # Кэш ответов /consent-*/check (app/cache.py); при RESPONSE_CACHE_BACKEND = "none" выключен
+    CONSENT_CHECK_CACHE_MAX_ENTRIES = 100000
+    CONSENT_CHECK_CACHE_TTL = 5.0         # сек.: предел устаревания отзыва согласия в других воркерах
+
+    # Фоновое истечение согласий и VRP (app/expiry.py)
+    EXPIRY_SWEEP_INTERVAL = 60.0          # сек. между проходами; 0 — только `flask expire`
+    EXPIRY_SWEEP_BATCH_SIZE = 500         # строк в одном UPDATE-пакете (одна транзакция)
+
+    # Ответы POST с заголовком Idempotency-Key (app/idempotency.py)
+    IDEMPOTENCY_TTL = 24 * 3600.0         # сек. хранения ответа
+    IDEMPOTENCY_MAX_ENTRIES = 100000
+    IDEMPOTENCY_MAX_BYTES = 64 * 1024 * 1024
+    IDEMPOTENCY_PERSIST = False           # дублировать в таблицу idempotency_keys (общая для воркеров)
+
+    # Границы корзин гистограммы задержек запросов на /metrics, сек.
+    METRICS_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    # Логирование (app/logs.py): запись в файл идёт из фонового потока
+    LOG_LEVEL = "INFO"
+    LOG_FILE = os.path.join(BASE_DIR, 'app.log')   # None = stderr
+    LOG_JSON = True                       # JSON-строки вместо текстового формата
+    LOG_QUEUE_SIZE = 10000                # записей в очереди; при переполнении отбрасываются
+    LOG_INFO_SAMPLE_RATE = 1.0            # доля сохраняемых INFO-записей (0..1)
+
+    # Production-сервер (flask serve, app/server.py)
+    SERVER_BACKEND = "gunicorn"           # "gunicorn" (pre-fork, не Windows), "waitress" или "uvicorn" (ASGI)
+    SERVER_BIND = "0.0.0.0:5000"
+    SERVER_WORKERS = os.cpu_count() or 1  # процессов
+    SERVER_THREADS = 4                    # потоков на процесс / пул ASGI (не больше DB_POOL_SIZE)
+    SERVER_KEEPALIVE = 5                  # сек. ожидания следующего запроса на соединении
+    SERVER_BACKLOG = 2048                 # очередь ожидающих подключений
+    SERVER_TIMEOUT = 30                   # сек. до перезапуска зависшего воркера
+
 class TestConfig(Config):
-    DATABASE = os.path.join(BASE_DIR, 'data', 'test_mockserver.db')
+    # Общая БД в памяти процесса: init_db восстанавливает её из снимка, без файлов
+    DATABASE = "file:test_mockserver?mode=memory&cache=shared"
+    LOG_FILE = None
     TESTING = True
+    # Фоновый проход не меняет данные посреди теста: тесты вызывают sweep() сами
+    EXPIRY_SWEEP_INTERVAL = 0
 
 # HTTP методы и коды статусов
 HTTP_METHODS = ['GET', 'POST', 'PUT', 'DELETE']
@@ -19,7 +99,11 @@ HTTP_STATUS_CODES = {
     "NOT_FOUND": 404,
     "METHOD_NOT_ALLOWED": 405,
     "INTERNAL_SERVER_ERROR": 500,
-    "NO_CONTENT": 204
+    "NO_CONTENT": 204,
+    "NOT_MODIFIED": 304,
+    "CONFLICT": 409,
+    "PAYLOAD_TOO_LARGE": 413,
+    "UNPROCESSABLE_ENTITY": 422
 }
 
 # Системные настройки
@@ -40,6 +124,7 @@ SYSTEM_CONFIG = {
         "medical insured": "/medical-insured-person-v3.0.3/",
         "product agreements": "/product-agreement-consents-v1.0.1/",
         "metrics": "/metrics",
+        "db snapshots": "/admin/db-snapshots",
         "health": "/health"
     },
     "health_statuses": {
@@ -107,6 +192,7 @@ PAGINATION_CONFIG = {
 VRP_STATUSES = {
     "active": "ACTIVE",
     "paused": "PAUSED",
+    "cancelled": "CANCELLED",
     "expired": "EXPIRED"
 }
 
@@ -116,7 +202,11 @@ RESPONSE_MESSAGES = {
     "server_error": "Internal server error",
     "db_error": "Database error",
     "not_found": "Not found",
-    "method_not_allowed": "Method not allowed"
+    "method_not_allowed": "Method not allowed",
+    "batch_too_large": "Batch size exceeds limit",
+    "invalid_batch": "Request body must be a JSON array or NDJSON",
+    "invalid_stream": "Unsupported stream format, expected json or ndjson",
+    "idempotency_conflict": "Idempotency key conflict"
 }
 
 # ====== ТЕСТОВЫЕ ДАННЫЕ ======
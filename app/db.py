@@ -1,6 +1,15 @@
+import os
 import sqlite3
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
 import click
-from flask import current_app, g, abort
+from flask import current_app, g, abort, has_app_context
+from flask.cli import with_appcontext
 import uuid
 import json
 from app.config import (
@@ -20,49 +29,624 @@ from app.config import (
     AGREEMENT_STATUSES,
     VRP_STATUSES
 )
+from app.metrics import add_db_time
+from app.services.data_service import SCHEMA_PATH, SyntheticDataGenerator
+from app.statements import STATEMENTS
+from app.storage import MemoryCursor, MemoryStorage
+from app.writer import GroupCommitWriter, WriteBehindBuffer
+
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """Все соединения пула заняты дольше DB_POOL_TIMEOUT"""
+
+
+class TrackedConnection(sqlite3.Connection):
+    """Соединение со счётчиками попаданий в кэш подготовленных выражений.
+
+    sqlite3 сам хранит скомпилированные выражения в LRU-кэше на
+    ``cached_statements`` записей с ключом по тексту SQL; здесь ведётся
+    зеркальный LRU того же размера только ради счётчиков hit/miss.
+    """
+
+    def __init__(self, *args, cached_statements=128, **kwargs):
+        super().__init__(*args, cached_statements=cached_statements, **kwargs)
+        self.statement_cache_size = cached_statements
+        self.statement_hits = 0
+        self.statement_misses = 0
+        self._statements = OrderedDict()
+
+    def _track_statement(self, sql):
+        statements = self._statements
+        if sql in statements:
+            statements.move_to_end(sql)
+            self.statement_hits += 1
+            return
+        self.statement_misses += 1
+        if self.statement_cache_size > 0:
+            statements[sql] = None
+            if len(statements) > self.statement_cache_size:
+                statements.popitem(last=False)
+
+    def execute(self, sql, parameters=()):
+        self._track_statement(sql)
+        started = time.perf_counter()
+        try:
+            return self.cursor(TimedCursor).execute(sql, parameters)
+        finally:
+            add_db_time(time.perf_counter() - started)
+
+    def executemany(self, sql, parameters):
+        self._track_statement(sql)
+        started = time.perf_counter()
+        try:
+            return self.cursor(TimedCursor).executemany(sql, parameters)
+        finally:
+            add_db_time(time.perf_counter() - started)
+
+
+class SharedCacheConnection(TrackedConnection):
+    """Соединение с общей БД в памяти (``cache=shared``).
+
+    В режиме общего кэша SQLite блокирует таблицы и при конфликте сразу
+    возвращает SQLITE_LOCKED, не вызывая busy-обработчик: выражение
+    повторяется с паузой, пока не истечёт ``busy_timeout``. Конфликт
+    возникает на захвате блокировки таблицы, до изменения первой строки,
+    поэтому повтор executemany не дублирует строки.
+    """
+    busy_timeout = 5.0
+
+    def _retry(self, method, sql, parameters):
+        deadline = time.monotonic() + self.busy_timeout
+        delay = 0.001
+        while True:
+            try:
+                return method(sql, parameters)
+            except sqlite3.OperationalError as e:
+                if getattr(e, 'sqlite_errorcode', 0) & 0xff != sqlite3.SQLITE_LOCKED or time.monotonic() > deadline:
+                    raise
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+
+    def execute(self, sql, parameters=()):
+        return self._retry(super().execute, sql, parameters)
+
+    def executemany(self, sql, parameters):
+        return self._retry(super().executemany, sql, list(parameters))
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Курсор, учитывающий время выборки строк в метриках запроса"""
+
+    def fetchone(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            add_db_time(time.perf_counter() - started)
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        try:
+            return super().fetchmany(self.arraysize if size is None else size)
+        finally:
+            add_db_time(time.perf_counter() - started)
+
+    def fetchall(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            add_db_time(time.perf_counter() - started)
+
+
+def is_memory_database(database):
+    """``file:имя?mode=memory&cache=shared`` — общая для соединений процесса БД в памяти"""
+    return database.startswith('file:') and 'mode=memory' in database
+
+
+def connect(database, **kwargs):
+    """sqlite3.connect, где имена ``file:...`` открываются как URI"""
+    return sqlite3.connect(database, uri=database.startswith('file:'), **kwargs)
+
+
+class ConnectionPool:
+    """Ограниченный пул долгоживущих соединений SQLite.
+
+    Соединения открываются лениво (не больше ``size``), один раз настраиваются
+    PRAGMA-ми (WAL, synchronous, кэш страниц, mmap) и затем
+    переиспользуются между запросами и потоками.
+    """
+
+    def __init__(self, database, size=8, timeout=5.0, busy_timeout_ms=5000,
+                 cache_size_kib=16384, mmap_size=0, statement_cache_size=256, synchronous="NORMAL"):
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_size_kib = cache_size_kib
+        self.mmap_size = mmap_size
+        self.statement_cache_size = statement_cache_size
+        self.synchronous = synchronous
+        self._connections = set()
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+        # Соединения SQLite нельзя переносить через fork: пул принадлежит процессу
+        self.pid = os.getpid()
+
+    def open_connection(self):
+        """Новое соединение с настройками пула, не учитываемое в нём (для потока-писателя)"""
+        memory = is_memory_database(self.database)
+        conn = connect(
+            self.database,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            factory=SharedCacheConnection if memory else TrackedConnection,
+            cached_statements=self.statement_cache_size
+        )
+        conn.row_factory = sqlite3.Row
+        if memory:
+            conn.busy_timeout = self.busy_timeout_ms / 1000
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(f'PRAGMA synchronous={self.synchronous}')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout_ms)}')
+        conn.execute(f'PRAGMA cache_size=-{int(self.cache_size_kib)}')
+        conn.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+
+    def _connect(self):
+        conn = self.open_connection()
+        with self._lock:
+            self._connections.add(conn)
+        return conn
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection pool is closed")
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if can_create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise PoolTimeoutError(
+                f"No free database connection within {self.timeout}s (pool size {self.size})"
+            )
+
+    def release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+
+        if self._closed:
+            self._discard(conn)
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            self._discard(conn)
+
+    def _discard(self, conn):
+        with self._lock:
+            self._created -= 1
+            self._connections.discard(conn)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def stats(self):
+        idle = self._idle.qsize()
+        with self._lock:
+            connections = list(self._connections)
+        hits = sum(conn.statement_hits for conn in connections)
+        misses = sum(conn.statement_misses for conn in connections)
+        return {
+            "size": self.size,
+            "open": self._created,
+            "idle": idle,
+            "in_use": self._created - idle,
+            "statement_cache": {
+                "size": self.statement_cache_size,
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0
+            }
+        }
+
+
+# Пулы создаются по одному на файл БД и живут всё время работы процесса
+_pools = {}
+_pools_lock = threading.Lock()
+# Пулы, унаследованные от родителя при fork: ссылки держатся, чтобы сборщик
+# мусора не закрыл чужие соединения (sqlite3_close в потомке портит WAL родителя)
+_inherited_pools = []
+
+
+# Общая БД в памяти исчезает с закрытием последнего соединения к ней, в том
+# числе при close_pool в init_db; якорное соединение держит её до конца процесса
+_memory_anchors = {}
+_anchors_lock = threading.Lock()
+
+
+def keep_alive(database):
+    if not is_memory_database(database) or database in _memory_anchors:
+        return
+    with _anchors_lock:
+        if database not in _memory_anchors:
+            _memory_anchors[database] = connect(database, check_same_thread=False)
+
+
+def _reset_pools_after_fork():
+    global _pools_lock, _anchors_lock, _snapshots_lock
+    _pools_lock = threading.Lock()
+    _anchors_lock = threading.Lock()
+    _snapshots_lock = threading.Lock()
+    _inherited_pools.extend(_pools.values())
+    _pools.clear()
+    # Потоки-писатели не переживают fork: в потомке они создаются заново
+    _writers.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_pools_after_fork)
+
+
+def get_pool(app=None):
+    config = (app or current_app).config
+    database = config['DATABASE']
+    pool = _pools.get(database)
+    if pool is not None and pool.pid == os.getpid():
+        return pool
+    with _pools_lock:
+        pool = _pools.get(database)
+        if pool is not None and pool.pid != os.getpid():
+            _inherited_pools.append(pool)
+            pool = None
+        if pool is None:
+            keep_alive(database)
+            pool = ConnectionPool(
+                database,
+                size=config.get('DB_POOL_SIZE', 8),
+                timeout=config.get('DB_POOL_TIMEOUT', 5.0),
+                busy_timeout_ms=config.get('DB_BUSY_TIMEOUT_MS', 5000),
+                cache_size_kib=config.get('DB_CACHE_SIZE_KIB', 16384),
+                mmap_size=config.get('DB_MMAP_SIZE', 0),
+                statement_cache_size=config.get('DB_STATEMENT_CACHE_SIZE', 256),
+                synchronous=config.get('DB_SYNCHRONOUS', "NORMAL")
+            )
+            _pools[database] = pool
+    return pool
+
+
+def close_pool(database):
+    """Закрывает пул и поток-писатель для файла БД (например, перед пересозданием схемы)"""
+    with _pools_lock:
+        pool = _pools.pop(database, None)
+        writers = [_writers.pop(key) for key in list(_writers) if key[0] == database]
+    for writer in writers:
+        writer.close()
+    if pool is not None:
+        pool.close()
+
+
+# Потоки записи режимов WRITE_MODE (app/writer.py)
+WRITERS = {
+    "group_commit": lambda pool, config: GroupCommitWriter(
+        pool.open_connection,
+        max_delay=config['GROUP_COMMIT_MAX_DELAY_MS'] / 1000,
+        max_batch=config['GROUP_COMMIT_MAX_BATCH']
+    ),
+    "write_behind": lambda pool, config: WriteBehindBuffer(
+        pool.open_connection,
+        interval=config['WRITE_BEHIND_FLUSH_INTERVAL_MS'] / 1000,
+        batch_size=config['WRITE_BEHIND_BATCH_SIZE'],
+        max_pending=config['WRITE_BEHIND_MAX_PENDING']
+    ),
+}
+
+# Писатели по (файл БД, режим): один на файл и режим в процессе
+_writers = {}
+
+
+def get_writer(app=None):
+    app = app or current_app
+    key = (app.config['DATABASE'], app.config['WRITE_MODE'])
+    writer = _writers.get(key)
+    if writer is not None:
+        return writer
+    pool = get_pool(app)
+    with _pools_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = _writers[key] = WRITERS[key[1]](pool, app.config)
+    return writer
 
 
 def get_db():
     if 'db' not in g:
-        g.db = sqlite3.connect(current_app.config['DATABASE'])
-        g.db.row_factory = sqlite3.Row
+        g.db_pool = get_pool()
+        g.db = g.db_pool.acquire()
     return g.db
 
 def close_db(e=None):
     db = g.pop('db', None)
+    pool = g.pop('db_pool', None)
     if db is not None:
-        db.close()
+        pool.release(db)
 
-def execute_query(query, args=(), commit=False):
-    db = get_db()
-    cur = db.execute(query, args)
-    if commit:
+class SQLiteStorage:
+    """Хранилище по умолчанию: файл SQLite, соединение из пула на время запроса.
+
+    При ``WRITE_MODE = "group_commit"`` записи (commit=True, write, write_many)
+    выполняет поток-писатель пакетами в общей транзакции (app/writer.py).
+    """
+    name = "sqlite"
+
+    def __init__(self, app):
+        self.app = app
+        self.group_commit = app.config['WRITE_MODE'] == "group_commit"
+
+    def execute(self, query, args=(), commit=False):
+        if commit and self.group_commit:
+            return get_writer(self.app).submit("execute", query, args)
+        db = get_db()
+        cur = db.execute(query, args)
+        if commit:
+            db.commit()
+        return cur
+
+    def write(self, query, args=()):
+        if self.group_commit:
+            return get_writer(self.app).submit("write", query, args)
+        db = get_db()
+        # fetchall() дочитывает выражение до конца, иначе COMMIT не пройдёт
+        rows = db.execute(query, args).fetchall()
         db.commit()
-    return cur
+        return rows[0] if rows else None
+
+    def write_many(self, query, seq_of_args):
+        if self.group_commit:
+            get_writer(self.app).submit("write_many", query, list(seq_of_args))
+            return
+        db = get_db()
+        try:
+            db.executemany(query, seq_of_args)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    def flush(self):
+        """Отложенных записей нет: всё уже в SQLite"""
+        return 0
+
+    def stats(self):
+        stats = get_pool(self.app).stats()
+        if self.group_commit:
+            stats["group_commit"] = get_writer(self.app).stats()
+        return stats
+
+
+class WriteBehindStorage(SQLiteStorage):
+    """SQLite с отложенной записью (``WRITE_MODE = "write_behind"``, app/writer.py).
+
+    INSERT одной строки отвечает из памяти и дописывается в SQLite фоновым
+    потоком; чтения по id сначала ищут ещё не сброшенные строки. Остальные
+    записи (UPDATE, DELETE, пакеты) сначала сбрасывают очередь, чтобы
+    выполниться после отложенных INSERT, как в порядке запросов.
+    """
+
+    def _buffer(self):
+        return get_writer(self.app)
+
+    def execute(self, query, args=(), commit=False):
+        spec = getattr(query, 'spec', None)
+        if commit and spec is not None and spec['op'] == 'insert':
+            self._buffer().insert(query, args)
+            return MemoryCursor(rowcount=1)
+        if commit:
+            self._buffer().flush()
+        elif spec is not None and spec['op'] == 'select' and ('id', '=') in spec['conditions']:
+            cur = self._buffer().lookup(query, args)
+            if cur is not None:
+                return cur
+        return super().execute(query, args, commit)
+
+    def write(self, query, args=()):
+        if query.spec['op'] == 'insert':
+            row = self._buffer().insert(query, args)
+            return row if query.spec.get('returning') else None
+        self._buffer().flush()
+        return super().write(query, args)
+
+    def write_many(self, query, seq_of_args):
+        self._buffer().flush()
+        super().write_many(query, seq_of_args)
+
+    def flush(self):
+        return self._buffer().flush()
+
+    def stats(self):
+        stats = get_pool(self.app).stats()
+        stats["write_behind"] = self._buffer().stats()
+        return stats
+
+
+# Хранилище данных маршрутов (STORAGE_BACKEND): "sqlite" или "memory" (app/storage.py)
+STORAGE_BACKENDS = {
+    "sqlite": SQLiteStorage,
+    "memory": MemoryStorage,
+}
+
+
+def get_storage(app=None):
+    return (app or current_app).extensions['storage']
+
+
+def uses_memory_storage():
+    return has_app_context() and get_storage().name == "memory"
+
+
+# Состояние, производное от содержимого БД: кэши строк и проверок разрешений
+# (app/cache.py) и сохранённые ответы POST (app/idempotency.py)
+DERIVED_EXTENSIONS = ('entity_cache', 'permission_cache', 'idempotency')
+
+
+def clear_derived_state():
+    """Сбрасывает кэши, относящиеся к прежнему содержимому БД"""
+    for extension in DERIVED_EXTENSIONS:
+        if extension in current_app.extensions:
+            current_app.extensions[extension].clear()
+
+
+def execute_query(query, args=(), commit=False):
+    return get_storage().execute(query, args, commit)
+
+def init_db(db=None, db_path=None, fill_test_data=False, reset=False):
+    """Схема и (по запросу) фикстуры TEST_*.
+
+    Общая БД в памяти ("file:имя?mode=memory&cache=shared") и файл при ``reset``
+    копируются из снимка (схема + фикстуры, строится один раз на процесс) через
+    backup API: прежнее содержимое теряется. Без ``reset`` файл только получает
+    недостающие таблицы, а его строки сохраняются.
+    """
+    if db is None and db_path is None and uses_memory_storage():
+        # Файл БД не нужен: таблицы в памяти создаются по schema.sql при старте
+        get_storage().reset()
+        clear_derived_state()
+        if fill_test_data:
+            fill_test_db()
+        return
 
-def init_db(db=None, db_path=None, fill_test_data=False):
     close = False
+    from_snapshot = False
     if db is None:
-        if db_path is not None:
-            db = sqlite3.connect(db_path)
-            close = True
-        else:
-            db = sqlite3.connect(current_app.config['DATABASE'])
-            close = True
+        if db_path is None:
+            db_path = current_app.config['DATABASE']
+        # Соединения пула могут указывать на удалённый/пересоздаваемый файл
+        close_pool(db_path)
+        keep_alive(db_path)
+        db = connect(db_path)
+        close = True
+        from_snapshot = is_memory_database(db_path) or reset
     try:
-        with open('schema.sql', 'r', encoding='utf-8') as f:
-            db.executescript(f.read())
-    except FileNotFoundError:
-        print("Ошибка: файл schema.sql не найден в корне проекта!")
-        exit(1)
+        if from_snapshot:
+            # Прежнее содержимое целиком заменяется страницами снимка
+            schema_snapshot(fill_test_data).backup(db)
+        else:
+            apply_schema(db)
     finally:
         if close:
             db.close()
 
-    if fill_test_data:
+    if has_app_context():
+        clear_derived_state()
+
+    if fill_test_data and not from_snapshot:
         # Наполняем данными через отдельное соединение в контексте приложения
         fill_test_db()
 
+
+def upgrade_db(db_path=None):
+    """Применяет schema.sql с миграциями к БД, не трогая её строки (flask serve)"""
+    if db_path is None and uses_memory_storage():
+        return
+    db_path = db_path or current_app.config['DATABASE']
+    keep_alive(db_path)
+    db = connect(db_path)
+    try:
+        apply_schema(db)
+    finally:
+        db.close()
+
+
+def apply_schema(db):
+    try:
+        with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+            script = f.read()
+    except FileNotFoundError:
+        print("Ошибка: файл schema.sql не найден в корне проекта!")
+        exit(1)
+    migrate_schema(db, script)
+    db.executescript(script)
+
+
+def migrate_schema(db, script):
+    """Доводит таблицы БД, созданной прежней schema.sql, до текущих.
+
+    ``CREATE TABLE IF NOT EXISTS`` существующую таблицу не меняет: недостающая
+    колонка добавляется через ALTER TABLE, а CHECK, который ALTER TABLE не
+    меняет, — пересозданием таблицы с копированием строк. Индексы и триггеры
+    пересозданной таблицы затем создаёт сам скрипт схемы.
+    """
+    tables = dict(db.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table'").fetchall())
+    if 'consents' in tables and 'valid_until' not in {row[1] for row in db.execute('PRAGMA table_info(consents)')}:
+        db.execute('ALTER TABLE consents ADD COLUMN valid_until TIMESTAMP')
+        db.commit()
+    if 'vrps' in tables and "'EXPIRED'" not in tables['vrps']:
+        ddl = re.search(r'^CREATE TABLE IF NOT EXISTS vrps \(.*?^\);', script, re.MULTILINE | re.DOTALL).group()
+        columns = ', '.join(row[1] for row in db.execute('PRAGMA table_info(vrps)'))
+        # DROP TABLE удаляет и триггеры счётчика, не вызывая их: entity_counts не меняется
+        db.executescript(f"""
+            BEGIN;
+            {ddl.replace('IF NOT EXISTS vrps', 'vrps_migrated', 1)}
+            INSERT INTO vrps_migrated ({columns}) SELECT {columns} FROM vrps;
+            DROP TABLE vrps;
+            ALTER TABLE vrps_migrated RENAME TO vrps;
+            COMMIT;
+        """)
+
+
+# Снимки "схема" и "схема + фикстуры TEST_*" в приватных БД в памяти
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+def schema_snapshot(fill_test_data=False):
+    """Эталонная БД для init_db: строится один раз на процесс, дальше только копируется.
+
+    Фикстуры в снимке одни и те же (те же uuid) при каждом init_db процесса.
+    """
+    with _snapshots_lock:
+        snapshot = _snapshots.get(fill_test_data)
+        if snapshot is None:
+            snapshot = sqlite3.connect(':memory:', check_same_thread=False)
+            apply_schema(snapshot)
+            if fill_test_data:
+                fill_test_db(snapshot)
+            _snapshots[fill_test_data] = snapshot
+        return snapshot
+
 def safe_db_query(query, params=(), commit=False):
     import logging
     logger = logging.getLogger(__name__)
@@ -72,170 +656,191 @@ def safe_db_query(query, params=(), commit=False):
         logger.error(f"DB error: {e}")
         abort(500, description="Database error")
 
+def execute_returning(query, args=()):
+    """INSERT/UPDATE ... RETURNING с фиксацией транзакции.
+
+    Возвращает сохранённую строку или None, если ни одна строка не затронута.
+    """
+    return get_storage().write(query, args)
+
+def safe_db_write(query, params=()):
+    import logging
+    logger = logging.getLogger(__name__)
+    try:
+        return execute_returning(query, params)
+    except Exception as e:
+        logger.error(f"DB error: {e}")
+        abort(500, description="Database error")
+
+def execute_batch(query, seq_of_args):
+    """executemany в одной транзакции: один COMMIT на весь пакет"""
+    get_storage().write_many(query, seq_of_args)
+
 @click.command('init-db')
 @click.option('--test-data', is_flag=True, help='Fill database with test data')
-def init_db_command(test_data):
-    init_db(fill_test_data=test_data)
+@click.option('--reset', is_flag=True, help='Replace database contents with the schema/fixture snapshot')
+@click.option('--scale', type=click.IntRange(min=0), default=0,
+              help='Generate N synthetic accounts, payments, transactions and consents')
+@with_appcontext
+def init_db_command(test_data, reset, scale):
+    init_db(fill_test_data=test_data, reset=reset)
     click.echo(f'База данных инициализирована.{" Тестовые данные добавлены." if test_data else ""}')
+    if scale:
+        started = time.perf_counter()
+        inserted = fill_synthetic_db(scale)
+        click.echo(f'Сгенерировано строк: {sum(inserted.values())} за {time.perf_counter() - started:.1f} с.')
 
 def init_app(app):
+    storage_class = STORAGE_BACKENDS[app.config['STORAGE_BACKEND']]
+    if storage_class is SQLiteStorage and app.config['WRITE_MODE'] == "write_behind":
+        storage_class = WriteBehindStorage
+    app.extensions['storage'] = storage_class(app)
     app.teardown_appcontext(close_db)
     app.cli.add_command(init_db_command)
 
-def fill_test_db():
-    # Accounts (physical)
-    for acc in TEST_ACCOUNTS.get("physical", []):
-        execute_query(
-            '''INSERT INTO accounts (id, balance, currency, type, status, owner)
-               VALUES (?, ?, ?, ?, ?, ?)''',
-            (
-                str(uuid.uuid4()),
-                acc["balance"],
-                acc["currency"],
-                ACCOUNT_TYPES["physical"],
-                acc["status"],
-                acc["owner"]
-            ),
-            commit=True
-        )
-    # Accounts (legal)
-    for acc in TEST_ACCOUNTS.get("legal", []):
-        execute_query(
-            '''INSERT INTO accounts (id, balance, currency, type, status, company)
-               VALUES (?, ?, ?, ?, ?, ?)''',
-            (
-                str(uuid.uuid4()),
-                acc["balance"],
-                acc["currency"],
-                ACCOUNT_TYPES["legal"],
-                acc["status"],
-                acc["company"]
-            ),
-            commit=True
-        )
+# Колонки, в порядке которых строки сущностей передаются в executemany
+SEED_STATEMENTS = {
+    "accounts": ("insert", ('id', 'balance', 'currency', 'type', 'status', 'owner', 'company')),
+    "payments": ("insert_with_type", ('id', 'status', 'type', 'created_at', 'amount', 'currency', 'recipient', 'account_id')),
+    "consents": ("insert", ('id', 'type', 'status', 'tpp_id', 'permissions', 'account_id', 'subject', 'scope',
+                            'valid_until')),
+    "transactions": ("insert", ('id', 'date', 'amount', 'currency', 'description', 'account_id', 'status')),
+}
 
-    # Consents
-    for c in TEST_CONSENTS:
-        execute_query(
-            '''INSERT INTO consents (id, type, status, subject, scope, tpp_id, permissions, account_id)
-               VALUES (?, ?, ?, ?, ?, ?)''',
-            (
-                str(uuid.uuid4()),
-                c["type"],
-                c["status"],
-                c["tpp_id"],
-                json.dumps(c["permissions"]),
-                c["account_id"],
-                c["subject"],
-                c["scope"]
-            ),
-            commit=True
-        )
 
-    # Payments
-    for p in TEST_PAYMENTS:
-        execute_query(
-            '''INSERT INTO payments (id, status, type, amount, currency, recipient, created_at, account_id)
-               VALUES (?, ?, ?, ?, ?, ?, datetime('now'), ?)''',
-            (
-                str(uuid.uuid4()),
-                PAYMENT_STATUSES["pending"],
-                PAYMENT_TYPES["standard"],
-                p["amount"],
-                p["currency"],
-                p["recipient"],
-                p["account_id"]
-            ),
-            commit=True
-        )
+def seed_rows(table, rows):
+    """dict-строки сущности -> кортежи параметров для SEED_STATEMENTS[table]"""
+    columns = SEED_STATEMENTS[table][1]
+    return [tuple(row.get(column) for column in columns) for row in rows]
 
-    # Bank documents
-    for d in TEST_BANK_DOCS:
-        execute_query(
-            '''INSERT INTO bank_docs (id, type, content, signature, created_at, account_id)
-               VALUES (?, ?, ?, ?, datetime('now'), ?)''',
-            (
-                str(uuid.uuid4()),
-                d["type"],
-                d["content"],
-                d["signature"],
-                d["account_id"]
-            ),
-            commit=True
-        )
 
-    # Insurance documents
-    for d in TEST_INSURANCE_DOCS:
-        execute_query(
-            '''INSERT INTO insurance_docs (id, type, content, policy_number, valid_until, created_at)
-               VALUES (?, ?, ?, ?, ?, datetime('now'))''',
-            (
-                str(uuid.uuid4()),
-                d["type"],
-                d["content"],
-                d["policy_number"],
-                d["valid_until"]
-            ),
-            commit=True
-        )
+@contextmanager
+def bulk_load(db, cache_size_kib=262144):
+    """Ослабляет pragma на время массовой загрузки и восстанавливает их после.
 
-    # Product agreements
-    for a in TEST_PRODUCT_AGREEMENTS:
-        execute_query(
-            '''INSERT INTO product_agreements (id, product_type, terms, status, account_id)
-               VALUES (?, ?, ?, ?, ?)''',
-            (
-                str(uuid.uuid4()),
-                a["product_type"],
-                json.dumps(a["terms"]),
-                AGREEMENT_STATUSES["active"],
-                a["account_id"]
-            ),
-            commit=True
-        )
+    synchronous=OFF убирает fsync на COMMIT, увеличенный cache_size держит
+    страницы индексов в памяти. При сбое посреди загрузки файл может
+    оказаться повреждённым — годится только для init-db.
+    """
+    synchronous = db.execute('PRAGMA synchronous').fetchone()[0]
+    cache_size = db.execute('PRAGMA cache_size').fetchone()[0]
+    db.execute('PRAGMA synchronous = OFF')
+    db.execute(f'PRAGMA cache_size = -{cache_size_kib}')
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.execute(f'PRAGMA synchronous = {synchronous}')
+        db.execute(f'PRAGMA cache_size = {cache_size}')
 
-    # VRPs
-    for v in TEST_VRPS:
-        execute_query(
-            '''INSERT INTO vrps (id, status, max_amount, frequency, valid_until, recipient_account)
-               VALUES (?, ?, ?, ?, ?, ?)''',
-            (
-                str(uuid.uuid4()),
-                VRP_STATUSES["active"],
-                v["max_amount"],
-                v["frequency"],
-                v["valid_until"],
-                v["recipient_account"]
-            ),
-            commit=True
-        )
 
-    # Transactions
-    for t in TEST_TRANSACTIONS:
-        execute_query(
-            '''INSERT INTO transactions (id, amount, currency, date, account_id, status)
-               VALUES (?, ?, ?, ?, ?, ?)''',
-            (
-                t["id"],
-                t["amount"],
-                t["currency"],
-                t["date"],
-                t["account_id"],
-                t["status"]
-            ),
-            commit=True
-        )
+@contextmanager
+def deferred_entity_counts(db):
+    """Снимает триггеры счётчиков entity_counts на время массовой вставки.
+
+    Триггер на каждую строку замедляет загрузку примерно на треть; вместо
+    этого счётчики пересчитываются один раз в конце. Всё выполняется в одной
+    транзакции, которую фиксирует внешний ``bulk_load``: при откате триггеры
+    возвращаются вместе с данными.
+    """
+    triggers = db.execute(STATEMENTS["system"]["count_triggers"]).fetchall()
+    db.execute('BEGIN IMMEDIATE')
+    for name, _ in triggers:
+        db.execute(f'DROP TRIGGER {name}')
+    yield db
+    for _, sql in triggers:
+        db.execute(sql)
+    db.execute(STATEMENTS["system"]["refresh_entity_counts"])
+
+
+def fixture_rows():
+    """(выражение INSERT, кортежи параметров) фикстур TEST_* по таблицам"""
+    now = datetime.now().isoformat(timespec='seconds')
+
+    accounts = [
+        {**acc, "id": str(uuid.uuid4()), "type": ACCOUNT_TYPES[kind]}
+        for kind in ("physical", "legal")
+        for acc in TEST_ACCOUNTS.get(kind, [])
+    ]
+    consents = [
+        {**c, "id": str(uuid.uuid4()), "permissions": json.dumps(c["permissions"])}
+        for c in TEST_CONSENTS
+    ]
+    payments = [
+        {**p, "id": str(uuid.uuid4()), "status": PAYMENT_STATUSES["pending"],
+         "type": PAYMENT_TYPES["standard"], "created_at": now}
+        for p in TEST_PAYMENTS
+    ]
+
+    for table, rows in (("accounts", accounts), ("consents", consents),
+                        ("payments", payments), ("transactions", TEST_TRANSACTIONS)):
+        yield STATEMENTS[table][SEED_STATEMENTS[table][0]], seed_rows(table, rows)
 
-    # Medical insured
-    for m in TEST_MEDICAL_INSURED:
-        execute_query(
-            '''INSERT INTO medical_insured (id, name, policy_number, birth_date)
-               VALUES (?, ?, ?, ?)''',
-            (
-                str(uuid.uuid4()),
-                m["name"],
-                m["policy_number"],
-                m["birth_date"]
-            ),
-            commit=True
-        )
\ No newline at end of file
+    yield STATEMENTS["bank_docs"]["insert"], [
+        (str(uuid.uuid4()), d["type"], d["content"], d["signature"], d["account_id"])
+        for d in TEST_BANK_DOCS
+    ]
+    yield STATEMENTS["insurance_docs"]["insert"], [
+        (str(uuid.uuid4()), d["type"], d["content"], d["policy_number"], d["valid_until"])
+        for d in TEST_INSURANCE_DOCS
+    ]
+    yield STATEMENTS["product_agreements"]["insert"], [
+        (str(uuid.uuid4()), a["product_type"], json.dumps(a["terms"]), AGREEMENT_STATUSES["active"],
+         a["account_id"])
+        for a in TEST_PRODUCT_AGREEMENTS
+    ]
+    yield STATEMENTS["vrps"]["insert"], [
+        (str(uuid.uuid4()), VRP_STATUSES["active"], v["max_amount"], v["frequency"], v["valid_until"],
+         v["recipient_account"])
+        for v in TEST_VRPS
+    ]
+    yield STATEMENTS["medical_insured"]["insert"], [
+        (str(uuid.uuid4()), m["name"], m["policy_number"], m["birth_date"])
+        for m in TEST_MEDICAL_INSURED
+    ]
+
+
+def fill_test_db(db=None):
+    """Фикстуры из TEST_* одной транзакцией: по одному executemany на таблицу"""
+    if db is None and uses_memory_storage():
+        storage = get_storage()
+        for statement, rows in fixture_rows():
+            storage.write_many(statement, rows)
+        return
+    if db is None:
+        db = get_db()
+    with bulk_load(db):
+        for statement, rows in fixture_rows():
+            db.executemany(statement, rows)
+
+
+def fill_synthetic_db(scale, db_path=None, chunk_size=10000, seed=None):
+    """Генерирует по ``scale`` счетов, платежей, транзакций и согласий.
+
+    Строки создаются порциями по ``chunk_size`` и пишутся executemany в одной
+    транзакции через отдельное соединение, минуя пул (для STORAGE_BACKEND =
+    "memory" — прямо в хранилище). Возвращает число вставленных строк по
+    таблицам.
+    """
+    generator = SyntheticDataGenerator(seed=seed)
+    inserted = dict.fromkeys(SEED_STATEMENTS, 0)
+    if db_path is None and uses_memory_storage():
+        storage = get_storage()
+        for table, rows in generator.rows(scale, chunk_size):
+            storage.write_many(STATEMENTS[table][SEED_STATEMENTS[table][0]], seed_rows(table, rows))
+            inserted[table] += len(rows)
+        return inserted
+    if db_path is None:
+        db_path = current_app.config['DATABASE']
+    db = connect(db_path)
+    try:
+        with bulk_load(db), deferred_entity_counts(db):
+            for table, rows in generator.rows(scale, chunk_size):
+                db.executemany(STATEMENTS[table][SEED_STATEMENTS[table][0]], seed_rows(table, rows))
+                inserted[table] += len(rows)
+    finally:
+        db.close()
+    return inserted
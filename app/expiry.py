@@ -0,0 +1,155 @@
+"""Фоновое истечение согласий и VRP.
+
+Строки со статусом ACTIVE и прошедшим ``valid_until`` переводятся в EXPIRED
+пакетами по EXPIRY_SWEEP_BATCH_SIZE: поиск идёт по индексам
+``(status, valid_until, id)`` (schema.sql), каждый пакет — отдельная короткая
+транзакция UPDATE ... WHERE id = ? AND status = 'ACTIVE', так что проход не
+держит блокировку записи дольше одного пакета, а строку, которую маршрут
+успел изменить, не трогает.
+
+Поток прохода запускается первым запросом в каждом процессе (после fork
+gunicorn тоже) и повторяет проход раз в EXPIRY_SWEEP_INTERVAL. Истёкшие строки
+убираются из кэша сущностей и кэша проверок разрешений. Время проходов
+отдаётся на /metrics в разделе "expiry".
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app.cache import invalidate
+from app.db import get_storage
+from app.routes.consents import forget_grants
+from app.statements import STATEMENTS
+
+logger = logging.getLogger(__name__)
+
+ACTIVE = "ACTIVE"
+EXPIRED = "EXPIRED"
+
+# Таблица -> граница истечения для момента ``now``
+EXPIRY_CUTOFFS = {
+    # valid_until согласия — момент времени: истекает, как только он прошёл
+    "consents": lambda now: now.isoformat(timespec='seconds'),
+    # valid_until VRP — дата (format: date): действует до конца этого дня
+    "vrps": lambda now: now.date().isoformat(),
+}
+
+
+class ExpirySweeper:
+
+    def __init__(self, app, interval=60.0, batch_size=500):
+        self.app = app
+        self.interval = interval
+        self.batch_size = batch_size
+        self._sweep_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.runs = 0
+        self.expired = dict.fromkeys(EXPIRY_CUTOFFS, 0)
+        self.last_run_seconds = 0.0
+        self.total_run_seconds = 0.0
+        self.last_run_at = None
+
+    def start(self):
+        """Запускает фоновый поток в текущем процессе (before_request)"""
+        if self.interval <= 0 or self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='expiry-sweeper', daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def stop(self):
+        with self._start_lock:
+            thread, self._thread, self._pid = self._thread, None, None
+        self._stop.set()
+        if thread is not None and thread.is_alive():
+            thread.join()
+
+    def _run(self):
+        while True:
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception("Expiry sweep failed")
+            if self._stop.wait(self.interval):
+                return
+
+    def sweep(self, now=None):
+        """Один проход по всем таблицам; возвращает {таблица: истёкших строк}"""
+        now = now or datetime.now()
+        with self._sweep_lock:
+            started = time.perf_counter()
+            with self.app.app_context():
+                expired = {table: self._expire(table, cutoff(now)) for table, cutoff in EXPIRY_CUTOFFS.items()}
+            elapsed = time.perf_counter() - started
+            self.runs += 1
+            self.last_run_seconds = elapsed
+            self.total_run_seconds += elapsed
+            self.last_run_at = now.isoformat(timespec='seconds')
+            for table, count in expired.items():
+                self.expired[table] += count
+        if any(expired.values()):
+            logger.info("Expired %s in %.1f ms", expired, elapsed * 1000)
+        return expired
+
+    def _expire(self, table, cutoff):
+        queries = STATEMENTS[table]
+        storage = get_storage()
+        total = 0
+        while True:
+            rows = storage.execute(queries["due_for_expiry"], (ACTIVE, cutoff, self.batch_size)).fetchall()
+            if not rows:
+                return total
+            storage.write_many(queries["expire"], [(EXPIRED, row['id'], ACTIVE) for row in rows])
+            for row in rows:
+                invalidate(table, row['id'])
+            if table == "consents":
+                forget_grants(*rows)
+            total += len(rows)
+            if len(rows) < self.batch_size:
+                return total
+
+    def stats(self):
+        return {
+            "interval": self.interval,
+            "batch_size": self.batch_size,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "runs": self.runs,
+            "expired": dict(self.expired),
+            "last_run_at": self.last_run_at,
+            "last_run_ms": round(self.last_run_seconds * 1000, 3),
+            "avg_run_ms": round(self.total_run_seconds / self.runs * 1000, 3) if self.runs else 0.0
+        }
+
+
+def get_sweeper(app=None):
+    return (app or current_app).extensions['expiry']
+
+
+@click.command('expire')
+@with_appcontext
+def expire_command():
+    """Один проход истечения согласий и VRP"""
+    expired = get_sweeper().sweep()
+    click.echo(', '.join(f'{table}: {count}' for table, count in expired.items()))
+
+
+def init_app(app):
+    sweeper = app.extensions['expiry'] = ExpirySweeper(
+        app,
+        interval=app.config['EXPIRY_SWEEP_INTERVAL'],
+        batch_size=app.config['EXPIRY_SWEEP_BATCH_SIZE']
+    )
+    app.before_request(sweeper.start)
+    app.cli.add_command(expire_command)
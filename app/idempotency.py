@@ -0,0 +1,186 @@
+"""Заголовок Idempotency-Key для создающих запросов (POST).
+
+Первый POST с ключом выполняется как обычно, а его ответ (статус, тело,
+Content-Type) сохраняется; повтор с тем же ключом получает сохранённый ответ
+с заголовком ``Idempotent-Replayed: true`` — маршрут не вызывается, новый
+uuid не генерируется и в таблицы ничего не пишется. Ключ действует в пределах
+Authorization и пути запроса.
+
+Ключ проверяется в require_headers_and_echo (app/utils.py) после проверки
+Authorization: отказ 401 не сохраняется, а повтор получает те же заголовки
+X-Request-ID и Authorization, что и обычный ответ маршрута.
+
+- повтор с другим телом — 422: ключ уже привязан к другому запросу;
+- повтор, пока первый запрос ещё выполняется, — 409;
+- ответы 5xx не сохраняются: клиент может повторить запрос с тем же ключом.
+
+Ответы хранятся в LRU с TTL (app/cache.LRUCache) в памяти процесса. При
+IDEMPOTENCY_PERSIST они дублируются в таблицу idempotency_keys SQLite: так
+повтор, попавший в другой воркер gunicorn или пришедший после перезапуска,
+тоже отдаётся из хранилища.
+"""
+import hashlib
+import threading
+import time
+
+from flask import current_app, g, jsonify, request
+
+from app.cache import LRUCache
+from app.config import HTTP_STATUS_CODES, RESPONSE_MESSAGES
+from app.db import get_db
+from app.statements import STATEMENTS
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+# Просроченные строки idempotency_keys удаляются раз на столько сохранений
+PURGE_EVERY = 1000
+
+
+class IdempotencyStore:
+
+    def __init__(self, max_entries=100000, max_bytes=64 * 1024 * 1024, ttl=86400.0, persist=False):
+        self.ttl = ttl
+        self.persist = persist
+        self.responses = LRUCache(max_entries=max_entries, max_bytes=max_bytes, ttl=ttl)
+        self._in_flight = {}               # ключ -> отпечаток тела
+        self._lock = threading.Lock()
+        self._saved = 0
+        self.replays = 0
+        self.conflicts = 0
+
+    @staticmethod
+    def scope_key(auth, path, key):
+        return hashlib.blake2b('\0'.join((auth, path, key)).encode(), digest_size=16).hexdigest()
+
+    def _load(self, scope):
+        if not self.persist:
+            return None
+        row = get_db().execute(STATEMENTS["idempotency"]["select"], (scope, time.time() - self.ttl)).fetchone()
+        if row is None:
+            return None
+        entry = tuple(row)
+        self.responses.set(scope, entry, len(entry[2]))
+        return entry
+
+    def begin(self, scope, fingerprint):
+        """("replay", ответ) | ("mismatch", None) | ("in_progress", None) | ("new", None)"""
+        entry = self.responses.get(scope) or self._load(scope)
+        with self._lock:
+            if entry is not None:
+                if entry[0] != fingerprint:
+                    self.conflicts += 1
+                    return "mismatch", None
+                self.replays += 1
+                return "replay", entry
+            if scope in self._in_flight:
+                self.conflicts += 1
+                return ("in_progress" if self._in_flight[scope] == fingerprint else "mismatch"), None
+            self._in_flight[scope] = fingerprint
+        return "new", None
+
+    def complete(self, scope, fingerprint, status, body, content_type):
+        entry = (fingerprint, status, body, content_type)
+        try:
+            self.responses.set(scope, entry, len(body))
+            if self.persist:
+                now = time.time()
+                db = get_db()
+                db.execute(STATEMENTS["idempotency"]["insert"], (scope, *entry, now))
+                self._saved += 1
+                if self._saved % PURGE_EVERY == 0:
+                    db.execute(STATEMENTS["idempotency"]["purge"], (now - self.ttl,))
+                db.commit()
+        finally:
+            # Иначе при ошибке записи ключ навсегда остался бы «выполняющимся» (409)
+            self.release(scope)
+
+    def release(self, scope):
+        with self._lock:
+            self._in_flight.pop(scope, None)
+
+    def clear(self):
+        self.responses.clear()
+
+    def stats(self):
+        stats = self.responses.stats()
+        return {
+            "entries": stats["entries"],
+            "bytes": stats["bytes"],
+            "ttl": self.ttl,
+            "persist": self.persist,
+            "in_flight": len(self._in_flight),
+            "replays": self.replays,
+            "conflicts": self.conflicts
+        }
+
+
+def get_idempotency_store(app=None):
+    return (app or current_app).extensions['idempotency']
+
+
+def _error(status, error, message):
+    return jsonify({"error": RESPONSE_MESSAGES[error], "message": message}), HTTP_STATUS_CODES[status]
+
+
+def check_idempotency_key():
+    """Ответ вместо вызова маршрута (повтор или ошибка ключа) либо None"""
+    if request.method != 'POST':
+        return None
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if key is None:
+        return None
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return _error("BAD_REQUEST", "validation_error", f"{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters")
+
+    store = get_idempotency_store()
+    scope = store.scope_key(request.headers.get('Authorization', ''), request.path, key)
+    fingerprint = hashlib.blake2b(request.get_data(), digest_size=16).hexdigest()
+    outcome, entry = store.begin(scope, fingerprint)
+    if outcome == "new":
+        g.idempotency = (scope, fingerprint)
+        return None
+    if outcome == "replay":
+        _, status, body, content_type = entry
+        response = current_app.response_class(body, status=status, content_type=content_type)
+        response.headers[REPLAYED_HEADER] = 'true'
+        return response
+    if outcome == "in_progress":
+        return _error("CONFLICT", "idempotency_conflict",
+                      f"A request with this {IDEMPOTENCY_HEADER} is still in progress")
+    return _error("UNPROCESSABLE_ENTITY", "idempotency_conflict",
+                  f"{IDEMPOTENCY_HEADER} was already used with a different request body")
+
+
+def save_idempotent_response(response):
+    pending = g.pop('idempotency', None)
+    if pending is None:
+        return response
+    scope, fingerprint = pending
+    store = get_idempotency_store()
+    if response.status_code >= 500 or response.is_streamed:
+        store.release(scope)
+    else:
+        store.complete(scope, fingerprint, response.status_code, response.get_data(), response.content_type)
+    return response
+
+
+def release_idempotency_key(exc):
+    # Запрос завершился исключением до after_request: ключ освобождается для повтора
+    pending = g.pop('idempotency', None)
+    if pending is not None:
+        get_idempotency_store().release(pending[0])
+
+
+def init_app(app):
+    config = app.config
+    app.extensions['idempotency'] = IdempotencyStore(
+        max_entries=config['IDEMPOTENCY_MAX_ENTRIES'],
+        max_bytes=config['IDEMPOTENCY_MAX_BYTES'],
+        ttl=config['IDEMPOTENCY_TTL'],
+        # Хранилище в памяти (STORAGE_BACKEND = "memory") не открывает файл SQLite
+        persist=config['IDEMPOTENCY_PERSIST'] and config['STORAGE_BACKEND'] == "sqlite"
+    )
+    app.after_request(save_idempotent_response)
+    app.teardown_request(release_idempotency_key)
@@ -0,0 +1,191 @@
+"""Логирование через очередь: запись в файл и форматирование вне потока запроса.
+
+На потоке запроса остаются только создание записи (массовые INFO-строки
+проходят выборку ещё до этого), request id и ``put_nowait`` в ограниченную
+очередь; JSON-форматирование и запись в файл выполняет ``QueueListener`` в
+отдельном потоке. При переполнении очереди записи отбрасываются и
+считаются, а не блокируют запрос.
+
+Настраивается один раз на процесс в ``create_app``: повторный вызов (тесты,
+несколько приложений) заменяет обработчик и останавливает прежний listener.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import uuid
+from datetime import datetime, timezone
+
+from flask import g, has_request_context, request
+
+from app.metrics import request_elapsed
+
+# Поля записи, которые JSONFormatter выводит помимо основных, если они заданы
+EXTRA_FIELDS = ('method', 'path', 'endpoint', 'status', 'latency_ms')
+
+access_logger = logging.getLogger('app.access')
+
+_listener = None
+_handler = None
+_sample_rate = 1.0
+
+
+class JSONFormatter(logging.Formatter):
+    """Одна JSON-строка на запись"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, 'request_id', None)
+        if request_id:
+            entry["request_id"] = request_id
+        for field in EXTRA_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Проставляет request id: в потоке listener-а контекста запроса уже нет"""
+
+    def filter(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = g.get('x_request_id') if has_request_context() else None
+        return True
+
+
+def info_enabled(logger):
+    """Писать ли массовую INFO-строку (вызов эндпоинта, access log).
+
+    Выборка с долей LOG_INFO_SAMPLE_RATE делается до создания LogRecord,
+    поэтому отброшенная строка стоит одного random(); WARNING и выше,
+    как и остальные INFO-записи, не отбрасываются.
+    """
+    return logger.isEnabledFor(logging.INFO) and (_sample_rate >= 1.0 or random.random() < _sample_rate)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler, который при полной очереди отбрасывает запись"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # Сообщение и traceback собираются здесь: args и exc_info могут
+        # ссылаться на объекты запроса, которые изменятся до записи в файл.
+        # Запись не копируется — для других обработчиков текст тот же.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        return record
+
+
+def _target_handler(config):
+    if config['LOG_FILE']:
+        handler = logging.FileHandler(config['LOG_FILE'], encoding='utf-8')
+    else:
+        handler = logging.StreamHandler(sys.stderr)
+    if config['LOG_JSON']:
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('[%(asctime)s] %(levelname)s in %(module)s: %(message)s'))
+    return handler
+
+
+def configure_logging(config):
+    global _listener, _handler, _sample_rate
+    shutdown()
+
+    _sample_rate = config['LOG_INFO_SAMPLE_RATE']
+    if config['LOG_JSON']:
+        # JSON-записи не содержат файла/строки вызова: поиск кадра
+        # вызывающего кода (findCaller) — самая дорогая часть LogRecord
+        logging._srcfile = None
+
+    _handler = DroppingQueueHandler(queue.Queue(config['LOG_QUEUE_SIZE']))
+    _handler.addFilter(RequestContextFilter())
+    _listener = logging.handlers.QueueListener(_handler.queue, _target_handler(config))
+    _listener.start()
+
+    root = logging.getLogger()
+    root.setLevel(config['LOG_LEVEL'])
+    root.addHandler(_handler)
+    return _handler
+
+
+def shutdown():
+    """Останавливает listener, дописав накопленные записи"""
+    global _listener, _handler
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        _handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown)
+
+
+def _restart_after_fork():
+    """Поток listener-а не переживает fork: в дочернем процессе (воркер
+    gunicorn при preload) он запускается заново с новой очередью"""
+    global _listener
+    if _listener is None:
+        return
+    _handler.queue = queue.Queue(_handler.queue.maxsize)
+    _listener = logging.handlers.QueueListener(_handler.queue, *_listener.handlers)
+    _listener.start()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def get_handler():
+    return _handler
+
+
+def init_app(app):
+    configure_logging(app.config)
+
+    @app.before_request
+    def assign_request_id():
+        g.x_request_id = request.headers.get('X-Request-ID') or str(uuid.uuid4())
+
+    @app.after_request
+    def log_request(response):
+        if info_enabled(access_logger):
+            elapsed = request_elapsed()
+            access_logger.info(
+                "%s %s %s", request.method, request.path, response.status_code,
+                extra={
+                    "method": request.method,
+                    "path": request.path,
+                    "endpoint": request.endpoint,
+                    "status": response.status_code,
+                    "latency_ms": None if elapsed is None else round(elapsed * 1000, 3)
+                }
+            )
+        return response
@@ -0,0 +1,225 @@
+"""Метрики запросов: счётчики, гистограммы задержек, время БД и сериализации.
+
+Хуки ``before_request``/``after_request``/``teardown_request`` пишут в
+шард текущего потока — обычные dict без блокировок, которые меняет только
+поток-владелец. Блокировка берётся лишь при регистрации нового потока;
+``/metrics`` суммирует шарды, копируя их атомарными под GIL ``dict.copy()``.
+
+Время в БД (``execute`` и ``fetch*``) и в JSON-сериализации копится в
+thread-local текущего запроса через ``add_db_time``/``add_serialization_time``,
+поэтому слой БД и JSON-провайдер не зависят от Flask-контекста.
+
+Метрики живут в процессе: при нескольких воркерах каждый отдаёт свои.
+"""
+import threading
+from bisect import bisect_left
+from time import perf_counter
+
+from flask import request
+
+# Время текущего запроса этого потока
+_current = threading.local()
+
+
+def add_db_time(seconds):
+    _current.db_time = getattr(_current, 'db_time', 0.0) + seconds
+
+
+def add_serialization_time(seconds):
+    _current.serialization_time = getattr(_current, 'serialization_time', 0.0) + seconds
+
+
+def request_elapsed():
+    """Секунд с начала текущего запроса или None вне запроса"""
+    started = getattr(_current, 'started', None)
+    return None if started is None else perf_counter() - started
+
+
+class _Shard:
+    __slots__ = ('requests', 'latency', 'db_seconds', 'serialization_seconds', 'in_flight')
+
+    def __init__(self):
+        self.requests = {}               # (endpoint, method, status) -> count
+        self.latency = {}                # (endpoint, method) -> [по корзинам..., +Inf, sum]
+        self.db_seconds = {}             # (endpoint, method) -> сек.
+        self.serialization_seconds = {}  # (endpoint, method) -> сек.
+        self.in_flight = 0
+
+
+class RequestMetrics:
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def start(self):
+        self._shard().in_flight += 1
+        _current.db_time = 0.0
+        _current.serialization_time = 0.0
+        _current.started = perf_counter()
+
+    def finish(self, endpoint, method, status):
+        started = getattr(_current, 'started', None)
+        if started is None:
+            return
+        elapsed = perf_counter() - started
+        shard = self._shard()
+        key = (endpoint, method)
+
+        requests = shard.requests
+        status_key = (endpoint, method, status)
+        requests[status_key] = requests.get(status_key, 0) + 1
+
+        histogram = shard.latency.get(key)
+        if histogram is None:
+            histogram = shard.latency[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        histogram[bisect_left(self.buckets, elapsed)] += 1
+        histogram[-1] += elapsed
+
+        db_seconds = shard.db_seconds
+        db_seconds[key] = db_seconds.get(key, 0.0) + _current.db_time
+        serialization = shard.serialization_seconds
+        serialization[key] = serialization.get(key, 0.0) + _current.serialization_time
+
+    def done(self):
+        if getattr(_current, 'started', None) is None:
+            return
+        _current.started = None
+        self._shard().in_flight -= 1
+
+    def collect(self):
+        """Сумма по всем потокам"""
+        with self._lock:
+            shards = list(self._shards)
+        requests, latency, db_seconds, serialization = {}, {}, {}, {}
+        in_flight = 0
+        for shard in shards:
+            in_flight += shard.in_flight
+            for key, count in shard.requests.copy().items():
+                requests[key] = requests.get(key, 0) + count
+            for key, histogram in shard.latency.copy().items():
+                histogram = list(histogram)
+                total = latency.get(key)
+                latency[key] = histogram if total is None else [a + b for a, b in zip(total, histogram)]
+            for key, seconds in shard.db_seconds.copy().items():
+                db_seconds[key] = db_seconds.get(key, 0.0) + seconds
+            for key, seconds in shard.serialization_seconds.copy().items():
+                serialization[key] = serialization.get(key, 0.0) + seconds
+        return {
+            "requests": requests,
+            "latency": latency,
+            "db_seconds": db_seconds,
+            "serialization_seconds": serialization,
+            "in_flight": in_flight
+        }
+
+    def summary(self):
+        """JSON-представление для /metrics"""
+        collected = self.collect()
+        endpoints = {}
+        for (endpoint, method), histogram in sorted(collected["latency"].items()):
+            count = sum(histogram[:-1])
+            cumulative, buckets = 0, {}
+            for bound, bucket in zip(self.buckets, histogram):
+                cumulative += bucket
+                buckets[str(bound)] = cumulative
+            endpoints.setdefault(endpoint, {})[method] = {
+                "count": count,
+                "statuses": {},
+                "latency_seconds": {
+                    "sum": round(histogram[-1], 6),
+                    "avg": round(histogram[-1] / count, 6) if count else 0.0,
+                    "buckets": buckets
+                },
+                "db_seconds": round(collected["db_seconds"].get((endpoint, method), 0.0), 6),
+                "serialization_seconds": round(
+                    collected["serialization_seconds"].get((endpoint, method), 0.0), 6)
+            }
+        for (endpoint, method, status), count in collected["requests"].items():
+            # гистограмма пишется после счётчика — параллельный finish мог не успеть
+            stats = endpoints.setdefault(endpoint, {}).setdefault(method, {"statuses": {}})
+            stats["statuses"][str(status)] = count
+        return {
+            "requests_total": sum(collected["requests"].values()),
+            "in_flight": collected["in_flight"],
+            "endpoints": endpoints
+        }
+
+    def prometheus(self):
+        """Строки text exposition format 0.0.4 для метрик запросов"""
+        collected = self.collect()
+        lines = []
+
+        lines += metric_header("http_requests_total", "counter", "HTTP-запросы по эндпоинту, методу и коду ответа")
+        for (endpoint, method, status), count in sorted(collected["requests"].items()):
+            lines.append(sample("http_requests_total", count,
+                                endpoint=endpoint, method=method, status=status))
+
+        name = "http_request_duration_seconds"
+        lines += metric_header(name, "histogram", "Время обработки запроса до отдачи ответа")
+        for (endpoint, method), histogram in sorted(collected["latency"].items()):
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + ('+Inf',), histogram):
+                cumulative += bucket
+                lines.append(sample(name + "_bucket", cumulative,
+                                    endpoint=endpoint, method=method, le=bound))
+            lines.append(sample(name + "_sum", histogram[-1], endpoint=endpoint, method=method))
+            lines.append(sample(name + "_count", cumulative, endpoint=endpoint, method=method))
+
+        for name, key, help_text in (
+            ("http_request_db_seconds_total", "db_seconds", "Время в SQLite (execute и fetch)"),
+            ("http_request_serialization_seconds_total", "serialization_seconds",
+             "Время JSON-сериализации ответов"),
+        ):
+            lines += metric_header(name, "counter", help_text)
+            for (endpoint, method), seconds in sorted(collected[key].items()):
+                lines.append(sample(name, seconds, endpoint=endpoint, method=method))
+
+        lines += metric_header("http_requests_in_flight", "gauge", "Запросы в обработке")
+        lines.append(sample("http_requests_in_flight", collected["in_flight"]))
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def metric_header(name, kind, help_text):
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+
+def sample(name, value, **labels):
+    if labels:
+        rendered = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+        name = f"{name}{{{rendered}}}"
+    return f"{name} {value}"
+
+
+def get_metrics(app):
+    return app.extensions['request_metrics']
+
+
+def init_app(app):
+    metrics = app.extensions['request_metrics'] = RequestMetrics(app.config['METRICS_LATENCY_BUCKETS'])
+
+    # Регистрируется первым, чтобы время включало остальные before_request
+    app.before_request_funcs.setdefault(None, []).insert(0, metrics.start)
+
+    @app.after_request
+    def record_request(response):
+        metrics.finish(request.endpoint or "unmatched", request.method, response.status_code)
+        return response
+
+    @app.teardown_request
+    def release_request(exc):
+        metrics.done()
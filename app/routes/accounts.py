@@ -1,11 +1,12 @@
 from flask import Blueprint, jsonify, request, abort
-from jsonschema import validate
 from jsonschema.exceptions import ValidationError
 from flasgger import swag_from
 import uuid
 import logging
 import re
-from app.db import execute_query
+from app.cache import cached_row, invalidate
+from app.db import execute_query, safe_db_write
+from app.statements import STATEMENTS
 from app.schemas.account import physical_account_schema, legal_account_schema
 from app.config import (
     ACCOUNT_TYPES,
@@ -13,13 +14,14 @@ from app.config import (
     RESPONSE_MESSAGES,
     HTTP_STATUS_CODES
 )
-from app.utils import log_endpoint, require_headers_and_echo
+from app.validation import validate
+from app.utils import log_endpoint, require_headers_and_echo, create_batch, list_response, entity_response
 
 # Логирование
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 accounts_bp = Blueprint('accounts', __name__)
+SQL = STATEMENTS["accounts"]
 
 # Регулярное выражение для проверки UUID
 UUID_PATTERN = re.compile(r'^[a-f0-9]{8}-([a-f0-9]{4}-){3}[a-f0-9]{12}$', re.I)
@@ -47,6 +49,26 @@ def safe_db_query(query, params=(), commit=False):
         abort(HTTP_STATUS_CODES["INTERNAL_SERVER_ERROR"],
               description=RESPONSE_MESSAGES["db_error"])
 
+def account_params(account_id, data, kind):
+    """Параметры INSERT для счёта физ. (owner) или юр. (company) лица"""
+    return (
+        account_id,
+        data['balance'],
+        data['currency'],
+        ACCOUNT_TYPES[kind],
+        data['status'],
+        data['owner' if kind == "physical" else 'company']
+    )
+
+def create_accounts_batch(kind):
+    schema = physical_account_schema if kind == "physical" else legal_account_schema
+
+    def build_params(data):
+        account_id = str(uuid.uuid4())
+        return account_id, account_params(account_id, data, kind)
+
+    return create_batch(SQL[f"insert_{kind}"], lambda data: safe_validate(data, schema), build_params)
+
 # === Эндпоинты для счетов физических лиц ===
 
 @accounts_bp.route('/accounts-v1.3.3/', methods=HTTP_METHODS[:2])  # GET, POST
@@ -55,11 +77,7 @@ def safe_db_query(query, params=(), commit=False):
 @require_headers_and_echo
 def physical_accounts():
     if request.method == 'GET':
-        cur = safe_db_query(
-            'SELECT * FROM accounts WHERE type = ?',
-            (ACCOUNT_TYPES["physical"],)
-        )
-        return jsonify([dict(row) for row in cur.fetchall()]), HTTP_STATUS_CODES["OK"]
+        return list_response(SQL["list_by_type"], SQL["list_by_type_page"], (ACCOUNT_TYPES["physical"],))
 
     if request.method == 'POST':
         error = safe_validate(request.json, physical_account_schema)
@@ -70,24 +88,21 @@ def physical_accounts():
             }), HTTP_STATUS_CODES["BAD_REQUEST"]
 
         account_id = str(uuid.uuid4())
-        safe_db_query(
-            '''INSERT INTO accounts (id, balance, currency, type, status, owner)
-               VALUES (?, ?, ?, ?, ?, ?)''',
-            (
-                account_id,
-                request.json['balance'],
-                request.json['currency'],
-                ACCOUNT_TYPES["physical"],
-                request.json['status'],
-                request.json['owner']
-            ),
-            commit=True
+        account = safe_db_write(
+            SQL["insert_physical_returning"],
+            account_params(account_id, request.json, "physical")
         )
-        cur = safe_db_query('SELECT * FROM accounts WHERE id = ?', (account_id,))
-        return jsonify(dict(cur.fetchone())), HTTP_STATUS_CODES["CREATED"]
+        return jsonify(dict(account)), HTTP_STATUS_CODES["CREATED"]
 
     return jsonify({"error": RESPONSE_MESSAGES["method_not_allowed"]}), HTTP_STATUS_CODES["METHOD_NOT_ALLOWED"]
 
+@accounts_bp.route('/accounts-v1.3.3/batch', methods=[HTTP_METHODS[1]])  # POST
+@swag_from('../docs/accounts.yml')
+@log_endpoint
+@require_headers_and_echo
+def physical_accounts_batch():
+    return create_accounts_batch("physical")
+
 @accounts_bp.route('/accounts-v1.3.3/<account_id>', methods=HTTP_METHODS)
 @swag_from('../docs/accounts.yml')
 @log_endpoint
@@ -96,14 +111,10 @@ def physical_account(account_id):
     validate_uuid(account_id)  # Проверка UUID
 
     if request.method == 'GET':
-        cur = safe_db_query(
-            'SELECT * FROM accounts WHERE id = ? AND type = ?',
-            (account_id, ACCOUNT_TYPES["physical"])
-        )
-        account = cur.fetchone()
-        if not account:
+        account = cached_row("accounts", account_id)
+        if not account or account["type"] != ACCOUNT_TYPES["physical"]:
             return jsonify({"error": RESPONSE_MESSAGES["not_found"]}), HTTP_STATUS_CODES["NOT_FOUND"]
-        return jsonify(dict(account)), HTTP_STATUS_CODES["OK"]
+        return entity_response(account)
 
     if request.method == 'PUT':
         error = safe_validate(request.json, physical_account_schema)
@@ -114,8 +125,7 @@ def physical_account(account_id):
             }), HTTP_STATUS_CODES["BAD_REQUEST"]
 
         safe_db_query(
-            '''UPDATE accounts SET balance = ?, currency = ?, status = ?, owner = ?
-               WHERE id = ? AND type = ?''',
+            SQL["update_physical"],
             (
                 request.json['balance'],
                 request.json['currency'],
@@ -126,14 +136,16 @@ def physical_account(account_id):
             ),
             commit=True
         )
+        invalidate("accounts", account_id)
         return jsonify({"status": "updated"}), HTTP_STATUS_CODES["OK"]
 
     if request.method == 'DELETE':
         safe_db_query(
-            'DELETE FROM accounts WHERE id = ? AND type = ?',
+            SQL["delete_by_id_and_type"],
             (account_id, ACCOUNT_TYPES["physical"]),
             commit=True
         )
+        invalidate("accounts", account_id)
         return '', HTTP_STATUS_CODES["NO_CONTENT"]
 
     return jsonify({"error": RESPONSE_MESSAGES["method_not_allowed"]}), HTTP_STATUS_CODES["METHOD_NOT_ALLOWED"]
@@ -146,11 +158,7 @@ def physical_account(account_id):
 @require_headers_and_echo
 def legal_accounts():
     if request.method == 'GET':
-        cur = safe_db_query(
-            'SELECT * FROM accounts WHERE type = ?',
-            (ACCOUNT_TYPES["legal"],)
-        )
-        return jsonify([dict(row) for row in cur.fetchall()]), HTTP_STATUS_CODES["OK"]
+        return list_response(SQL["list_by_type"], SQL["list_by_type_page"], (ACCOUNT_TYPES["legal"],))
 
     if request.method == 'POST':
         error = safe_validate(request.json, legal_account_schema)
@@ -161,24 +169,21 @@ def legal_accounts():
             }), HTTP_STATUS_CODES["BAD_REQUEST"]
 
         account_id = str(uuid.uuid4())
-        safe_db_query(
-            '''INSERT INTO accounts (id, balance, currency, type, status, company)
-               VALUES (?, ?, ?, ?, ?, ?)''',
-            (
-                account_id,
-                request.json['balance'],
-                request.json['currency'],
-                ACCOUNT_TYPES["legal"],
-                request.json['status'],
-                request.json['company']
-            ),
-            commit=True
+        account = safe_db_write(
+            SQL["insert_legal_returning"],
+            account_params(account_id, request.json, "legal")
         )
-        cur = safe_db_query('SELECT * FROM accounts WHERE id = ?', (account_id,))
-        return jsonify(dict(cur.fetchone())), HTTP_STATUS_CODES["CREATED"]
+        return jsonify(dict(account)), HTTP_STATUS_CODES["CREATED"]
 
     return jsonify({"error": RESPONSE_MESSAGES["method_not_allowed"]}), HTTP_STATUS_CODES["METHOD_NOT_ALLOWED"]
 
+@accounts_bp.route('/accounts-le-v2.0.0/batch', methods=[HTTP_METHODS[1]])  # POST
+@swag_from('../docs/accounts.yml')
+@log_endpoint
+@require_headers_and_echo
+def legal_accounts_batch():
+    return create_accounts_batch("legal")
+
 @accounts_bp.route('/accounts-le-v2.0.0/<account_id>', methods=HTTP_METHODS)
 @swag_from('../docs/accounts.yml')
 @log_endpoint
@@ -187,14 +192,10 @@ def legal_account(account_id):
     validate_uuid(account_id)
 
     if request.method == 'GET':
-        cur = safe_db_query(
-            'SELECT * FROM accounts WHERE id = ? AND type = ?',
-            (account_id, ACCOUNT_TYPES["legal"])
-        )
-        account = cur.fetchone()
-        if not account:
+        account = cached_row("accounts", account_id)
+        if not account or account["type"] != ACCOUNT_TYPES["legal"]:
             return jsonify({"error": RESPONSE_MESSAGES["not_found"]}), HTTP_STATUS_CODES["NOT_FOUND"]
-        return jsonify(dict(account)), HTTP_STATUS_CODES["OK"]
+        return entity_response(account)
 
     if request.method == 'PUT':
         error = safe_validate(request.json, legal_account_schema)
@@ -205,8 +206,7 @@ def legal_account(account_id):
             }), HTTP_STATUS_CODES["BAD_REQUEST"]
 
         safe_db_query(
-            '''UPDATE accounts SET balance = ?, currency = ?, status = ?, company = ?
-               WHERE id = ? AND type = ?''',
+            SQL["update_legal"],
             (
                 request.json['balance'],
                 request.json['currency'],
@@ -217,14 +217,16 @@ def legal_account(account_id):
             ),
             commit=True
         )
+        invalidate("accounts", account_id)
         return jsonify({"status": "updated"}), HTTP_STATUS_CODES["OK"]
 
     if request.method == 'DELETE':
         safe_db_query(
-            'DELETE FROM accounts WHERE id = ? AND type = ?',
+            SQL["delete_by_id_and_type"],
             (account_id, ACCOUNT_TYPES["legal"]),
             commit=True
         )
+        invalidate("accounts", account_id)
         return '', HTTP_STATUS_CODES["NO_CONTENT"]
 
     return jsonify({"error": RESPONSE_MESSAGES["method_not_allowed"]}), HTTP_STATUS_CODES["METHOD_NOT_ALLOWED"]
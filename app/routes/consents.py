@@ -1,9 +1,10 @@
 from flask import Blueprint, jsonify, request, abort
-from jsonschema import validate, ValidationError
+from jsonschema import ValidationError
 from flasgger import swag_from
 import uuid
 import json
 import logging
+from datetime import datetime
 from app.schemas.consent import consent_schema
 from app.config import (
     CONSENT_TYPES,
@@ -11,13 +12,16 @@ from app.config import (
     HTTP_STATUS_CODES,
     HTTP_METHODS
 )
-from app.db import execute_query, safe_db_query
-from app.utils import log_endpoint, serialize_row, require_headers_and_echo
+from app.cache import cached_row, invalidate, get_permission_cache
+from app.db import execute_query, safe_db_query, safe_db_write
+from app.statements import STATEMENTS, CONSENT_UPDATE_COLUMNS, consent_update
+from app.validation import validate
+from app.utils import log_endpoint, serialize_row, require_headers_and_echo, entity_response
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 consents_bp = Blueprint('consents', __name__)
+SQL = STATEMENTS["consents"]
 
 
 def safe_validate(data, schema):
@@ -39,6 +43,97 @@ def serialize_consent(row):
     return result
 
 
+# Колонки, которые PUT с null сбрасывает; для NOT NULL колонок null — «не менять»
+NULLABLE_COLUMNS = ('valid_until',)
+
+
+def consent_update_params(data):
+    """(колонки, параметры) частичного UPDATE: только поля, присланные в теле"""
+    columns = tuple(
+        column for column in CONSENT_UPDATE_COLUMNS
+        if column in data and (data[column] is not None or column in NULLABLE_COLUMNS)
+    )
+    return columns, tuple(
+        json.dumps(data[column]) if column == 'permissions' else data[column] for column in columns
+    )
+
+
+def update_consent(consent, data):
+    """Строка согласия после PUT; без изменяемых полей UPDATE не выполняется"""
+    columns, params = consent_update_params(data)
+    if not columns:
+        return consent
+    return safe_db_write(consent_update(columns), (*params, consent['id'], consent['type']))
+
+
+# Параметры query-строки /consent-*/check
+CHECK_PARAMS = ('tpp_id', 'account_id', 'permission')
+
+
+def grants_cutoff():
+    """Согласия с valid_until не позже этого момента уже не действуют (как в app/expiry.py)"""
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def consent_grants(consent_type, tpp_id, account_id):
+    """{разрешение: id согласия} по действующим согласиям TPP на счёт.
+
+    Строки ищутся по idx_consents_tpp_account, JSON ``permissions`` разбирается
+    один раз на промах кэша; результат (и пустой тоже) кэшируется до
+    CONSENT_CHECK_CACHE_TTL, до изменения согласий этой пары (forget_grants)
+    или до ближайшего valid_until этих согласий — ACTIVE-согласие с прошедшим
+    valid_until, которое проход истечения ещё не перевёл в EXPIRED, разрешений
+    не даёт.
+    """
+    cache = get_permission_cache()
+    key = (consent_type, tpp_id, account_id)
+    now = grants_cutoff()
+    cached = cache.get(key)
+    if cached is not None and (cached[1] is None or cached[1] > now):
+        return cached[0]
+    rows = safe_db_query(SQL["list_by_tpp_and_account"], (tpp_id, account_id, consent_type, "ACTIVE", now)).fetchall()
+    grants = {}
+    for row in rows:
+        for permission in serialize_consent(row)['permissions']:
+            if isinstance(permission, str):
+                grants.setdefault(permission, row['id'])
+    expires = min((row['valid_until'] for row in rows if row['valid_until'] is not None), default=None)
+    cache.set(key, (grants, expires), len(json.dumps(grants)) + len(tpp_id) + len(account_id))
+    return grants
+
+
+def forget_grants(*consents):
+    """Сбрасывает закэшированные проверки для пар (TPP, счёт) этих согласий"""
+    cache = get_permission_cache()
+    for consent in consents:
+        if consent is not None:
+            cache.delete((consent['type'], consent['tpp_id'], consent['account_id']))
+
+
+def check_consent(consent_type):
+    missing = [name for name in CHECK_PARAMS if not request.args.get(name)]
+    if missing:
+        return jsonify({
+            "error": RESPONSE_MESSAGES["validation_error"],
+            "message": f"Missing query parameters: {', '.join(missing)}"
+        }), HTTP_STATUS_CODES["BAD_REQUEST"]
+
+    tpp_id, account_id, permission = (request.args[name] for name in CHECK_PARAMS)
+    try:
+        consent_id = consent_grants(consent_type, tpp_id, account_id).get(permission)
+    except Exception as e:
+        logger.error(f"DB error: {str(e)}")
+        return jsonify({"error": RESPONSE_MESSAGES["db_error"]}), HTTP_STATUS_CODES["INTERNAL_SERVER_ERROR"]
+
+    return jsonify({
+        "allowed": consent_id is not None,
+        "consent_id": consent_id,
+        "tpp_id": tpp_id,
+        "account_id": account_id,
+        "permission": permission
+    }), HTTP_STATUS_CODES["OK"]
+
+
 @consents_bp.route('/consent-pe-v2.0.0/', methods=[HTTP_METHODS[1]])  # POST
 @swag_from('../docs/consents.yml')
 @log_endpoint
@@ -53,25 +148,27 @@ def create_pe_consent():
 
     consent_id = str(uuid.uuid4())
     try:
-        safe_db_query(
-            '''INSERT INTO consents 
-            (id, type, status, tpp_id, permissions) 
-            VALUES (?, ?, ?, ?, ?)''',
+        consent = safe_db_write(
+            SQL["insert_returning"],
             (
                 consent_id,
                 CONSENT_TYPES["physical"],
                 "ACTIVE",
                 request.json.get('tpp_id'),
-                json.dumps(request.json.get('permissions', []))
-            ),
-            commit=True
+                json.dumps(request.json.get('permissions', [])),
+                request.json.get('account_id'),
+                request.json.get('subject'),
+                request.json.get('scope'),
+                request.json.get('valid_until')
+            )
         )
     except Exception as e:
         logger.error(f"DB error: {str(e)}")
         return jsonify({"error": RESPONSE_MESSAGES["db_error"]}), HTTP_STATUS_CODES["INTERNAL_SERVER_ERROR"]
 
-    cur = safe_db_query('SELECT * FROM consents WHERE id = ?', (consent_id,))
-    return jsonify(serialize_consent(cur.fetchone())), HTTP_STATUS_CODES["CREATED"]
+    # Отказ по этой паре мог быть закэширован до создания согласия
+    forget_grants(consent)
+    return jsonify(serialize_consent(consent)), HTTP_STATUS_CODES["CREATED"]
 
 
 @consents_bp.route('/consent-le-v2.0.0/', methods=[HTTP_METHODS[1]])  # POST
@@ -88,25 +185,35 @@ def create_le_consent():
 
     consent_id = str(uuid.uuid4())
     try:
-        safe_db_query(
-            '''INSERT INTO consents 
-            (id, type, status, tpp_id, permissions) 
-            VALUES (?, ?, ?, ?, ?)''',
+        consent = safe_db_write(
+            SQL["insert_returning"],
             (
                 consent_id,
                 CONSENT_TYPES["legal"],
                 "ACTIVE",
                 request.json.get('tpp_id'),
-                json.dumps(request.json.get('permissions', []))
-            ),
-            commit=True
+                json.dumps(request.json.get('permissions', [])),
+                request.json.get('account_id'),
+                request.json.get('subject'),
+                request.json.get('scope'),
+                request.json.get('valid_until')
+            )
         )
     except Exception as e:
         logger.error(f"DB error: {str(e)}")
         return jsonify({"error": RESPONSE_MESSAGES["db_error"]}), HTTP_STATUS_CODES["INTERNAL_SERVER_ERROR"]
 
-    cur = safe_db_query('SELECT * FROM consents WHERE id = ?', (consent_id,))
-    return jsonify(serialize_consent(cur.fetchone())), HTTP_STATUS_CODES["CREATED"]
+    # Отказ по этой паре мог быть закэширован до создания согласия
+    forget_grants(consent)
+    return jsonify(serialize_consent(consent)), HTTP_STATUS_CODES["CREATED"]
+
+
+@consents_bp.route('/consent-pe-v2.0.0/check', methods=HTTP_METHODS[:1])
+@swag_from('../docs/consents.yml')
+@log_endpoint
+@require_headers_and_echo
+def pe_consent_check():
+    return check_consent(CONSENT_TYPES["physical"])
 
 
 @consents_bp.route('/consent-pe-v2.0.0/<consent_id>', methods=HTTP_METHODS)
@@ -114,16 +221,13 @@ def create_le_consent():
 @log_endpoint
 @require_headers_and_echo
 def pe_consent(consent_id):
-    cur = safe_db_query(
-        'SELECT * FROM consents WHERE id = ? AND type = ?',
-        (consent_id, CONSENT_TYPES["physical"])
-    )
-    consent = cur.fetchone() if cur else None
+    consent = cached_row("consents", consent_id)
 
-    if not consent:
+    if not consent or consent["type"] != CONSENT_TYPES["physical"]:
         return jsonify({"error": RESPONSE_MESSAGES["not_found"]}), HTTP_STATUS_CODES["NOT_FOUND"]
 
     if request.method == 'PUT':
+        old = consent
         error = safe_validate(request.json, consent_schema)
         if error:
             return jsonify({
@@ -131,39 +235,30 @@ def pe_consent(consent_id):
                 "message": error
             }), HTTP_STATUS_CODES["BAD_REQUEST"]
 
-        update_fields = []
-        params = []
-        for field in ['status', 'tpp_id', 'permissions']:
-            if field in request.json:
-                update_fields.append(f"{field} = ?")
-                params.append(
-                    json.dumps(request.json[field]) if field == 'permissions'
-                    else request.json[field]
-                )
-
-        if update_fields:
-            params.extend([consent_id, CONSENT_TYPES["physical"]])
-            safe_db_query(
-                f"UPDATE consents SET {', '.join(update_fields)} WHERE id = ? AND type = ?",
-                params,
-                commit=True
-            )
-
-        cur = safe_db_query(
-            'SELECT * FROM consents WHERE id = ? AND type = ?',
-            (consent_id, CONSENT_TYPES["physical"])
-        )
-        consent = cur.fetchone()
+        consent = update_consent(consent, request.json)
+        invalidate("consents", consent_id)
+        # PUT может сменить tpp_id: сбрасываются и прежняя, и новая пара
+        forget_grants(old, consent)
 
     elif request.method == 'DELETE':
         safe_db_query(
-            'DELETE FROM consents WHERE id = ? AND type = ?',
+            SQL["delete_by_id_and_type"],
             (consent_id, CONSENT_TYPES["physical"]),
             commit=True
         )
+        invalidate("consents", consent_id)
+        forget_grants(consent)
         return '', HTTP_STATUS_CODES["NO_CONTENT"]
 
-    return jsonify(serialize_consent(consent)), HTTP_STATUS_CODES["OK"]
+    return entity_response(consent, serialize_consent)
+
+
+@consents_bp.route('/consent-le-v2.0.0/check', methods=HTTP_METHODS[:1])
+@swag_from('../docs/consents.yml')
+@log_endpoint
+@require_headers_and_echo
+def le_consent_check():
+    return check_consent(CONSENT_TYPES["legal"])
 
 
 @consents_bp.route('/consent-le-v2.0.0/<consent_id>', methods=HTTP_METHODS)
@@ -171,16 +266,13 @@ def pe_consent(consent_id):
 @log_endpoint
 @require_headers_and_echo
 def le_consent(consent_id):
-    cur = safe_db_query(
-        'SELECT * FROM consents WHERE id = ? AND type = ?',
-        (consent_id, CONSENT_TYPES["legal"])
-    )
-    consent = cur.fetchone() if cur else None
+    consent = cached_row("consents", consent_id)
 
-    if not consent:
+    if not consent or consent["type"] != CONSENT_TYPES["legal"]:
         return jsonify({"error": RESPONSE_MESSAGES["not_found"]}), HTTP_STATUS_CODES["NOT_FOUND"]
 
     if request.method == 'PUT':
+        old = consent
         error = safe_validate(request.json, consent_schema)
         if error:
             return jsonify({
@@ -188,36 +280,19 @@ def le_consent(consent_id):
                 "message": error
             }), HTTP_STATUS_CODES["BAD_REQUEST"]
 
-        update_fields = []
-        params = []
-        for field in ['status', 'tpp_id', 'permissions']:
-            if field in request.json:
-                update_fields.append(f"{field} = ?")
-                params.append(
-                    json.dumps(request.json[field]) if field == 'permissions'
-                    else request.json[field]
-                )
-
-        if update_fields:
-            params.extend([consent_id, CONSENT_TYPES["legal"]])
-            safe_db_query(
-                f"UPDATE consents SET {', '.join(update_fields)} WHERE id = ? AND type = ?",
-                params,
-                commit=True
-            )
-
-        cur = safe_db_query(
-            'SELECT * FROM consents WHERE id = ? AND type = ?',
-            (consent_id, CONSENT_TYPES["legal"])
-        )
-        consent = cur.fetchone()
+        consent = update_consent(consent, request.json)
+        invalidate("consents", consent_id)
+        # PUT может сменить tpp_id: сбрасываются и прежняя, и новая пара
+        forget_grants(old, consent)
 
     elif request.method == 'DELETE':
         safe_db_query(
-            'DELETE FROM consents WHERE id = ? AND type = ?',
+            SQL["delete_by_id_and_type"],
             (consent_id, CONSENT_TYPES["legal"]),
             commit=True
         )
+        invalidate("consents", consent_id)
+        forget_grants(consent)
         return '', HTTP_STATUS_CODES["NO_CONTENT"]
 
-    return jsonify(serialize_consent(consent)), HTTP_STATUS_CODES["OK"]
+    return entity_response(consent, serialize_consent)
@@ -1,5 +1,5 @@
 from flask import Blueprint, jsonify, request, abort
-from jsonschema import validate, ValidationError
+from jsonschema import ValidationError
 from flasgger import swag_from
 import uuid
 import logging
@@ -10,13 +10,17 @@ from app.config import (
     HTTP_METHODS,
     DOCUMENT_TYPES
 )
-from app.db import safe_db_query
-from app.utils import log_endpoint, serialize_row, require_headers_and_echo
+from app.cache import cached_row, invalidate
+from app.db import safe_db_query, safe_db_write
+from app.statements import STATEMENTS
+from app.validation import validate
+from app.utils import log_endpoint, serialize_row, require_headers_and_echo, list_response, entity_response
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 documents_bp = Blueprint('documents', __name__)
+BANK_SQL = STATEMENTS["bank_docs"]
+INSURANCE_SQL = STATEMENTS["insurance_docs"]
 
 
 def safe_validate(data, schema):
@@ -47,21 +51,17 @@ def bank_docs():
 
         try:
             doc_id = str(uuid.uuid4())
-            safe_db_query(
-                '''INSERT INTO bank_docs 
-                   (id, type, content, signature, created_at, account_id)
-                   VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP, ?)''',
+            doc = safe_db_write(
+                BANK_SQL["insert_returning"],
                 (
                     doc_id,
                     request.json['type'],
                     request.json['content'],
                     request.json['signature'],
                     request.json['account_id']
-                ),
-                commit=True
+                )
             )
-            cur = safe_db_query('SELECT * FROM bank_docs WHERE id = ?', (doc_id,))
-            return jsonify(serialize_doc(cur.fetchone())), HTTP_STATUS_CODES["CREATED"]
+            return jsonify(serialize_doc(doc)), HTTP_STATUS_CODES["CREATED"]
 
         except Exception as e:
             logger.error(f"Database error: {str(e)}")
@@ -69,8 +69,7 @@ def bank_docs():
 
     # GET
     try:
-        cur = safe_db_query('SELECT * FROM bank_docs')
-        return jsonify([serialize_doc(row) for row in cur.fetchall()]), HTTP_STATUS_CODES["OK"]
+        return list_response(BANK_SQL["list"], BANK_SQL["list_page"], serialize=serialize_doc)
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
         return jsonify({"error": RESPONSE_MESSAGES["db_error"]}), HTTP_STATUS_CODES["INTERNAL_SERVER_ERROR"]
@@ -82,8 +81,7 @@ def bank_docs():
 @require_headers_and_echo
 def bank_doc(doc_id):
     try:
-        cur = safe_db_query('SELECT * FROM bank_docs WHERE id = ?', (doc_id,))
-        doc = cur.fetchone()
+        doc = cached_row("bank_docs", doc_id)
 
         if not doc:
             return jsonify({"error": RESPONSE_MESSAGES["not_found"]}), HTTP_STATUS_CODES["NOT_FOUND"]
@@ -96,26 +94,23 @@ def bank_doc(doc_id):
                     "message": error
                 }), HTTP_STATUS_CODES["BAD_REQUEST"]
 
-            safe_db_query(
-                '''UPDATE bank_docs SET 
-                   type = ?, content = ?, signature = ? 
-                   WHERE id = ?''',
+            doc = safe_db_write(
+                BANK_SQL["update_returning"],
                 (
                     request.json['type'],
                     request.json['content'],
                     request.json['signature'],
                     doc_id
-                ),
-                commit=True
+                )
             )
-            cur = safe_db_query('SELECT * FROM bank_docs WHERE id = ?', (doc_id,))
-            doc = cur.fetchone()
+            invalidate("bank_docs", doc_id)
 
         elif request.method == 'DELETE':
-            safe_db_query('DELETE FROM bank_docs WHERE id = ?', (doc_id,), commit=True)
+            safe_db_query(BANK_SQL["delete"], (doc_id,), commit=True)
+            invalidate("bank_docs", doc_id)
             return '', HTTP_STATUS_CODES["NO_CONTENT"]
 
-        return jsonify(serialize_doc(doc)), HTTP_STATUS_CODES["OK"]
+        return entity_response(doc, serialize_doc)
 
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
@@ -137,21 +132,17 @@ def insurance_docs():
 
         try:
             doc_id = str(uuid.uuid4())
-            safe_db_query(
-                '''INSERT INTO insurance_docs 
-                   (id, type, content, policy_number, valid_until, created_at)
-                   VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)''',
+            doc = safe_db_write(
+                INSURANCE_SQL["insert_returning"],
                 (
                     doc_id,
                     request.json['type'],
                     request.json['content'],
                     request.json['policy_number'],
                     request.json['valid_until']
-                ),
-                commit=True
+                )
             )
-            cur = safe_db_query('SELECT * FROM insurance_docs WHERE id = ?', (doc_id,))
-            return jsonify(serialize_doc(cur.fetchone())), HTTP_STATUS_CODES["CREATED"]
+            return jsonify(serialize_doc(doc)), HTTP_STATUS_CODES["CREATED"]
 
         except Exception as e:
             logger.error(f"Database error: {str(e)}")
@@ -159,8 +150,7 @@ def insurance_docs():
 
     # GET
     try:
-        cur = safe_db_query('SELECT * FROM insurance_docs')
-        return jsonify([serialize_doc(row) for row in cur.fetchall()]), HTTP_STATUS_CODES["OK"]
+        return list_response(INSURANCE_SQL["list"], INSURANCE_SQL["list_page"], serialize=serialize_doc)
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
         return jsonify({"error": RESPONSE_MESSAGES["db_error"]}), HTTP_STATUS_CODES["INTERNAL_SERVER_ERROR"]
@@ -172,8 +162,7 @@ def insurance_docs():
 @require_headers_and_echo
 def insurance_doc(doc_id):
     try:
-        cur = safe_db_query('SELECT * FROM insurance_docs WHERE id = ?', (doc_id,))
-        doc = cur.fetchone()
+        doc = cached_row("insurance_docs", doc_id)
 
         if not doc:
             return jsonify({"error": RESPONSE_MESSAGES["not_found"]}), HTTP_STATUS_CODES["NOT_FOUND"]
@@ -186,27 +175,24 @@ def insurance_doc(doc_id):
                     "message": error
                 }), HTTP_STATUS_CODES["BAD_REQUEST"]
 
-            safe_db_query(
-                '''UPDATE insurance_docs SET 
-                   type = ?, content = ?, policy_number = ?, valid_until = ? 
-                   WHERE id = ?''',
+            doc = safe_db_write(
+                INSURANCE_SQL["update_returning"],
                 (
                     request.json['type'],
                     request.json['content'],
                     request.json['policy_number'],
                     request.json['valid_until'],
                     doc_id
-                ),
-                commit=True
+                )
             )
-            cur = safe_db_query('SELECT * FROM insurance_docs WHERE id = ?', (doc_id,))
-            doc = cur.fetchone()
+            invalidate("insurance_docs", doc_id)
 
         elif request.method == 'DELETE':
-            safe_db_query('DELETE FROM insurance_docs WHERE id = ?', (doc_id,), commit=True)
+            safe_db_query(INSURANCE_SQL["delete"], (doc_id,), commit=True)
+            invalidate("insurance_docs", doc_id)
             return '', HTTP_STATUS_CODES["NO_CONTENT"]
 
-        return jsonify(serialize_doc(doc)), HTTP_STATUS_CODES["OK"]
+        return entity_response(doc, serialize_doc)
 
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
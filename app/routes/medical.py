@@ -1,5 +1,5 @@
 from flask import Blueprint, jsonify, request
-from jsonschema import validate, ValidationError
+from jsonschema import ValidationError
 from flasgger import swag_from
 import uuid
 import logging
@@ -10,13 +10,16 @@ from app.config import (
     HTTP_STATUS_CODES,
     HTTP_METHODS
 )
-from app.db import safe_db_query
-from app.utils import log_endpoint, serialize_row, require_headers_and_echo
+from app.cache import cached_row, invalidate
+from app.db import safe_db_query, safe_db_write
+from app.statements import STATEMENTS
+from app.validation import validate
+from app.utils import log_endpoint, serialize_row, require_headers_and_echo, list_response, entity_response
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 medical_bp = Blueprint('medical', __name__)
+SQL = STATEMENTS["medical_insured"]
 
 
 def safe_validate(data, schema):
@@ -48,20 +51,16 @@ def medical_insured():
 
         try:
             person_id = str(uuid.uuid4())
-            safe_db_query(
-                '''INSERT INTO medical_insured 
-                (id, name, policy_number, birth_date) 
-                VALUES (?, ?, ?, ?)''',
+            person = safe_db_write(
+                SQL["insert_returning"],
                 (
                     person_id,
                     request.json['name'],
                     request.json['policy_number'],
                     request.json['birth_date']
-                ),
-                commit=True
+                )
             )
-            cur = safe_db_query('SELECT * FROM medical_insured WHERE id = ?', (person_id,))
-            return jsonify(serialize_row(cur.fetchone())), HTTP_STATUS_CODES["CREATED"]
+            return jsonify(serialize_row(person)), HTTP_STATUS_CODES["CREATED"]
 
         except Exception as e:
             logger.error(f"Database error: {str(e)}")
@@ -69,9 +68,7 @@ def medical_insured():
 
     # GET
     try:
-        cur = safe_db_query('SELECT * FROM medical_insured')
-        people = [serialize_row(row) for row in cur.fetchall()] if cur else []
-        return jsonify(people), HTTP_STATUS_CODES["OK"]
+        return list_response(SQL["list"], SQL["list_page"])
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
         return jsonify({"error": RESPONSE_MESSAGES["db_error"]}), HTTP_STATUS_CODES["INTERNAL_SERVER_ERROR"]
@@ -83,8 +80,7 @@ def medical_insured():
 @require_headers_and_echo
 def single_medical_insured(person_id):
     try:
-        cur = safe_db_query('SELECT * FROM medical_insured WHERE id = ?', (person_id,))
-        person = cur.fetchone() if cur else None
+        person = cached_row("medical_insured", person_id)
 
         if not person:
             return jsonify({"error": RESPONSE_MESSAGES["not_found"]}), HTTP_STATUS_CODES["NOT_FOUND"]
@@ -97,26 +93,23 @@ def single_medical_insured(person_id):
                     "message": error
                 }), HTTP_STATUS_CODES["BAD_REQUEST"]
 
-            safe_db_query(
-                '''UPDATE medical_insured 
-                SET name = ?, policy_number = ?, birth_date = ? 
-                WHERE id = ?''',
+            person = safe_db_write(
+                SQL["update_returning"],
                 (
                     request.json['name'],
                     request.json['policy_number'],
                     request.json['birth_date'],
                     person_id
-                ),
-                commit=True
+                )
             )
-            cur = safe_db_query('SELECT * FROM medical_insured WHERE id = ?', (person_id,))
-            person = cur.fetchone()
+            invalidate("medical_insured", person_id)
 
         elif request.method == 'DELETE':
-            safe_db_query('DELETE FROM medical_insured WHERE id = ?', (person_id,), commit=True)
+            safe_db_query(SQL["delete"], (person_id,), commit=True)
+            invalidate("medical_insured", person_id)
             return '', HTTP_STATUS_CODES["NO_CONTENT"]
 
-        return jsonify(serialize_row(person)), HTTP_STATUS_CODES["OK"]
+        return entity_response(person)
 
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
@@ -1,5 +1,5 @@
 from flask import Blueprint, jsonify, request
-from jsonschema import validate, ValidationError
+from jsonschema import ValidationError
 from flasgger import swag_from
 import uuid
 from datetime import datetime
@@ -11,13 +11,16 @@ from app.config import (
     HTTP_STATUS_CODES,
     HTTP_METHODS
 )
-from app.db import safe_db_query
-from app.utils import log_endpoint, serialize_row, require_headers_and_echo
+from app.cache import cached_row, invalidate
+from app.db import safe_db_query, safe_db_write
+from app.statements import STATEMENTS
+from app.validation import validate
+from app.utils import log_endpoint, serialize_row, require_headers_and_echo, create_batch, entity_response
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 payments_bp = Blueprint('payments', __name__)
+SQL = STATEMENTS["payments"]
 
 
 def safe_validate(data, schema):
@@ -43,37 +46,45 @@ def create_payment():
 
     try:
         payment_id = str(uuid.uuid4())
-        safe_db_query(
-            '''INSERT INTO payments 
-            (id, status, created_at, amount, currency, recipient, account_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?)''',
-            (
-                payment_id,
-                PAYMENT_STATUSES["pending"],
-                datetime.now().isoformat(),
-                request.json['amount'],
-                request.json['currency'],
-                request.json['recipient'],
-                request.json['account_id']
-            ),
-            commit=True
-        )
-        cur = safe_db_query('SELECT * FROM payments WHERE id = ?', (payment_id,))
-        return jsonify(serialize_row(cur.fetchone())), HTTP_STATUS_CODES["CREATED"]
+        payment = safe_db_write(SQL["insert_returning"], payment_params(payment_id, request.json))
+        return jsonify(serialize_row(payment)), HTTP_STATUS_CODES["CREATED"]
 
     except Exception as e:
         logger.error(f"Payment creation error: {str(e)}")
         return jsonify({"error": RESPONSE_MESSAGES["db_error"]}), HTTP_STATUS_CODES["INTERNAL_SERVER_ERROR"]
 
 
+@payments_bp.route('/payments-v1.3.1/batch', methods=[HTTP_METHODS[1]])  # POST
+@swag_from('../docs/payments.yml')
+@log_endpoint
+@require_headers_and_echo
+def create_payments_batch():
+    def build_params(data):
+        payment_id = str(uuid.uuid4())
+        return payment_id, payment_params(payment_id, data)
+
+    return create_batch(SQL["insert"], lambda data: safe_validate(data, payment_schema), build_params)
+
+
+def payment_params(payment_id, data):
+    return (
+        payment_id,
+        PAYMENT_STATUSES["pending"],
+        datetime.now().isoformat(),
+        data['amount'],
+        data['currency'],
+        data['recipient'],
+        data['account_id']
+    )
+
+
 @payments_bp.route('/payments-v1.3.1/<payment_id>', methods=HTTP_METHODS)
 @swag_from('../docs/payments.yml')
 @log_endpoint
 @require_headers_and_echo
 def payment_operations(payment_id):
     try:
-        cur = safe_db_query('SELECT * FROM payments WHERE id = ?', (payment_id,))
-        payment = cur.fetchone() if cur else None
+        payment = cached_row("payments", payment_id)
 
         if not payment:
             return jsonify({"error": RESPONSE_MESSAGES["not_found"]}), HTTP_STATUS_CODES["NOT_FOUND"]
@@ -84,7 +95,7 @@ def payment_operations(payment_id):
         elif request.method == 'DELETE':
             return handle_payment_deletion(payment_id)
 
-        return jsonify(serialize_row(payment)), HTTP_STATUS_CODES["OK"]
+        return entity_response(payment)
 
     except Exception as e:
         logger.error(f"Payment operation error: {str(e)}")
@@ -100,20 +111,17 @@ def handle_payment_update(payment_id, data):
         }), HTTP_STATUS_CODES["BAD_REQUEST"]
 
     try:
-        safe_db_query(
-            '''UPDATE payments 
-            SET amount = ?, currency = ?, recipient = ? 
-            WHERE id = ?''',
+        payment = safe_db_write(
+            SQL["update_returning"],
             (
                 data['amount'],
                 data['currency'],
                 data['recipient'],
                 payment_id
-            ),
-            commit=True
+            )
         )
-        cur = safe_db_query('SELECT * FROM payments WHERE id = ?', (payment_id,))
-        return jsonify(serialize_row(cur.fetchone())), HTTP_STATUS_CODES["OK"]
+        invalidate("payments", payment_id)
+        return jsonify(serialize_row(payment)), HTTP_STATUS_CODES["OK"]
 
     except Exception as e:
         logger.error(f"Payment update error: {str(e)}")
@@ -122,7 +130,8 @@ def handle_payment_update(payment_id, data):
 
 def handle_payment_deletion(payment_id):
     try:
-        safe_db_query('DELETE FROM payments WHERE id = ?', (payment_id,), commit=True)
+        safe_db_query(SQL["delete"], (payment_id,), commit=True)
+        invalidate("payments", payment_id)
         return '', HTTP_STATUS_CODES["NO_CONTENT"]
 
     except Exception as e:
@@ -1,5 +1,5 @@
 from flask import Blueprint, jsonify, request
-from jsonschema import validate, ValidationError
+from jsonschema import ValidationError
 from flasgger import swag_from
 import uuid
 import logging
@@ -11,13 +11,16 @@ from app.config import (
     HTTP_STATUS_CODES,
     HTTP_METHODS
 )
-from app.db import safe_db_query
-from app.utils import log_endpoint, serialize_row, require_headers_and_echo
+from app.cache import cached_row, invalidate
+from app.db import safe_db_query, safe_db_write
+from app.statements import STATEMENTS
+from app.validation import validate
+from app.utils import log_endpoint, serialize_row, require_headers_and_echo, list_response, entity_response
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 pm_211fz_bp = Blueprint('pm_211fz', __name__)
+SQL = STATEMENTS["payments"]
 
 
 def safe_validate(data, schema):
@@ -50,10 +53,8 @@ def handle_pm_211fz_creation(data):
 
     try:
         payment_id = str(uuid.uuid4())
-        safe_db_query(
-            '''INSERT INTO payments 
-            (id, status, type, amount, currency, recipient, purpose, budget_code, created_at, account_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?)''',
+        payment = safe_db_write(
+            SQL["insert_pm_211fz_returning"],
             (
                 payment_id,
                 PAYMENT_STATUSES["pending"],
@@ -64,11 +65,9 @@ def handle_pm_211fz_creation(data):
                 data['purpose'],
                 data['budget_code'],
                 data['account_id']
-            ),
-            commit=True
+            )
         )
-        cur = safe_db_query('SELECT * FROM payments WHERE id = ?', (payment_id,))
-        return jsonify(serialize_row(cur.fetchone())), HTTP_STATUS_CODES["CREATED"]
+        return jsonify(serialize_row(payment)), HTTP_STATUS_CODES["CREATED"]
 
     except Exception as e:
         logger.error(f"Payment creation failed: {str(e)}")
@@ -77,9 +76,7 @@ def handle_pm_211fz_creation(data):
 
 def handle_pm_211fz_list():
     try:
-        cur = safe_db_query('SELECT * FROM payments WHERE type = ?', (PAYMENT_TYPES["pm_211fz"],))
-        payments = [serialize_row(row) for row in cur.fetchall()] if cur else []
-        return jsonify(payments), HTTP_STATUS_CODES["OK"]
+        return list_response(SQL["list_by_type"], SQL["list_by_type_page"], (PAYMENT_TYPES["pm_211fz"],))
 
     except Exception as e:
         logger.error(f"Payment list retrieval failed: {str(e)}")
@@ -103,7 +100,7 @@ def single_pm_211fz(payment_id):
         if request.method == 'DELETE':
             return delete_pm_211fz(payment_id)
 
-        return jsonify(serialize_row(payment)), HTTP_STATUS_CODES["OK"]
+        return entity_response(payment)
 
     except Exception as e:
         logger.error(f"Payment operation failed: {str(e)}")
@@ -111,11 +108,8 @@ def single_pm_211fz(payment_id):
 
 
 def get_payment(payment_id):
-    cur = safe_db_query(
-        'SELECT * FROM payments WHERE id = ? AND type = ?',
-        (payment_id, PAYMENT_TYPES["pm_211fz"])
-    )
-    return cur.fetchone() if cur else None
+    payment = cached_row("payments", payment_id)
+    return payment if payment and payment["type"] == PAYMENT_TYPES["pm_211fz"] else None
 
 
 def update_pm_211fz(payment_id, data):
@@ -127,21 +121,18 @@ def update_pm_211fz(payment_id, data):
         }), HTTP_STATUS_CODES["BAD_REQUEST"]
 
     try:
-        safe_db_query(
-            '''UPDATE payments SET 
-            amount = ?, currency = ?, recipient = ? 
-            WHERE id = ? AND type = ?''',
+        payment = safe_db_write(
+            SQL["update_by_type_returning"],
             (
                 data['amount'],
                 data['currency'],
                 data['recipient'],
                 payment_id,
                 PAYMENT_TYPES["pm_211fz"]
-            ),
-            commit=True
+            )
         )
-        cur = safe_db_query('SELECT * FROM payments WHERE id = ?', (payment_id,))
-        return jsonify(serialize_row(cur.fetchone())), HTTP_STATUS_CODES["OK"]
+        invalidate("payments", payment_id)
+        return jsonify(serialize_row(payment)), HTTP_STATUS_CODES["OK"]
 
     except Exception as e:
         logger.error(f"Payment update failed: {str(e)}")
@@ -151,10 +142,11 @@ def update_pm_211fz(payment_id, data):
 def delete_pm_211fz(payment_id):
     try:
         safe_db_query(
-            'DELETE FROM payments WHERE id = ? AND type = ?',
+            SQL["delete_by_type"],
             (payment_id, PAYMENT_TYPES["pm_211fz"]),
             commit=True
         )
+        invalidate("payments", payment_id)
         return '', HTTP_STATUS_CODES["NO_CONTENT"]
 
     except Exception as e:
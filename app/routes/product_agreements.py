@@ -1,5 +1,5 @@
 from flask import Blueprint, jsonify, request
-from jsonschema import validate, ValidationError
+from jsonschema import ValidationError
 from flasgger import swag_from
 import uuid
 import json
@@ -11,13 +11,16 @@ from app.config import (
     HTTP_STATUS_CODES,
     HTTP_METHODS
 )
-from app.db import safe_db_query
-from app.utils import log_endpoint, serialize_row, require_headers_and_echo
+from app.cache import cached_row, invalidate
+from app.db import safe_db_query, safe_db_write
+from app.statements import STATEMENTS
+from app.validation import validate
+from app.utils import log_endpoint, serialize_row, require_headers_and_echo, entity_response
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 product_agreements_bp = Blueprint('product_agreements', __name__)
+SQL = STATEMENTS["product_agreements"]
 
 
 def safe_validate(data, schema):
@@ -62,21 +65,17 @@ def handle_agreement_creation(data):
         agreement_id = str(uuid.uuid4())
         terms_str = json.dumps(data.get('terms', []))
 
-        safe_db_query(
-            '''INSERT INTO product_agreements 
-            (id, product_type, terms, status)
-            VALUES (?, ?, ?, ?)''',
+        agreement = safe_db_write(
+            SQL["insert_returning"],
             (
                 agreement_id,
                 data['product_type'],
                 terms_str,
-                AGREEMENT_STATUSES["active"]
-            ),
-            commit=True
+                AGREEMENT_STATUSES["active"],
+                data.get('account_id')
+            )
         )
-
-        cur = safe_db_query('SELECT * FROM product_agreements WHERE id = ?', (agreement_id,))
-        return jsonify(serialize_agreement(cur.fetchone())), HTTP_STATUS_CODES["CREATED"]
+        return jsonify(serialize_agreement(agreement)), HTTP_STATUS_CODES["CREATED"]
 
     except Exception as e:
         logger.error(f"Agreement creation failed: {str(e)}")
@@ -85,7 +84,7 @@ def handle_agreement_creation(data):
 
 def handle_agreements_list():
     try:
-        cur = safe_db_query('SELECT * FROM product_agreements')
+        cur = safe_db_query(SQL["list"])
         agreements = [serialize_agreement(row) for row in cur.fetchall()] if cur else []
         return jsonify(agreements), HTTP_STATUS_CODES["OK"]
 
@@ -111,7 +110,7 @@ def single_product_agreement(agreement_id):
         if request.method == 'DELETE':
             return delete_agreement(agreement_id)
 
-        return jsonify(serialize_agreement(agreement)), HTTP_STATUS_CODES["OK"]
+        return entity_response(agreement, serialize_agreement)
 
     except Exception as e:
         logger.error(f"Agreement operation failed: {str(e)}")
@@ -119,8 +118,7 @@ def single_product_agreement(agreement_id):
 
 
 def get_agreement(agreement_id):
-    cur = safe_db_query('SELECT * FROM product_agreements WHERE id = ?', (agreement_id,))
-    return cur.fetchone() if cur else None
+    return cached_row("product_agreements", agreement_id)
 
 
 def update_agreement(agreement_id, data):
@@ -133,19 +131,16 @@ def update_agreement(agreement_id, data):
 
     try:
         terms_str = json.dumps(data.get('terms', []))
-        safe_db_query(
-            '''UPDATE product_agreements 
-            SET product_type = ?, terms = ? 
-            WHERE id = ?''',
+        agreement = safe_db_write(
+            SQL["update_returning"],
             (
                 data['product_type'],
                 terms_str,
                 agreement_id
-            ),
-            commit=True
+            )
         )
-        cur = safe_db_query('SELECT * FROM product_agreements WHERE id = ?', (agreement_id,))
-        return jsonify(serialize_agreement(cur.fetchone())), HTTP_STATUS_CODES["OK"]
+        invalidate("product_agreements", agreement_id)
+        return jsonify(serialize_agreement(agreement)), HTTP_STATUS_CODES["OK"]
 
     except Exception as e:
         logger.error(f"Agreement update failed: {str(e)}")
@@ -155,10 +150,11 @@ def update_agreement(agreement_id, data):
 def delete_agreement(agreement_id):
     try:
         safe_db_query(
-            'DELETE FROM product_agreements WHERE id = ?',
+            SQL["delete"],
             (agreement_id,),
             commit=True
         )
+        invalidate("product_agreements", agreement_id)
         return '', HTTP_STATUS_CODES["NO_CONTENT"]
 
     except Exception as e:
@@ -1,7 +1,8 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request
 import logging
 import psutil
 import sqlite3
+import time
 from datetime import datetime
 from app.config import (
     SYSTEM_CONFIG,
@@ -10,10 +11,15 @@ from app.config import (
     HTTP_STATUS_CODES,
     HTTP_METHODS
 )
-from app.db import safe_db_query
-from app.utils import log_endpoint, require_headers_and_echo
+from app.cache import get_cache, get_permission_cache
+from app.expiry import get_sweeper
+from app.idempotency import get_idempotency_store
+from app.db import safe_db_query, get_storage
+from app.metrics import get_metrics, metric_header, sample
+from app.snapshots import SNAPSHOT_COMPRESSION, list_snapshots, restore_snapshot, save_snapshot
+from app.statements import STATEMENTS
+from app.utils import log_endpoint, require_headers_and_echo, token_required
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 system_bp = Blueprint('system', __name__)
@@ -55,7 +61,7 @@ def simulate_errors():
 def health_check():
     db_status = SYSTEM_CONFIG["health_statuses"]["db_disconnected"]
     try:
-        safe_db_query('SELECT 1')
+        safe_db_query(STATEMENTS["system"]["ping"])
         db_status = SYSTEM_CONFIG["health_statuses"]["db_connected"]
     except sqlite3.Error as e:
         logger.error(f"Database health check failed: {str(e)}")
@@ -70,35 +76,111 @@ def health_check():
     }), HTTP_STATUS_CODES["OK"]
 
 
+PROMETHEUS_MIMETYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def wants_prometheus():
+    """?format=prometheus или Accept, где text/plain предпочтительнее JSON (как у Prometheus)"""
+    if request.args.get('format') == 'prometheus':
+        return True
+    if not request.accept_mimetypes:
+        return False
+    best = request.accept_mimetypes.best_match(
+        ['application/json', 'text/plain', 'text/plain; version=0.0.4'])
+    return best is not None and best.startswith('text/plain')
+
+
+def prometheus_metrics(request_metrics, entities, accounts, pool, cache, expiry, rss_bytes):
+    lines = request_metrics.prometheus()
+
+    lines += metric_header("entities", "gauge", "Строк в таблицах")
+    lines += [sample("entities", count, table=table) for table, count in sorted(entities.items())]
+
+    lines += metric_header("accounts", "gauge", "Счета по типу")
+    lines += [sample("accounts", count, type=acc_type) for acc_type, count in accounts.items()]
+
+    # Для хранилища в памяти (STORAGE_BACKEND = "memory") пула нет
+    if "statement_cache" in pool:
+        for key in ("size", "open", "idle", "in_use"):
+            lines += metric_header(f"db_pool_{key}", "gauge", f"Пул соединений SQLite: {key}")
+            lines.append(sample(f"db_pool_{key}", pool[key]))
+        for key in ("hits", "misses"):
+            name = f"db_statement_cache_{key}_total"
+            lines += metric_header(name, "counter", f"Кэш подготовленных выражений: {key}")
+            lines.append(sample(name, pool["statement_cache"][key]))
+
+    # Отложенная запись (WRITE_MODE = "write_behind")
+    write_behind = pool.get("write_behind")
+    if write_behind is not None:
+        lines += metric_header("write_behind_queue_depth", "gauge", "Строк в очереди отложенной записи")
+        lines.append(sample("write_behind_queue_depth", write_behind["queue_depth"]))
+        lines += metric_header("write_behind_flush_lag_seconds", "gauge", "Возраст старейшей несброшенной строки")
+        lines.append(sample("write_behind_flush_lag_seconds", write_behind["flush_lag_ms"] / 1000))
+        for key in ("flushed", "failed"):
+            name = f"write_behind_{key}_total"
+            lines += metric_header(name, "counter", f"Отложенная запись: строк {key}")
+            lines.append(sample(name, write_behind[key]))
+
+    for key in ("hits", "misses", "evictions"):
+        if key in cache:
+            name = f"response_cache_{key}_total"
+            lines += metric_header(name, "counter", f"Кэш сущностей: {key}")
+            lines.append(sample(name, cache[key]))
+    if "entries" in cache:
+        lines += metric_header("response_cache_entries", "gauge", "Кэш сущностей: записей")
+        lines.append(sample("response_cache_entries", cache["entries"]))
+
+    lines += metric_header("expiry_sweep_last_run_seconds", "gauge", "Длительность последнего прохода истечения")
+    lines.append(sample("expiry_sweep_last_run_seconds", expiry["last_run_ms"] / 1000))
+    lines += metric_header("expiry_sweep_runs_total", "counter", "Проходов истечения")
+    lines.append(sample("expiry_sweep_runs_total", expiry["runs"]))
+    lines += metric_header("expired_total", "counter", "Строк, переведённых в EXPIRED")
+    lines += [sample("expired_total", count, table=table) for table, count in sorted(expiry["expired"].items())]
+
+    lines += metric_header("process_resident_memory_bytes", "gauge", "RSS процесса")
+    lines.append(sample("process_resident_memory_bytes", rss_bytes))
+    return "\n".join(lines) + "\n"
+
+
 @system_bp.route('/metrics', methods=HTTP_METHODS[:1])  # GET
 @log_endpoint
 def metrics():
     try:
-        # Transactions count
-        transactions = safe_db_query('SELECT COUNT(*) FROM transactions')
-        transactions_count = transactions.fetchone()[0] if transactions else 0
-
-        # Physical accounts
-        physical = safe_db_query(
-            'SELECT COUNT(*) FROM accounts WHERE type = ?',
-            (ACCOUNT_TYPES["physical"],)
-        )
-        physical_accounts = physical.fetchone()[0] if physical else 0
-
-        # Legal accounts
-        legal = safe_db_query(
-            'SELECT COUNT(*) FROM accounts WHERE type = ?',
-            (ACCOUNT_TYPES["legal"],)
-        )
-        legal_accounts = legal.fetchone()[0] if legal else 0
+        # O(1): счётчики ведутся триггерами, а не COUNT(*) по таблицам
+        counts = safe_db_query(STATEMENTS["system"]["entity_counts"]).fetchall()
+        entities = {name: count for name, count in counts}
 
+        accounts = {
+            "physical": entities.pop(f'accounts.{ACCOUNT_TYPES["physical"]}', 0),
+            "legal": entities.pop(f'accounts.{ACCOUNT_TYPES["legal"]}', 0)
+        }
+        pool_stats = get_storage().stats()
+        cache_stats = get_cache().stats()
+        expiry_stats = get_sweeper().stats()
+        rss_bytes = psutil.Process().memory_info().rss
+        request_metrics = get_metrics(current_app)
+
+        if wants_prometheus():
+            return Response(
+                prometheus_metrics(request_metrics, entities, accounts, pool_stats, cache_stats, expiry_stats, rss_bytes),
+                status=HTTP_STATUS_CODES["OK"],
+                content_type=PROMETHEUS_MIMETYPE
+            )
+
+        summary = request_metrics.summary()
         return jsonify({
-            "requests_total": transactions_count,
-            "accounts": {
-                "physical": physical_accounts,
-                "legal": legal_accounts
-            },
-            "memory_usage": f"{psutil.Process().memory_info().rss / 1024 / 1024:.2f} MB"
+            "requests_total": summary["requests_total"],
+            "requests_in_flight": summary["in_flight"],
+            "endpoints": summary["endpoints"],
+            "transactions_total": entities.get("transactions", 0),
+            "accounts": accounts,
+            "entities": entities,
+            "db_pool": pool_stats,
+            "response_cache": cache_stats,
+            "permission_cache": get_permission_cache().stats(),
+            "idempotency": get_idempotency_store().stats(),
+            "expiry": expiry_stats,
+            "memory_usage": f"{rss_bytes / 1024 / 1024:.2f} MB"
         }), HTTP_STATUS_CODES["OK"]
 
     except Exception as e:
@@ -106,3 +188,58 @@ def metrics():
         return jsonify({
             "error": RESPONSE_MESSAGES["server_error"]
         }), HTTP_STATUS_CODES["INTERNAL_SERVER_ERROR"]
+
+
+@system_bp.route('/admin/flush', methods=HTTP_METHODS[1:2])  # POST
+@log_endpoint
+@token_required
+def flush_writes():
+    """Немедленный сброс отложенных записей (WRITE_MODE = "write_behind") в SQLite"""
+    started = time.perf_counter()
+    flushed = get_storage().flush()
+    return jsonify({
+        "flushed": flushed,
+        "seconds": round(time.perf_counter() - started, 3)
+    }), HTTP_STATUS_CODES["OK"]
+
+
+# === Снимки БД (app/snapshots.py) ===
+
+def snapshot_error(e):
+    if isinstance(e, FileNotFoundError):
+        return jsonify({"error": RESPONSE_MESSAGES["not_found"], "message": str(e)}), HTTP_STATUS_CODES["NOT_FOUND"]
+    return jsonify({"error": RESPONSE_MESSAGES["validation_error"], "message": str(e)}), HTTP_STATUS_CODES["BAD_REQUEST"]
+
+
+@system_bp.route('/admin/db-snapshots', methods=HTTP_METHODS[:1])  # GET
+@log_endpoint
+@token_required
+def snapshot_list():
+    return jsonify(list_snapshots()), HTTP_STATUS_CODES["OK"]
+
+
+@system_bp.route('/admin/db-snapshots/<name>', methods=HTTP_METHODS[1:2])  # POST
+@log_endpoint
+@token_required
+def snapshot_save(name):
+    compression = (request.get_json(silent=True) or {}).get('compression')
+    if compression is not None and compression not in SNAPSHOT_COMPRESSION:
+        return snapshot_error(ValueError(f"compression: ожидается одно из {list(SNAPSHOT_COMPRESSION)}"))
+    try:
+        info = save_snapshot(name, compression)
+    except (ValueError, sqlite3.NotSupportedError) as e:
+        return snapshot_error(e)
+    logger.info("DB snapshot %s saved in %.3f s", name, info["seconds"])
+    return jsonify(info), HTTP_STATUS_CODES["CREATED"]
+
+
+@system_bp.route('/admin/db-snapshots/<name>/restore', methods=HTTP_METHODS[1:2])  # POST
+@log_endpoint
+@token_required
+def snapshot_restore(name):
+    try:
+        info = restore_snapshot(name)
+    except (ValueError, FileNotFoundError, sqlite3.NotSupportedError) as e:
+        return snapshot_error(e)
+    logger.info("DB snapshot %s restored in %.3f s (write lock %.3f s)", name, info["seconds"], info["lock_seconds"])
+    return jsonify(info), HTTP_STATUS_CODES["OK"]
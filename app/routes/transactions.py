@@ -1,19 +1,70 @@
 from flask import Blueprint, jsonify, request
+from jsonschema import ValidationError
 from flasgger import swag_from
+import uuid
 import logging
+from datetime import date, datetime
+from app.schemas.transaction import transaction_schema
 from app.config import (
     RESPONSE_MESSAGES,
     PAGINATION_CONFIG,
     HTTP_STATUS_CODES,
     HTTP_METHODS
 )
+from app.cache import cached_row
 from app.db import safe_db_query
-from app.utils import log_endpoint, serialize_row, require_headers_and_echo
+from app.statements import STATEMENTS, TRANSACTION_FILTERS, transactions_list
+from app.validation import validate
+from app.utils import (
+    log_endpoint, serialize_rows, require_headers_and_echo, create_batch,
+    decode_cursor, pagination_info, entity_response
+)
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 transactions_bp = Blueprint('transactions', __name__)
+SQL = STATEMENTS["transactions"]
+CURSOR_KEY = ('date', 'id')
+
+
+def safe_validate(data, schema):
+    try:
+        validate(data, schema)
+        return None
+    except ValidationError as e:
+        logger.warning(f"Transaction validation error: {e}")
+        return str(e)
+
+
+def parse_date_bound(value, end_of_day=False):
+    """ISO-дата/время фильтра; дата без времени для ``to`` включает весь день.
+
+    Даты транзакций хранятся без часового пояса и сравниваются как строки,
+    поэтому границы со смещением (``+03:00``, ``Z``) отвергаются (ValueError).
+    """
+    if len(value) == 10:
+        date.fromisoformat(value)
+        return f"{value}T23:59:59.999999" if end_of_day else value
+    bound = datetime.fromisoformat(value)
+    if bound.tzinfo is not None:
+        raise ValueError("Timezone offsets are not supported")
+    return bound.isoformat()
+
+
+FILTER_PARSERS = {
+    "account_id": str,
+    "status": str,
+    "from": parse_date_bound,
+    "to": lambda value: parse_date_bound(value, end_of_day=True),
+    "min_amount": float,
+    "max_amount": float,
+}
+
+
+def parse_filters(args) -> tuple:
+    """(имена, параметры) фильтров из query-строки в порядке TRANSACTION_FILTERS; ValueError при мусоре"""
+    names = tuple(name for name in TRANSACTION_FILTERS if args.get(name))
+    return names, tuple(FILTER_PARSERS[name](args[name]) for name in names)
 
 
 def validate_pagination(page: int, page_size: int) -> tuple:
@@ -32,26 +83,27 @@ def transactions():
         page_size = int(request.args.get('page_size', PAGINATION_CONFIG["default_page_size"]))
         page, page_size = validate_pagination(page, page_size)
         offset = (page - 1) * page_size
+        cursor = request.args.get('cursor')
+        after = decode_cursor(cursor, CURSOR_KEY) if cursor else None
+        filters, params = parse_filters(request.args)
     except ValueError:
         return jsonify({
             "error": RESPONSE_MESSAGES["validation_error"],
-            "message": "Invalid pagination parameters"
+            "message": "Invalid pagination or filter parameters"
         }), HTTP_STATUS_CODES["BAD_REQUEST"]
 
     try:
-        cur = safe_db_query(
-            'SELECT * FROM transactions ORDER BY date DESC LIMIT ? OFFSET ?',
-            (page_size, offset)
-        )
-        transactions_data = [serialize_row(row) for row in cur.fetchall()]
+        if after:
+            cur = safe_db_query(transactions_list(filters, after=True), (*params, *after, page_size))
+        elif 'page' in request.args:
+            cur = safe_db_query(transactions_list(filters, offset=True), (*params, page_size, offset))
+        else:
+            cur = safe_db_query(transactions_list(filters), (*params, page_size))
+        rows = cur.fetchall()
 
         return jsonify({
-            "transactions": transactions_data,
-            "pagination": {
-                "page": page,
-                "page_size": page_size,
-                "next_page": f"?page={page + 1}&page_size={page_size}" if len(transactions_data) == page_size else None
-            }
+            "transactions": serialize_rows(rows),
+            "pagination": pagination_info(rows, page_size, CURSOR_KEY, page=None if after else page)
         }), HTTP_STATUS_CODES["OK"]
 
     except Exception as e:
@@ -65,17 +117,33 @@ def transactions():
 @require_headers_and_echo
 def single_transaction(tx_id):
     try:
-        cur = safe_db_query(
-            'SELECT * FROM transactions WHERE id = ?',
-            (tx_id,)
-        )
-        tx = cur.fetchone() if cur else None
+        tx = cached_row("transactions", tx_id)
 
         if not tx:
             return jsonify({"error": RESPONSE_MESSAGES["not_found"]}), HTTP_STATUS_CODES["NOT_FOUND"]
 
-        return jsonify(serialize_row(tx)), HTTP_STATUS_CODES["OK"]
+        return entity_response(tx)
 
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
         return jsonify({"error": RESPONSE_MESSAGES["db_error"]}), HTTP_STATUS_CODES["INTERNAL_SERVER_ERROR"]
+
+
+@transactions_bp.route('/transaction-history-v1.0.0/batch', methods=[HTTP_METHODS[1]])  # POST
+@swag_from('../docs/transactions.yml')
+@log_endpoint
+@require_headers_and_echo
+def transactions_batch():
+    def build_params(data):
+        tx_id = data.get('id') or str(uuid.uuid4())
+        return tx_id, (
+            tx_id,
+            data['date'],
+            data['amount'],
+            data['currency'],
+            data.get('description'),
+            data['account_id'],
+            data['status']
+        )
+
+    return create_batch(SQL["insert"], lambda data: safe_validate(data, transaction_schema), build_params)
@@ -1,5 +1,5 @@
 from flask import Blueprint, jsonify, request
-from jsonschema import validate, ValidationError
+from jsonschema import ValidationError
 from flasgger import swag_from
 import uuid
 import logging
@@ -12,13 +12,26 @@ from app.config import (
     HTTP_STATUS_CODES,
     HTTP_METHODS
 )
-from app.db import safe_db_query
-from app.utils import log_endpoint, serialize_row, require_headers_and_echo
+from app.cache import cached_row, invalidate
+from app.db import safe_db_query, safe_db_write
+from app.statements import STATEMENTS
+from app.validation import validate
+from app.utils import (
+    log_endpoint, serialize_row, serialize_rows, require_headers_and_echo, decode_cursor, pagination_info, entity_response
+)
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 vrp_bp = Blueprint('vrp', __name__)
+SQL = STATEMENTS["vrps"]
+CURSOR_KEY = ('valid_until', 'id')
+LIST_QUERIES = {"page": SQL["list_page"], "first": SQL["list_first"], "after": SQL["list_after"]}
+LIST_BY_STATUS_QUERIES = {
+    "page": SQL["list_by_status_page"], "first": SQL["list_by_status_first"], "after": SQL["list_by_status_after"]
+}
+LIST_CURRENT_QUERIES = {
+    "page": SQL["list_current_page"], "first": SQL["list_current_first"], "after": SQL["list_current_after"]
+}
 
 
 def safe_validate(data, schema):
@@ -52,10 +65,8 @@ def handle_vrp_creation(data):
 
     try:
         vrp_id = str(uuid.uuid4())
-        safe_db_query(
-            '''INSERT INTO vrps 
-            (id, status, max_amount, frequency, valid_until, recipient_account)
-            VALUES (?, ?, ?, ?, ?, ?)''',
+        vrp = safe_db_write(
+            SQL["insert_returning"],
             (
                 vrp_id,
                 VRP_STATUSES["active"],
@@ -63,11 +74,9 @@ def handle_vrp_creation(data):
                 data['frequency'],
                 data['valid_until'],
                 data['recipient_account']
-            ),
-            commit=True
+            )
         )
-        cur = safe_db_query('SELECT * FROM vrps WHERE id = ?', (vrp_id,))
-        return jsonify(serialize_row(cur.fetchone())), HTTP_STATUS_CODES["CREATED"]
+        return jsonify(serialize_row(vrp)), HTTP_STATUS_CODES["CREATED"]
 
     except Exception as e:
         logger.error(f"VRP creation failed: {str(e)}")
@@ -75,11 +84,27 @@ def handle_vrp_creation(data):
 
 
 def handle_vrp_list(args):
+    # По умолчанию — все, кроме истёкших (EXPIRED); status=all — все статусы
+    status = args.get('status')
+    if status is not None and status != 'all' and status not in VRP_STATUSES.values():
+        return jsonify({
+            "error": RESPONSE_MESSAGES["validation_error"],
+            "message": f"Неверный статус: допустимы {', '.join(VRP_STATUSES.values())} или all"
+        }), HTTP_STATUS_CODES["BAD_REQUEST"]
+    if status is None:
+        queries, filters = LIST_CURRENT_QUERIES, (VRP_STATUSES["expired"],)
+    elif status == 'all':
+        queries, filters = LIST_QUERIES, ()
+    else:
+        queries, filters = LIST_BY_STATUS_QUERIES, (status,)
+
     try:
         page = int(args.get('page', 1))
         page_size = int(args.get('page_size', PAGINATION_CONFIG["default_page_size"]))
         page, page_size = validate_pagination(page, page_size)
         offset = (page - 1) * page_size
+        cursor = args.get('cursor')
+        after = decode_cursor(cursor, CURSOR_KEY) if cursor else None
     except ValueError:
         return jsonify({
             "error": RESPONSE_MESSAGES["validation_error"],
@@ -87,19 +112,17 @@ def handle_vrp_list(args):
         }), HTTP_STATUS_CODES["BAD_REQUEST"]
 
     try:
-        cur = safe_db_query(
-            'SELECT * FROM vrps ORDER BY valid_until DESC LIMIT ? OFFSET ?',
-            (page_size, offset)
-        )
-        vrps = [serialize_row(row) for row in cur.fetchall()]
+        if after:
+            cur = safe_db_query(queries["after"], (*filters, *after, page_size))
+        elif 'page' in args:
+            cur = safe_db_query(queries["page"], (*filters, page_size, offset))
+        else:
+            cur = safe_db_query(queries["first"], (*filters, page_size))
+        rows = cur.fetchall()
 
         return jsonify({
-            "vrps": vrps,
-            "pagination": {
-                "page": page,
-                "page_size": page_size,
-                "next_page": f"?page={page + 1}&page_size={page_size}" if len(vrps) == page_size else None
-            }
+            "vrps": serialize_rows(rows),
+            "pagination": pagination_info(rows, page_size, CURSOR_KEY, page=None if after else page)
         }), HTTP_STATUS_CODES["OK"]
 
     except Exception as e:
@@ -124,7 +147,7 @@ def single_vrp(vrp_id):
         if request.method == 'DELETE':
             return delete_vrp(vrp_id)
 
-        return jsonify(serialize_row(vrp)), HTTP_STATUS_CODES["OK"]
+        return entity_response(vrp)
 
     except Exception as e:
         logger.error(f"VRP operation failed: {str(e)}")
@@ -132,8 +155,7 @@ def single_vrp(vrp_id):
 
 
 def get_vrp(vrp_id):
-    cur = safe_db_query('SELECT * FROM vrps WHERE id = ?', (vrp_id,))
-    return cur.fetchone() if cur else None
+    return cached_row("vrps", vrp_id)
 
 
 def update_vrp(vrp_id, data):
@@ -145,21 +167,18 @@ def update_vrp(vrp_id, data):
         }), HTTP_STATUS_CODES["BAD_REQUEST"]
 
     try:
-        safe_db_query(
-            '''UPDATE vrps SET 
-            max_amount = ?, frequency = ?, valid_until = ?, recipient_account = ?
-            WHERE id = ?''',
+        vrp = safe_db_write(
+            SQL["update_returning"],
             (
                 data['max_amount'],
                 data['frequency'],
                 data['valid_until'],
                 data['recipient_account'],
                 vrp_id
-            ),
-            commit=True
+            )
         )
-        cur = safe_db_query('SELECT * FROM vrps WHERE id = ?', (vrp_id,))
-        return jsonify(serialize_row(cur.fetchone())), HTTP_STATUS_CODES["OK"]
+        invalidate("vrps", vrp_id)
+        return jsonify(serialize_row(vrp)), HTTP_STATUS_CODES["OK"]
 
     except Exception as e:
         logger.error(f"VRP update failed: {str(e)}")
@@ -168,7 +187,8 @@ def update_vrp(vrp_id, data):
 
 def delete_vrp(vrp_id):
     try:
-        safe_db_query('DELETE FROM vrps WHERE id = ?', (vrp_id,), commit=True)
+        safe_db_query(SQL["delete"], (vrp_id,), commit=True)
+        invalidate("vrps", vrp_id)
         return '', HTTP_STATUS_CODES["NO_CONTENT"]
 
     except Exception as e:
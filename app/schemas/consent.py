@@ -2,7 +2,9 @@ consent_schema = {
     "type": "object",
     "properties": {
         "subject": {"type": "string"},
-        "scope": {"type": "string"}
+        "scope": {"type": "string"},
+        # Момент истечения без часового пояса, как datetime.now().isoformat(); null — бессрочное
+        "valid_until": {"type": ["string", "null"], "pattern": "^\\d{4}-\\d{2}-\\d{2}T\\d{2}:\\d{2}:\\d{2}"}
     },
     "required": ["subject", "scope"]
 }
@@ -0,0 +1,13 @@
+transaction_schema = {
+    "type": "object",
+    "properties": {
+        "id": {"type": "string"},
+        "date": {"type": "string"},
+        "amount": {"type": "number"},
+        "currency": {"enum": ["RUB", "USD", "EUR"]},
+        "description": {"type": "string"},
+        "account_id": {"type": "string"},
+        "status": {"type": "string"}
+    },
+    "required": ["date", "amount", "currency", "account_id", "status"]
+}
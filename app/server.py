@@ -0,0 +1,148 @@
+"""Запуск в production: ``flask serve``.
+
+gunicorn — pre-fork: ``SERVER_WORKERS`` процессов по ``SERVER_THREADS``
+потоков (gthread). Приложение создаётся один раз в мастере и наследуется
+воркерами; пулы SQLite и поток логирования пересоздаются в каждом воркере
+после fork (app/db.py, app/logs.py). waitress — один процесс с пулом
+потоков, для Windows, где gunicorn недоступен. uvicorn — ASGI-режим
+(app/asgi.py) для тысяч одновременных keep-alive соединений.
+
+Кэши и метрики живут в процессе: каждый воркер держит свои. Для внешнего
+сервера есть точка входа ``wsgi:app`` (gunicorn -c ... wsgi:app).
+"""
+import os
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app.cache import configure_entity_cache
+from app.db import upgrade_db
+
+
+def gunicorn_options(settings):
+    return {
+        "bind": settings["bind"],
+        "workers": settings["workers"],
+        "threads": settings["threads"],
+        "worker_class": "gthread",
+        "keepalive": settings["keep_alive"],
+        "backlog": settings["backlog"],
+        "timeout": settings["timeout"],
+        "preload_app": True,
+    }
+
+
+def run_gunicorn(app, settings):
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise click.ClickException("gunicorn не установлен: pip install gunicorn или --backend waitress")
+
+    class Application(BaseApplication):
+
+        def load_config(self):
+            for key, value in gunicorn_options(settings).items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    Application().run()
+
+
+def waitress_options(settings):
+    return {
+        "listen": settings["bind"],
+        "threads": settings["threads"],
+        "backlog": settings["backlog"],
+        # waitress закрывает простаивающее соединение через channel_timeout
+        "channel_timeout": settings["keep_alive"],
+    }
+
+
+def run_waitress(app, settings):
+    try:
+        import waitress
+    except ImportError:
+        raise click.ClickException("waitress не установлен: pip install waitress")
+    if settings["workers"] > 1:
+        click.echo("waitress работает в одном процессе: --workers игнорируется", err=True)
+    waitress.serve(app, **waitress_options(settings))
+
+
+def uvicorn_options(settings):
+    host, _, port = settings["bind"].rpartition(':')
+    return {
+        "host": host or "0.0.0.0",
+        "port": int(port),
+        "workers": settings["workers"],
+        "backlog": settings["backlog"],
+        "timeout_keep_alive": settings["keep_alive"],
+        "lifespan": "on",
+    }
+
+
+def run_uvicorn(app, settings):
+    try:
+        import uvicorn
+    except ImportError:
+        raise click.ClickException("uvicorn не установлен: pip install uvicorn")
+    from app.asgi import WORKER_CONFIG_ENV, AsgiAdapter, worker_config
+    options = uvicorn_options(settings)
+    if options["workers"] > 1:
+        # Несколько процессов uvicorn запускает только по строке импорта:
+        # воркеры создают приложение фабрикой с конфигурацией этого процесса
+        os.environ[WORKER_CONFIG_ENV] = worker_config(app, settings)
+        target = "app.asgi:create_worker_app"
+        options["factory"] = True
+    else:
+        target = AsgiAdapter(app, max_threads=settings["threads"])
+    uvicorn.run(target, **options)
+
+
+SERVER_BACKENDS = {
+    "gunicorn": run_gunicorn,
+    "waitress": run_waitress,
+    "uvicorn": run_uvicorn,
+}
+
+
+@click.command('serve')
+@click.option('--backend', type=click.Choice(list(SERVER_BACKENDS)), envvar='SERVER_BACKEND',
+              help='WSGI-сервер (по умолчанию SERVER_BACKEND).')
+@click.option('--bind', envvar='SERVER_BIND', help='host:port.')
+@click.option('--workers', type=click.IntRange(min=1), envvar='SERVER_WORKERS', help='Число процессов.')
+@click.option('--threads', type=click.IntRange(min=1), envvar='SERVER_THREADS', help='Потоков на процесс.')
+@click.option('--keep-alive', type=click.IntRange(min=0), envvar='SERVER_KEEPALIVE',
+              help='Сек. ожидания следующего запроса на keep-alive соединении.')
+@click.option('--backlog', type=click.IntRange(min=1), envvar='SERVER_BACKLOG',
+              help='Очередь ожидающих подключений.')
+@click.option('--timeout', type=click.IntRange(min=0), envvar='SERVER_TIMEOUT',
+              help='Сек. до перезапуска зависшего воркера (gunicorn).')
+@with_appcontext
+def serve_command(backend, **overrides):
+    """Запуск production-сервера"""
+    app = current_app._get_current_object()
+    config = app.config
+    settings = {
+        "bind": config['SERVER_BIND'],
+        "workers": config['SERVER_WORKERS'],
+        "threads": config['SERVER_THREADS'],
+        "keep_alive": config['SERVER_KEEPALIVE'],
+        "backlog": config['SERVER_BACKLOG'],
+        "timeout": config['SERVER_TIMEOUT'],
+    }
+    settings.update({key: value for key, value in overrides.items() if value is not None})
+    # Схема (идемпотентная) применяется один раз в мастере до fork: файлы
+    # старых версий получают новые таблицы, а воркеры не гоняются за DDL.
+    # Ни сброса из снимка, ни фикстур: перезапуск сервера данные не трогает
+    upgrade_db()
+    backend = backend or config['SERVER_BACKEND']
+    # waitress работает в одном процессе при любом --workers
+    configure_entity_cache(app, 1 if backend == "waitress" else settings["workers"])
+    SERVER_BACKENDS[backend](app, settings)
+
+
+def init_app(app):
+    app.cli.add_command(serve_command)
@@ -1,55 +1,416 @@
 from faker import Faker
 import base64
+import bisect
+import json
+import os
+import random
 import sqlite3
-from datetime import datetime
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+
+from app.config import BASE_DIR
 
 fake = Faker('ru_RU')
 
+
+class SyntheticDataGenerator:
+    """Генератор тестовых сущностей (счета, транзакции, платежи, согласия).
+
+    Текстовые поля берутся из пулов, заранее заполненных Faker'ом, а числа
+    и даты — из ``random``: вызов Faker на каждую строку стоит ~100 мкс,
+    что неприемлемо для миллионов строк.
+    """
+
+    TRANSACTION_STATUSES = ["completed", "pending", "reversed"]
+    PAYMENT_STATUSES = ["PENDING", "COMPLETED", "REJECTED"]
+    CURRENCIES = ["RUB", "USD", "EUR"]
+    PERMISSIONS = ["read", "write", "payments", "balances", "transactions"]
+
+    def __init__(self, pool_size=1000, seed=None):
+        self.random = random.Random(seed)
+        self.names = [fake.name() for _ in range(pool_size)]
+        self.companies = [fake.company() for _ in range(pool_size)]
+        self.phrases = [fake.catch_phrase() for _ in range(pool_size)]
+        self.now = datetime.now()
+
+    def _date_within(self, days):
+        return (self.now - timedelta(seconds=self.random.uniform(0, days * 86400))).isoformat(timespec='seconds')
+
+    def account(self, account_id, acc_type):
+        if acc_type == "physical_entity":
+            return {
+                "id": account_id,
+                "balance": round(self.random.uniform(1000, 1000000), 2),
+                "currency": "RUB",
+                "type": acc_type,
+                "status": "active",
+                "owner": self.random.choice(self.names)
+            }
+        return {
+            "id": account_id,
+            "balance": round(self.random.uniform(5000, 5000000), 2),
+            "currency": "USD",
+            "type": acc_type,
+            "status": "active",
+            "company": self.random.choice(self.companies)
+        }
+
+    def transaction(self, tx_id, account_id):
+        return {
+            "id": tx_id,
+            "date": self._date_within(365),
+            "amount": round(self.random.uniform(-100000, 100000), 2),
+            "currency": self.random.choice(self.CURRENCIES),
+            "description": self.random.choice(self.phrases),
+            "account_id": account_id,
+            "status": self.random.choice(self.TRANSACTION_STATUSES)
+        }
+
+    def payment(self, payment_id, account_id):
+        return {
+            "id": payment_id,
+            "status": self.random.choice(self.PAYMENT_STATUSES),
+            "type": "standard",
+            "created_at": self._date_within(365),
+            "amount": round(self.random.uniform(1, 100000), 2),
+            "currency": self.random.choice(self.CURRENCIES),
+            "recipient": self.random.choice(self.names),
+            "account_id": account_id
+        }
+
+    def consent(self, consent_id, account_id):
+        return {
+            "id": consent_id,
+            "type": self.random.choice(["physical_entity", "legal_entity"]),
+            "status": "ACTIVE",
+            "tpp_id": f"tpp{self.random.randint(1, 50)}",
+            "permissions": json.dumps(self.random.sample(self.PERMISSIONS, self.random.randint(1, 3))),
+            "account_id": account_id,
+            "subject": self.random.choice(self.names),
+            "scope": "accounts"
+        }
+
+    def rows(self, scale, chunk_size=10000, max_references=100000):
+        """Порциями отдаёт (таблица, [dict, ...]) для ``scale`` строк каждой сущности.
+
+        Ссылки на счета выбираются из выборки не больше ``max_references``
+        идентификаторов, чтобы память не росла вместе с ``scale``.
+        """
+        references = []
+        for start in range(0, scale, chunk_size):
+            chunk = []
+            for i in range(start, min(start + chunk_size, scale)):
+                acc_type = "physical_entity" if i % 2 == 0 else "legal_entity"
+                account_id = str(uuid.uuid4())
+                chunk.append(self.account(account_id, acc_type))
+                if len(references) < max_references:
+                    references.append(account_id)
+                else:
+                    references[self.random.randrange(max_references)] = account_id
+            yield "accounts", chunk
+
+        for table, make in (("payments", self.payment),
+                            ("transactions", self.transaction),
+                            ("consents", self.consent)):
+            for start in range(0, scale, chunk_size):
+                yield table, [
+                    make(str(uuid.uuid4()), self.random.choice(references))
+                    for _ in range(start, min(start + chunk_size, scale))
+                ]
+
+
+
+SCHEMA_PATH = os.path.join(BASE_DIR, 'schema.sql')
+
+# Таблицы сущностей в памяти (как ENTITY_COUNT_TABLES в app/statements.py)
+MEMORY_TABLES = (
+    'accounts', 'payments', 'consents', 'vrps', 'medical_insured',
+    'bank_docs', 'insurance_docs', 'product_agreements', 'transactions'
+)
+
+# Вторичные индексы хранилища в памяти: колонка -> {значение: id строк}
+MEMORY_INDEXES = {
+    "accounts": ("type",),
+    "payments": ("type", "account_id"),
+    "consents": ("account_id",),
+    "transactions": ("account_id",),
+    "bank_docs": ("account_id",),
+    "product_agreements": ("account_id",),
+}
+
+# Упорядоченные индексы для keyset-пагинации (как idx_*_date_id в schema.sql)
+MEMORY_ORDERED_INDEXES = {
+    "transactions": (("date", "id"),),
+    "vrps": (("valid_until", "id"),),
+}
+
+# Меньше стольких строк пакет вставляется в упорядоченный индекс по одной (insort), больше — с пересортировкой
+ORDERED_INSERT_THRESHOLD = 64
+
+
+def read_schema(path=SCHEMA_PATH):
+    """{таблица: ((колонка, тип, DEFAULT-выражение), ...)} для MEMORY_TABLES.
+
+    schema.sql разбирает сам SQLite во временной БД в памяти, так что
+    колонки и значения по умолчанию у хранилища в памяти те же, что у файла.
+    """
+    conn = sqlite3.connect(':memory:')
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            conn.executescript(f.read())
+        return {
+            table: tuple((name, decl_type.upper(), default)
+                         for _, name, decl_type, _, default, _ in conn.execute(f'PRAGMA table_info({table})'))
+            for table in MEMORY_TABLES
+        }
+    finally:
+        conn.close()
+
+
+def current_timestamp():
+    """Значение CURRENT_TIMESTAMP в формате SQLite"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def default_value(expression):
+    """Значение SQL-выражения DEFAULT: CURRENT_TIMESTAMP, строка или число"""
+    if expression is None:
+        return None
+    if expression.upper() == 'CURRENT_TIMESTAMP':
+        return current_timestamp()
+    if expression.startswith("'"):
+        return expression[1:-1].replace("''", "'")
+    try:
+        return int(expression)
+    except ValueError:
+        return float(expression)
+
+
+def sort_value(value):
+    """Ключ сравнения в порядке SQLite: NULL < числа < строки"""
+    if value is None:
+        return (0, 0)
+    if isinstance(value, str):
+        return (2, value)
+    return (1, value)
+
+
+class Row(tuple):
+    """Неизменяемая строка с доступом по имени колонки и по номеру, как sqlite3.Row"""
+    __slots__ = ()
+    positions = {}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self.positions[key])
+        return tuple.__getitem__(self, key)
+
+    def keys(self):
+        return list(self.positions)
+
+
+def row_class(columns):
+    return type('Row', (Row,), {'__slots__': (), 'positions': {column: i for i, column in enumerate(columns)}})
+
+
+class Table:
+    """Строки одной сущности: dict по id, вторичные индексы ``indexes`` и
+    упорядоченные индексы ``ordered`` (отсортированные списки (ключ, id)).
+
+    Строки — неизменяемые Row, запись заменяет строку целиком, поэтому
+    читатель без копирования получает согласованный снимок. Изменения и
+    обход индексов идут под блокировкой таблицы; чтение по id — одна
+    атомарная операция dict.get. Порядок dict — порядок вставки (как rowid).
+    """
+
+    def __init__(self, name, columns, indexes=(), ordered=()):
+        self.name = name
+        self.columns = tuple(column for column, _, _ in columns)
+        self.defaults = {column: default for column, _, default in columns if default is not None}
+        self.real_columns = frozenset(column for column, decl_type, _ in columns if decl_type == 'REAL')
+        self.row_class = row_class(self.columns)
+        self.rows = {}
+        self.indexes = {column: {} for column in indexes}
+        self.ordered = {key: [] for key in ordered}
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def coerce(self, values):
+        """Целые в колонках REAL хранятся как float — как при affinity SQLite"""
+        for column in self.real_columns.intersection(values):
+            value = values[column]
+            if isinstance(value, int) and not isinstance(value, bool):
+                values[column] = float(value)
+        return values
+
+    def make_row(self, values):
+        """dict колонок -> Row; недостающие колонки получают DEFAULT"""
+        for column, expression in self.defaults.items():
+            if column not in values:
+                values[column] = default_value(expression)
+        self.coerce(values)
+        return self.row_class(values.get(column) for column in self.columns)
+
+    @staticmethod
+    def order_key(row, key):
+        return tuple(sort_value(row[column]) for column in key)
+
+    def _index(self, row, sort=False):
+        for column, index in self.indexes.items():
+            index.setdefault(row[column], {})[row['id']] = None
+        for key, entries in self.ordered.items():
+            entry = (self.order_key(row, key), row['id'])
+            if sort:
+                entries.append(entry)
+            else:
+                bisect.insort(entries, entry)
+
+    def _unindex(self, row):
+        for column, index in self.indexes.items():
+            ids = index.get(row[column])
+            if ids is not None:
+                ids.pop(row['id'], None)
+                if not ids:
+                    del index[row[column]]
+        for key, entries in self.ordered.items():
+            entry = (self.order_key(row, key), row['id'])
+            position = bisect.bisect_left(entries, entry)
+            if position < len(entries) and entries[position] == entry:
+                del entries[position]
+
+    def get(self, row_id):
+        return self.rows.get(row_id)
+
+    def find(self, column, value):
+        """Строки с ``column == value`` по индексу, в порядке вставки"""
+        return self.scan(column=column, value=value)
+
+    def all(self):
+        with self.lock:
+            return list(self.rows.values())
+
+    def scan(self, predicate=None, count=None, column=None, value=None):
+        """Не больше ``count`` строк, прошедших ``predicate``, в порядке вставки.
+
+        С ``column`` обходится только индекс ``column == value``; обход
+        останавливается, как только набрано ``count`` строк.
+        """
+        with self.lock:
+            if column is None:
+                rows = iter(self.rows.values())
+            else:
+                rows = map(self.rows.__getitem__, self.indexes[column].get(value, ()))
+            if predicate is not None:
+                rows = filter(predicate, rows)
+            return list(islice(rows, count))
+
+    def scan_ordered(self, key, predicate=None, count=None, before=None):
+        """Не больше ``count`` строк по убыванию ``key`` из упорядоченного индекса.
+
+        ``before`` — значения ключа курсора: отдаются только строки строго
+        меньше него (поиск позиции — bisect, без обхода предыдущих строк).
+        """
+        with self.lock:
+            entries = self.ordered[key]
+            end = len(entries)
+            if before is not None:
+                end = bisect.bisect_left(entries, (tuple(map(sort_value, before)),))
+            rows = (self.rows[entries[i][1]] for i in range(end - 1, -1, -1))
+            if predicate is not None:
+                rows = filter(predicate, rows)
+            return list(islice(rows, count))
+
+    def insert_many(self, values_list):
+        """Вставка всех строк или ни одной; IntegrityError при повторе id"""
+        rows = [self.make_row(values) for values in values_list]
+        with self.lock:
+            seen = set()
+            for row in rows:
+                if row['id'] in self.rows or row['id'] in seen:
+                    raise sqlite3.IntegrityError(f"UNIQUE constraint failed: {self.name}.id")
+                seen.add(row['id'])
+            # Большой пакет дописывается в конец упорядоченных индексов и
+            # пересортировывается один раз вместо insort на каждую строку
+            sort = len(rows) > ORDERED_INSERT_THRESHOLD
+            for row in rows:
+                self.rows[row['id']] = row
+                self._index(row, sort)
+            if sort:
+                for entries in self.ordered.values():
+                    entries.sort()
+        return rows
+
+    def insert(self, values):
+        return self.insert_many([values])[0]
+
+    def put(self, values):
+        """Вставка или замена строки с тем же id"""
+        row = self.make_row(values)
+        with self.lock:
+            old = self.rows.get(row['id'])
+            if old is not None:
+                self._unindex(old)
+            self.rows[row['id']] = row
+            self._index(row)
+        return row
+
+    def update(self, row_id, changes, where=None):
+        """Новая версия строки с ``changes``; None, если строки нет или она не проходит ``where``"""
+        with self.lock:
+            old = self.rows.get(row_id)
+            if old is None or (where is not None and not where(old)):
+                return None
+            row = self.row_class(changes.get(column, value) for column, value in zip(self.columns, old))
+            self._unindex(old)
+            self.rows[row_id] = row
+            self._index(row)
+            return row
+
+    def delete(self, row_id, where=None):
+        with self.lock:
+            row = self.rows.get(row_id)
+            if row is None or (where is not None and not where(row)):
+                return None
+            del self.rows[row_id]
+            self._unindex(row)
+            return row
+
+    def clear(self):
+        with self.lock:
+            self.rows.clear()
+            for index in self.indexes.values():
+                index.clear()
+            for entries in self.ordered.values():
+                entries.clear()
+
+
 class DataService:
-    def __init__(self):
-        self.data = {
-            "accounts": [],
-            "payments": [],
-            "consents": {},
-            "bank_docs": {},
-            "insurance_docs": {},
-            "vrp": [],
-            "transactions": [],
-            "medical_insured": [],
-            "product_agreements": []
+    """Сущности в памяти: таблицы со схемой schema.sql и поиском по id за O(1)"""
+
+    def __init__(self, generate=True, schema=None):
+        schema = schema or read_schema()
+        self.tables = {
+            table: Table(table, columns, MEMORY_INDEXES.get(table, ()), MEMORY_ORDERED_INDEXES.get(table, ()))
+            for table, columns in schema.items()
         }
-        self._generate_test_data()
+        if generate:
+            self._generate_test_data()
 
     def _generate_test_data(self):
+        generator = SyntheticDataGenerator(pool_size=20)
         for _ in range(5):
-            self.data['accounts'].append({
-                "id": f"PE{fake.random_number(6)}",
-                "balance": fake.pyfloat(positive=True, min_value=1000, max_value=1000000),
-                "currency": "RUB",
-                "type": "physical_entity",
-                "status": "active",
-                "owner": fake.name()
-            })
-            self.data['accounts'].append({
-                "id": f"LE{fake.random_number(6)}",
-                "balance": fake.pyfloat(positive=True, min_value=5000, max_value=5000000),
-                "currency": "USD",
-                "type": "legal_entity",
-                "status": "active",
-                "company": fake.company()
-            })
+            self.tables['accounts'].put(generator.account(f"PE{fake.random_number(6)}", "physical_entity"))
+            self.tables['accounts'].put(generator.account(f"LE{fake.random_number(6)}", "legal_entity"))
+        account_ids = list(self.tables['accounts'].rows)
         for _ in range(20):
-            account = fake.random_element(elements=[acc for acc in self.data['accounts']])
-            self.data['transactions'].append({
-                "id": f"TX{fake.random_number(8)}",
-                "date": fake.date_time_this_year().isoformat(),
-                "amount": fake.pyfloat(min_value=-100000, max_value=100000),
-                "description": fake.catch_phrase(),
-                "account_id": account['id'],
-                "status": fake.random_element(elements=["completed", "pending", "reversed"])
-            })
+            account_id = fake.random_element(elements=account_ids)
+            self.tables['transactions'].put(generator.transaction(f"TX{fake.random_number(8)}", account_id))
         for _ in range(5):
-            self.data['vrp'].append({
+            self.tables['vrps'].put({
                 "id": f"VRP{fake.random_number(6)}",
                 "max_amount": fake.pyfloat(min_value=1000, max_value=50000),
                 "frequency": fake.random_element(elements=["DAILY", "WEEKLY", "MONTHLY"]),
@@ -57,41 +418,43 @@ class DataService:
                 "status": "ACTIVE"
             })
         for _ in range(5):
-            self.data['medical_insured'].append({
+            self.tables['medical_insured'].put({
                 "id": f"MED{fake.random_number(6)}",
                 "name": fake.name(),
                 "policy_number": f"POL{fake.random_number(9)}",
                 "birth_date": fake.date_of_birth(minimum_age=18, maximum_age=90).isoformat()
             })
         for _ in range(5):
-            doc_id = f"DOC{fake.random_number(6)}"
-            self.data['bank_docs'][doc_id] = {
-                "id": doc_id,
+            self.tables['bank_docs'].put({
+                "id": f"DOC{fake.random_number(6)}",
                 "type": "statement",
                 "content": base64.b64encode(fake.text().encode()).decode(),
                 "signature": fake.sha256(),
                 "created_at": fake.date_time_this_year().isoformat()
-            }
+            })
         for _ in range(5):
-            doc_id = f"INS{fake.random_number(6)}"
-            self.data['insurance_docs'][doc_id] = {
-                "id": doc_id,
+            self.tables['insurance_docs'].put({
+                "id": f"INS{fake.random_number(6)}",
                 "type": "policy",
                 "content": base64.b64encode(fake.text().encode()).decode(),
                 "policy_number": f"POL{fake.random_number(9)}",
                 "valid_until": fake.future_date(end_date='+3y').isoformat()
-            }
+            })
+
+    def clear(self):
+        for table in self.tables.values():
+            table.clear()
 
     # Методы для всех сущностей
     def save_to_db(self, db_path):
         conn = sqlite3.connect(db_path)
         cur = conn.cursor()
         # Сохраняем аккаунты
-        for acc in self.get_accounts('physical_entity') + self.get_accounts('legal_entity'):
+        for acc in self.tables['accounts'].all():
             cur.execute(
                 "INSERT INTO accounts (id, balance, currency, type, status, owner, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                (acc["id"], acc["balance"], acc["currency"], acc["type"], acc["status"], acc.get("owner", ""),
-                 acc.get("created_at", ""))
+                (acc["id"], acc["balance"], acc["currency"], acc["type"], acc["status"], acc["owner"] or "",
+                 acc["created_at"] or "")
             )
         # Сохраняем платежи
         for p in self.get_payments():
@@ -101,143 +464,130 @@ class DataService:
             )
         conn.commit()
         conn.close()
+
+    def _get_typed(self, table, row_id, row_type):
+        row = self.tables[table].get(row_id)
+        return row if row is not None and row['type'] == row_type else None
+
     def get_accounts(self, acc_type):
-        return [acc for acc in self.data['accounts'] if acc['type'] == acc_type]
+        return self.tables['accounts'].find('type', acc_type)
 
     def get_account(self, account_id, acc_type):
-        return next((a for a in self.data['accounts'] if a['id'] == account_id and a['type'] == acc_type), None)
+        return self._get_typed('accounts', account_id, acc_type)
 
     def add_account(self, account_data, acc_type):
-        new_account = {
+        return self.tables['accounts'].put({
             "id": f"{'PE' if acc_type == 'physical_entity' else 'LE'}{fake.random_number(6)}",
             "balance": account_data.get("balance", 0.0),
             "currency": account_data.get("currency", "RUB" if acc_type == "physical_entity" else "USD"),
             "type": acc_type,
             "status": "active"
-        }
-        self.data['accounts'].append(new_account)
-        return new_account
+        })
 
     def delete_account(self, account_id, acc_type):
-        account = self.get_account(account_id, acc_type)
-        if account:
-            self.data['accounts'].remove(account)
+        self.tables['accounts'].delete(account_id, where=lambda row: row['type'] == acc_type)
 
     def add_payment(self, payment):
-        self.data['payments'].append(payment)
+        return self.tables['payments'].put(dict(payment))
 
     def get_payment(self, payment_id):
-        return next((p for p in self.data['payments'] if p['id'] == payment_id), None)
+        return self.tables['payments'].get(payment_id)
 
     def delete_payment(self, payment_id):
-        payment = self.get_payment(payment_id)
-        if payment:
-            self.data['payments'].remove(payment)
+        self.tables['payments'].delete(payment_id)
 
     def get_payments(self):
-        return self.data['payments']
+        return self.tables['payments'].all()
+
+    def get_payments_by_account(self, account_id):
+        return self.tables['payments'].find('account_id', account_id)
 
     def add_consent(self, consent):
-        self.data['consents'][consent['id']] = consent
+        return self.tables['consents'].put(dict(consent))
 
     def get_consent(self, consent_id, consent_type):
-        consent = self.data['consents'].get(consent_id)
-        if consent and consent['type'] == consent_type:
-            return consent
-        return None
+        return self._get_typed('consents', consent_id, consent_type)
 
     def delete_consent(self, consent_id):
-        if consent_id in self.data['consents']:
-            del self.data['consents'][consent_id]
+        self.tables['consents'].delete(consent_id)
 
     def add_bank_doc(self, doc_data):
-        doc_id = f"DOC{fake.random_number(6)}"
-        doc = {
-            "id": doc_id,
+        return self.tables['bank_docs'].put({
             "type": "statement",
             "content": doc_data.get("content", "base64content"),
-            **doc_data
-        }
-        self.data['bank_docs'][doc_id] = doc
-        return doc
+            **doc_data,
+            "id": f"DOC{fake.random_number(6)}"
+        })
 
     def get_bank_docs(self):
-        return self.data['bank_docs'].values()
+        return self.tables['bank_docs'].all()
 
     def get_bank_doc(self, doc_id):
-        return self.data['bank_docs'].get(doc_id)
+        return self.tables['bank_docs'].get(doc_id)
 
     def delete_bank_doc(self, doc_id):
-        if doc_id in self.data['bank_docs']:
-            del self.data['bank_docs'][doc_id]
+        self.tables['bank_docs'].delete(doc_id)
 
     def add_insurance_doc(self, doc_data):
-        doc_id = f"INS{fake.random_number(6)}"
-        doc = {
-            "id": doc_id,
+        return self.tables['insurance_docs'].put({
             "type": "policy",
             "content": doc_data.get("content", "base64content"),
-            **doc_data
-        }
-        self.data['insurance_docs'][doc_id] = doc
-        return doc
+            **doc_data,
+            "id": f"INS{fake.random_number(6)}"
+        })
 
     def get_insurance_docs(self):
-        return self.data['insurance_docs'].values()
+        return self.tables['insurance_docs'].all()
 
     def get_insurance_doc(self, doc_id):
-        return self.data['insurance_docs'].get(doc_id)
+        return self.tables['insurance_docs'].get(doc_id)
 
     def delete_insurance_doc(self, doc_id):
-        if doc_id in self.data['insurance_docs']:
-            del self.data['insurance_docs'][doc_id]
+        self.tables['insurance_docs'].delete(doc_id)
 
     def add_vrp(self, vrp):
-        self.data['vrp'].append(vrp)
+        return self.tables['vrps'].put(dict(vrp))
 
     def get_vrps(self):
-        return self.data['vrp']
+        return self.tables['vrps'].all()
 
     def get_vrp(self, vrp_id):
-        return next((v for v in self.data['vrp'] if v['id'] == vrp_id), None)
+        return self.tables['vrps'].get(vrp_id)
 
     def delete_vrp(self, vrp_id):
-        vrp = self.get_vrp(vrp_id)
-        if vrp:
-            self.data['vrp'].remove(vrp)
+        self.tables['vrps'].delete(vrp_id)
 
     def get_transactions(self):
-        return self.data['transactions']
+        return self.tables['transactions'].all()
 
     def get_transaction(self, tx_id):
-        return next((t for t in self.data['transactions'] if t['id'] == tx_id), None)
+        return self.tables['transactions'].get(tx_id)
+
+    def get_transactions_by_account(self, account_id):
+        return self.tables['transactions'].find('account_id', account_id)
 
     def add_medical_insured(self, person):
-        self.data['medical_insured'].append(person)
+        return self.tables['medical_insured'].put(dict(person))
 
     def get_medical_insured(self):
-        return self.data['medical_insured']
+        return self.tables['medical_insured'].all()
 
     def get_medical_insured_by_id(self, person_id):
-        return next((p for p in self.data['medical_insured'] if p['id'] == person_id), None)
+        return self.tables['medical_insured'].get(person_id)
 
     def delete_medical_insured(self, person_id):
-        person = self.get_medical_insured_by_id(person_id)
-        if person:
-            self.data['medical_insured'].remove(person)
+        self.tables['medical_insured'].delete(person_id)
 
     def add_product_agreement(self, agreement):
-        self.data['product_agreements'].append(agreement)
+        return self.tables['product_agreements'].put(dict(agreement))
 
     def get_product_agreements(self):
-        return self.data['product_agreements']
+        return self.tables['product_agreements'].all()
 
     def get_product_agreement(self, agreement_id):
-        return next((a for a in self.data['product_agreements'] if a['id'] == agreement_id), None)
+        return self.tables['product_agreements'].get(agreement_id)
 
     def delete_product_agreement(self, agreement_id):
-        agreement = self.get_product_agreement(agreement_id)
-        if agreement:
-            self.data['product_agreements'].remove(agreement)
+        self.tables['product_agreements'].delete(agreement_id)
 
 data_service = DataService()
@@ -0,0 +1,206 @@
+"""Снимки содержимого БД: flask db-snapshot save|restore NAME.
+
+Снимок — копия файла БД, снятая backup API SQLite (``Connection.backup``)
+постранично, без SQL: миллион строк копируется за секунды, а не перезаливается
+вставками. Сохранение читает живую БД в одной транзакции чтения — в WAL
+писатели при этом не ждут. Восстановление заменяет страницы живой БД на месте,
+не закрывая пул: сжатый снимок сначала распаковывается во временный файл, и
+блокировка записи держится только на время копирования страниц.
+
+Кэш сущностей (app/cache.py) и сохранённые ответы Idempotency-Key
+(app/idempotency.py) после восстановления очищаются в текущем процессе;
+воркеры gunicorn со своими кэшами (RESPONSE_CACHE_MULTI_WORKER) увидят новые
+строки по истечении RESPONSE_CACHE_TTL.
+"""
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app.db import clear_derived_state, connect, get_storage, uses_memory_storage
+
+SNAPSHOT_NAME_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$')
+
+# Сжатие файла снимка (DB_SNAPSHOT_COMPRESSION): расширение и функция открытия
+SNAPSHOT_COMPRESSION = {
+    "none": ('.db', open),
+    # Уровень 1: страницы SQLite хорошо сжимаются и так, а время важнее
+    "gzip": ('.db.gz', lambda path, mode: gzip.open(path, mode, compresslevel=1)),
+}
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def snapshot_dir(app=None):
+    return (app or current_app).config['DB_SNAPSHOT_DIR']
+
+
+def snapshot_path(name, compression=None):
+    """Путь к файлу снимка; без ``compression`` — к существующему файлу с любым сжатием"""
+    if not SNAPSHOT_NAME_PATTERN.match(name):
+        raise ValueError(f"Недопустимое имя снимка: {name!r}")
+    if compression is not None:
+        return os.path.join(snapshot_dir(), name + SNAPSHOT_COMPRESSION[compression][0]), compression
+    for compression, (extension, _) in SNAPSHOT_COMPRESSION.items():
+        path = os.path.join(snapshot_dir(), name + extension)
+        if os.path.exists(path):
+            return path, compression
+    raise FileNotFoundError(f"Снимок {name!r} не найден")
+
+
+def list_snapshots():
+    directory = snapshot_dir()
+    if not os.path.isdir(directory):
+        return []
+    snapshots = []
+    for filename in sorted(os.listdir(directory)):
+        for compression, (extension, _) in SNAPSHOT_COMPRESSION.items():
+            name = filename[:-len(extension)]
+            if filename.endswith(extension) and SNAPSHOT_NAME_PATTERN.match(name):
+                snapshots.append({
+                    "name": name,
+                    "compression": compression,
+                    "size_bytes": os.path.getsize(os.path.join(directory, filename))
+                })
+                break
+    return snapshots
+
+
+def _live_database():
+    if uses_memory_storage():
+        raise sqlite3.NotSupportedError("Снимки доступны только для STORAGE_BACKEND = \"sqlite\"")
+    # Отложенные записи (WRITE_MODE = "write_behind") попадают в снимок при
+    # сохранении и не переживают восстановление
+    get_storage().flush()
+    config = current_app.config
+    return config['DATABASE'], config['DB_BUSY_TIMEOUT_MS'] / 1000
+
+
+def save_snapshot(name, compression=None):
+    """Копирует живую БД в файл снимка NAME (существующий снимок заменяется)"""
+    compression = compression or current_app.config['DB_SNAPSHOT_COMPRESSION']
+    path, _ = snapshot_path(name, compression)
+    database, timeout = _live_database()
+    os.makedirs(snapshot_dir(), exist_ok=True)
+
+    started = time.perf_counter()
+    fd, raw_path = tempfile.mkstemp(prefix='.snapshot-', suffix='.db', dir=snapshot_dir())
+    os.close(fd)
+    packed_path = raw_path + SNAPSHOT_COMPRESSION[compression][0]
+    try:
+        source = connect(database, timeout=timeout)
+        target = sqlite3.connect(raw_path)
+        try:
+            source.backup(target)
+            # Снимок — один самодостаточный файл, без -wal/-shm рядом
+            target.execute('PRAGMA journal_mode=DELETE')
+        finally:
+            target.close()
+            source.close()
+        if compression == "none":
+            os.replace(raw_path, path)
+        else:
+            with open(raw_path, 'rb') as src, SNAPSHOT_COMPRESSION[compression][1](packed_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+            os.replace(packed_path, path)
+    finally:
+        for leftover in (raw_path, packed_path):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    # Снимок с тем же именем в другом формате устарел
+    for other, (extension, _) in SNAPSHOT_COMPRESSION.items():
+        stale = os.path.join(snapshot_dir(), name + extension)
+        if other != compression and os.path.exists(stale):
+            os.remove(stale)
+    return {
+        "name": name,
+        "compression": compression,
+        "size_bytes": os.path.getsize(path),
+        "seconds": round(time.perf_counter() - started, 3)
+    }
+
+
+def restore_snapshot(name):
+    """Заменяет содержимое живой БД снимком NAME, не останавливая сервер"""
+    path, compression = snapshot_path(name)
+    database, timeout = _live_database()
+
+    started = time.perf_counter()
+    raw_path = None
+    try:
+        if compression != "none":
+            # Распаковка до захвата блокировки записи
+            fd, raw_path = tempfile.mkstemp(prefix='.snapshot-', suffix='.db', dir=snapshot_dir())
+            with SNAPSHOT_COMPRESSION[compression][1](path, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+                shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+        source = sqlite3.connect(raw_path or path)
+        target = connect(database, timeout=timeout)
+        try:
+            locked = time.perf_counter()
+            # pages=-1: все страницы за один шаг, без перезапусков копирования
+            # из-за записей, пришедших между шагами
+            source.backup(target)
+            lock_seconds = time.perf_counter() - locked
+        finally:
+            target.close()
+            source.close()
+    finally:
+        if raw_path is not None and os.path.exists(raw_path):
+            os.remove(raw_path)
+
+    clear_derived_state()
+    return {
+        "name": name,
+        "compression": compression,
+        "seconds": round(time.perf_counter() - started, 3),
+        "lock_seconds": round(lock_seconds, 3)
+    }
+
+
+@click.group('db-snapshot')
+def snapshot_command():
+    """Снимки содержимого БД (backup API SQLite)"""
+
+
+@snapshot_command.command('save')
+@click.argument('name')
+@click.option('--compression', type=click.Choice(list(SNAPSHOT_COMPRESSION)),
+              help='Сжатие файла снимка (по умолчанию DB_SNAPSHOT_COMPRESSION).')
+@with_appcontext
+def save_command(name, compression):
+    try:
+        info = save_snapshot(name, compression)
+    except (ValueError, sqlite3.Error) as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Снимок {name} сохранён: {info['size_bytes']} байт за {info['seconds']:.1f} с.")
+
+
+@snapshot_command.command('restore')
+@click.argument('name')
+@with_appcontext
+def restore_command(name):
+    try:
+        info = restore_snapshot(name)
+    except (ValueError, FileNotFoundError, sqlite3.Error) as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Снимок {name} восстановлен за {info['seconds']:.1f} с "
+               f"(блокировка записи {info['lock_seconds']:.2f} с).")
+
+
+@snapshot_command.command('list')
+@with_appcontext
+def list_command():
+    for snapshot in list_snapshots():
+        click.echo(f"{snapshot['name']}\t{snapshot['compression']}\t{snapshot['size_bytes']}")
+
+
+def init_app(app):
+    app.cli.add_command(snapshot_command)
@@ -0,0 +1,313 @@
+"""Реестр именованных SQL-запросов.
+
+Все запросы blueprint'ов собираются здесь один раз при импорте, поэтому
+строка SQL для каждой операции всегда одна и та же и попадает в кэш
+скомпилированных выражений соединения (см. ``DB_STATEMENT_CACHE_SIZE``).
+
+Построители возвращают ``Statement`` — строку SQL с разобранным описанием
+``spec``: по нему тот же запрос выполняет хранилище в памяти (app/storage.py).
+"""
+import re
+from functools import lru_cache
+
+CONDITION_PATTERN = re.compile(r'^(\w+) (=|!=|>=|<=|<|>) \?$')
+# Граница, которую NULL не ограничивает: ``(valid_until IS NULL OR valid_until > ?)``
+OPEN_BOUND_PATTERN = re.compile(r'^\((\w+) IS NULL OR \1 (>=|<=|<|>) \?\)$')
+NULL_OR = 'IS NULL OR '
+
+
+class Statement(str):
+    """Текст SQL с описанием ``spec`` (операция, таблица, колонки условий и т.д.)"""
+
+    def __new__(cls, sql, **spec):
+        statement = super().__new__(cls, sql)
+        statement.spec = spec
+        return statement
+
+
+def _where(columns):
+    return ' AND '.join(f'{column} = ?' for column in columns)
+
+
+def _order(order_by):
+    """'a DESC, b' -> (('a', True), ('b', False)); rowid — порядок вставки, т.е. ()"""
+    if not order_by or order_by == 'rowid':
+        return ()
+    return tuple((term.split()[0], term.upper().endswith(' DESC')) for term in order_by.split(', '))
+
+
+def _condition(condition):
+    """'a > ?' -> ('a', '>'); '(a IS NULL OR a > ?)' -> ('a', 'IS NULL OR >')"""
+    match = CONDITION_PATTERN.match(condition)
+    if match is not None:
+        return match.groups()
+    match = OPEN_BOUND_PATTERN.match(condition)
+    if match is not None:
+        column, op = match.groups()
+        return column, NULL_OR + op
+    raise ValueError(f"Unsupported condition: {condition}")
+
+
+def select(table, where=(), order_by=None, paginate=False, conditions=()):
+    """SELECT по равенству колонок ``where``; ``conditions`` — дополнительные SQL-условия после них"""
+    clauses = [f'{column} = ?' for column in where] + list(conditions)
+    query = f'SELECT * FROM {table}'
+    if clauses:
+        query += f' WHERE {" AND ".join(clauses)}'
+    if order_by:
+        query += f' ORDER BY {order_by}'
+    if paginate:
+        query += ' LIMIT ? OFFSET ?'
+    return Statement(query, op='select', table=table,
+                     conditions=tuple((column, '=') for column in where) + tuple(map(_condition, conditions)),
+                     order=_order(order_by), limit=paginate, offset=paginate)
+
+
+def keyset(table, key, after=False, conditions=(), offset=False):
+    """Страница по убыванию ``key``; при ``after`` — строки строго после курсора.
+
+    Сравнение кортежей ``(a, b) < (?, ?)`` SQLite выполняет поиском по
+    составному индексу на ``key``, поэтому цена страницы не зависит от глубины.
+    ``conditions`` — дополнительные SQL-условия, их параметры идут первыми;
+    ``offset`` добавляет OFFSET для режима page/page_size.
+    """
+    clauses = list(conditions)
+    if after:
+        clauses.append(f'({", ".join(key)}) < ({", ".join("?" * len(key))})')
+    query = f'SELECT * FROM {table}'
+    if clauses:
+        query += f' WHERE {" AND ".join(clauses)}'
+    order = ', '.join(f'{column} DESC' for column in key)
+    query += f' ORDER BY {order} LIMIT ?'
+    if offset:
+        query += ' OFFSET ?'
+    return Statement(query, op='select', table=table, conditions=tuple(map(_condition, conditions)),
+                     after=key if after else None, order=tuple((column, True) for column in key),
+                     limit=True, offset=offset)
+
+
+def insert(table, columns, defaults=None):
+    """INSERT с плейсхолдерами для ``columns`` и SQL-выражениями из ``defaults``"""
+    defaults = defaults or {}
+    names = list(columns) + list(defaults)
+    values = ['?'] * len(columns) + list(defaults.values())
+    return Statement(f'INSERT INTO {table} ({", ".join(names)}) VALUES ({", ".join(values)})',
+                     op='insert', table=table, columns=tuple(columns), defaults=defaults)
+
+
+def update(table, columns, where=('id',), coalesce=False):
+    """UPDATE; при ``coalesce`` поле с параметром NULL сохраняет старое значение"""
+    if coalesce:
+        assignments = ', '.join(f'{column} = COALESCE(?, {column})' for column in columns)
+    else:
+        assignments = ', '.join(f'{column} = ?' for column in columns)
+    return Statement(f'UPDATE {table} SET {assignments} WHERE {_where(where)}',
+                     op='update', table=table, columns=tuple(columns), where=tuple(where), coalesce=coalesce)
+
+
+def returning(query):
+    """Вариант INSERT/UPDATE, сразу возвращающий сохранённую строку (SQLite >= 3.35)"""
+    return Statement(f'{query} RETURNING *', **query.spec, returning=True)
+
+
+def delete(table, where=('id',)):
+    return Statement(f'DELETE FROM {table} WHERE {_where(where)}', op='delete', table=table, where=tuple(where))
+
+
+def count(table, where=()):
+    query = f'SELECT COUNT(*) FROM {table}'
+    if where:
+        query += f' WHERE {_where(where)}'
+    return Statement(query, op='count', table=table, where=tuple(where))
+
+
+# Таблицы со счётчиком строк в entity_counts (триггеры в schema.sql)
+ENTITY_COUNT_TABLES = (
+    'accounts', 'payments', 'consents', 'vrps', 'medical_insured',
+    'bank_docs', 'insurance_docs', 'product_agreements', 'transactions'
+)
+
+STATEMENTS = {
+    "accounts": {
+        "select_by_id": select('accounts', ('id',)),
+        "select_by_id_and_type": select('accounts', ('id', 'type')),
+        "list_by_type": select('accounts', ('type',), order_by='rowid'),
+        "list_by_type_page": select('accounts', ('type',), order_by='rowid', paginate=True),
+        "insert_physical": insert('accounts', ('id', 'balance', 'currency', 'type', 'status', 'owner')),
+        "insert_legal": insert('accounts', ('id', 'balance', 'currency', 'type', 'status', 'company')),
+        "insert": insert('accounts', ('id', 'balance', 'currency', 'type', 'status', 'owner', 'company')),
+        "update_physical": update('accounts', ('balance', 'currency', 'status', 'owner'), ('id', 'type')),
+        "update_legal": update('accounts', ('balance', 'currency', 'status', 'company'), ('id', 'type')),
+        "delete_by_id_and_type": delete('accounts', ('id', 'type')),
+        "count_by_type": count('accounts', ('type',)),
+    },
+    "payments": {
+        "select_by_id": select('payments', ('id',)),
+        "select_by_id_and_type": select('payments', ('id', 'type')),
+        "list_by_type": select('payments', ('type',), order_by='rowid'),
+        "list_by_type_page": select('payments', ('type',), order_by='rowid', paginate=True),
+        "insert": insert(
+            'payments',
+            ('id', 'status', 'created_at', 'amount', 'currency', 'recipient', 'account_id')
+        ),
+        "insert_with_type": insert(
+            'payments',
+            ('id', 'status', 'type', 'created_at', 'amount', 'currency', 'recipient', 'account_id')
+        ),
+        "insert_pm_211fz": insert(
+            'payments',
+            ('id', 'status', 'type', 'amount', 'currency', 'recipient', 'purpose', 'budget_code', 'account_id'),
+            {'created_at': 'CURRENT_TIMESTAMP'}
+        ),
+        "update": update('payments', ('amount', 'currency', 'recipient')),
+        "update_by_type": update('payments', ('amount', 'currency', 'recipient'), ('id', 'type')),
+        "delete": delete('payments'),
+        "delete_by_type": delete('payments', ('id', 'type')),
+    },
+    "consents": {
+        "select_by_id": select('consents', ('id',)),
+        "select_by_id_and_type": select('consents', ('id', 'type')),
+        # Проверка разрешений TPP: поиск по idx_consents_tpp_account
+        "list_by_tpp_and_account": select('consents', ('tpp_id', 'account_id', 'type', 'status'),
+                                          conditions=('(valid_until IS NULL OR valid_until > ?)',)),
+        "insert": insert(
+            'consents',
+            ('id', 'type', 'status', 'tpp_id', 'permissions', 'account_id', 'subject', 'scope', 'valid_until')
+        ),
+        "delete_by_id_and_type": delete('consents', ('id', 'type')),
+        # Истечение (app/expiry.py): поиск по idx_consents_status_valid_until, UPDATE с проверкой статуса
+        "due_for_expiry": keyset('consents', ('valid_until', 'id'), conditions=('status = ?', 'valid_until < ?')),
+        "expire": update('consents', ('status',), ('id', 'status')),
+    },
+    "vrps": {
+        "select_by_id": select('vrps', ('id',)),
+        "list_page": select('vrps', order_by='valid_until DESC, id DESC', paginate=True),
+        "list_first": keyset('vrps', ('valid_until', 'id')),
+        "list_after": keyset('vrps', ('valid_until', 'id'), after=True),
+        # Списки с фильтром по статусу идут по idx_vrps_status_valid_until
+        "list_by_status_page": keyset('vrps', ('valid_until', 'id'), conditions=('status = ?',), offset=True),
+        "list_by_status_first": keyset('vrps', ('valid_until', 'id'), conditions=('status = ?',)),
+        "list_by_status_after": keyset('vrps', ('valid_until', 'id'), after=True, conditions=('status = ?',)),
+        # Список по умолчанию — все статусы, кроме EXPIRED: обход idx_vrps_valid_until_id по убыванию,
+        # истёкшие VRP (с прошедшим valid_until) лежат в его хвосте
+        "list_current_page": keyset('vrps', ('valid_until', 'id'), conditions=('status != ?',), offset=True),
+        "list_current_first": keyset('vrps', ('valid_until', 'id'), conditions=('status != ?',)),
+        "list_current_after": keyset('vrps', ('valid_until', 'id'), after=True, conditions=('status != ?',)),
+        "insert": insert('vrps', ('id', 'status', 'max_amount', 'frequency', 'valid_until', 'recipient_account')),
+        "update": update('vrps', ('max_amount', 'frequency', 'valid_until', 'recipient_account')),
+        "delete": delete('vrps'),
+        "due_for_expiry": keyset('vrps', ('valid_until', 'id'), conditions=('status = ?', 'valid_until < ?')),
+        "expire": update('vrps', ('status',), ('id', 'status')),
+    },
+    "transactions": {
+        "select_by_id": select('transactions', ('id',)),
+        "list_page": keyset('transactions', ('date', 'id'), offset=True),
+        "list_first": keyset('transactions', ('date', 'id')),
+        "list_after": keyset('transactions', ('date', 'id'), after=True),
+        "insert": insert('transactions', ('id', 'date', 'amount', 'currency', 'description', 'account_id', 'status')),
+        "count": count('transactions'),
+    },
+    "bank_docs": {
+        "select_by_id": select('bank_docs', ('id',)),
+        "list": select('bank_docs', order_by='rowid'),
+        "list_page": select('bank_docs', order_by='rowid', paginate=True),
+        "insert": insert(
+            'bank_docs',
+            ('id', 'type', 'content', 'signature', 'account_id'),
+            {'created_at': 'CURRENT_TIMESTAMP'}
+        ),
+        "update": update('bank_docs', ('type', 'content', 'signature')),
+        "delete": delete('bank_docs'),
+    },
+    "insurance_docs": {
+        "select_by_id": select('insurance_docs', ('id',)),
+        "list": select('insurance_docs', order_by='rowid'),
+        "list_page": select('insurance_docs', order_by='rowid', paginate=True),
+        "insert": insert(
+            'insurance_docs',
+            ('id', 'type', 'content', 'policy_number', 'valid_until'),
+            {'created_at': 'CURRENT_TIMESTAMP'}
+        ),
+        "update": update('insurance_docs', ('type', 'content', 'policy_number', 'valid_until')),
+        "delete": delete('insurance_docs'),
+    },
+    "medical_insured": {
+        "select_by_id": select('medical_insured', ('id',)),
+        "list": select('medical_insured', order_by='rowid'),
+        "list_page": select('medical_insured', order_by='rowid', paginate=True),
+        "insert": insert('medical_insured', ('id', 'name', 'policy_number', 'birth_date')),
+        "update": update('medical_insured', ('name', 'policy_number', 'birth_date')),
+        "delete": delete('medical_insured'),
+    },
+    "product_agreements": {
+        "select_by_id": select('product_agreements', ('id',)),
+        "list": select('product_agreements'),
+        "insert": insert('product_agreements', ('id', 'product_type', 'terms', 'status', 'account_id')),
+        "update": update('product_agreements', ('product_type', 'terms')),
+        "delete": delete('product_agreements'),
+    },
+    # Сохранённые ответы POST с Idempotency-Key (app/idempotency.py)
+    "idempotency": {
+        "select": 'SELECT fingerprint, status, body, content_type FROM idempotency_keys WHERE key = ? AND created_at >= ?',
+        "insert": 'INSERT OR REPLACE INTO idempotency_keys (key, fingerprint, status, body, content_type, created_at) '
+                  'VALUES (?, ?, ?, ?, ?, ?)',
+        "purge": 'DELETE FROM idempotency_keys WHERE created_at < ?',
+    },
+    "system": {
+        "ping": 'SELECT 1',
+        # Счётчики строк, поддерживаемые триггерами (schema.sql)
+        "entity_counts": 'SELECT name, count FROM entity_counts',
+        "count_triggers": "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg\\_%\\_count\\_%' ESCAPE '\\'",
+        "refresh_entity_counts": 'INSERT OR REPLACE INTO entity_counts (name, count) ' + ' UNION ALL '.join(
+            [f"SELECT 'accounts.{acc_type}', COUNT(*) FROM accounts WHERE type = '{acc_type}'"
+             for acc_type in ('physical_entity', 'legal_entity')] +
+            [f"SELECT '{table}', COUNT(*) FROM {table}" for table in ENTITY_COUNT_TABLES]
+        ),
+    },
+}
+
+# Для каждого INSERT/UPDATE заводится вариант "<имя>_returning": запись и
+# чтение сохранённой строки одним выражением вместо INSERT + SELECT
+for _queries in STATEMENTS.values():
+    for _name, _query in list(_queries.items()):
+        if isinstance(_query, Statement) and _query.spec['op'] in ('insert', 'update'):
+            _queries[f'{_name}_returning'] = returning(_query)
+del _queries, _name, _query
+
+
+# Фильтры истории транзакций: имя query-параметра -> условие
+TRANSACTION_FILTERS = {
+    "account_id": 'account_id = ?',
+    "status": 'status = ?',
+    "from": 'date >= ?',
+    "to": 'date <= ?',
+    "min_amount": 'amount >= ?',
+    "max_amount": 'amount <= ?',
+}
+
+
+@lru_cache(maxsize=None)
+def transactions_list(filters=(), after=False, offset=False):
+    """Запрос страницы истории транзакций с фильтрами ``filters``.
+
+    ``filters`` — имена из TRANSACTION_FILTERS в порядке словаря, поэтому для
+    одного набора фильтров строка SQL всегда одна и та же и попадает в кэш
+    выражений; вариантов не больше 2**6 * 3.
+    """
+    conditions = [TRANSACTION_FILTERS[name] for name in filters]
+    return keyset('transactions', ('date', 'id'), after, conditions, offset)
+
+
+# Колонки согласия, которые меняет PUT
+CONSENT_UPDATE_COLUMNS = ('status', 'tpp_id', 'permissions', 'valid_until')
+
+
+@lru_cache(maxsize=None)
+def consent_update(columns):
+    """UPDATE ... RETURNING согласия только для присланных полей ``columns``.
+
+    ``columns`` — имена из CONSENT_UPDATE_COLUMNS в их порядке: вариантов не
+    больше 2**4, и у каждого одна строка SQL. В отличие от COALESCE(?, колонка)
+    так можно сбросить nullable-колонку (valid_until) в NULL.
+    """
+    return returning(update('consents', columns, ('id', 'type')))
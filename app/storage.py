@@ -0,0 +1,237 @@
+"""Хранилище в памяти (``STORAGE_BACKEND = "memory"``).
+
+Маршруты обращаются к данным только через execute_query / execute_returning /
+execute_batch (app/db.py) с выражениями из реестра STATEMENTS; эти функции
+передают выражение хранилищу из ``app.extensions['storage']``. SQLite
+выполняет текст SQL, а память — его описание ``Statement.spec``: поиск по id,
+по вторичному индексу (MEMORY_INDEXES), по упорядоченному индексу для
+keyset-страниц (MEMORY_ORDERED_INDEXES) или обходом таблицы с остановкой на
+LIMIT + OFFSET.
+
+Данные живут в процессе и теряются при остановке; каждый воркер gunicorn
+держит свою копию. Режим предназначен для замеров задержек и тестов, где
+долговечность не нужна. CHECK- и FOREIGN KEY-ограничения схемы не
+проверяются — входные данные и так валидируются JSON-схемами.
+"""
+import heapq
+import operator
+import sqlite3
+import time
+from itertools import islice
+
+from app.metrics import add_db_time
+from app.services.data_service import DataService, default_value, row_class, sort_value
+from app.statements import NULL_OR, STATEMENTS
+
+OPERATORS = {
+    '=': operator.eq,
+    '!=': operator.ne,
+    '>=': operator.ge,
+    '<=': operator.le,
+    '>': operator.gt,
+    '<': operator.lt,
+}
+# Условия вида (колонка IS NULL OR колонка > ?): строка с NULL им удовлетворяет
+NULL_OR_OPERATORS = {NULL_OR + op: function for op, function in OPERATORS.items()
+                     if op not in ('=', '!=')}
+OPERATORS.update(NULL_OR_OPERATORS)
+
+EntityCountRow = row_class(('name', 'count'))
+CountRow = row_class(('COUNT(*)',))
+PingRow = row_class(('1',))
+
+
+class MemoryCursor:
+    """Результат выражения с интерфейсом курсора sqlite3 (fetchone/fetchmany/fetchall)"""
+
+    arraysize = 1
+
+    def __init__(self, rows=(), rowcount=-1):
+        self._rows = iter(rows)
+        self.rowcount = rowcount
+
+    def __iter__(self):
+        return self._rows
+
+    def fetchone(self):
+        return next(self._rows, None)
+
+    def fetchmany(self, size=None):
+        return list(islice(self._rows, size or self.arraysize))
+
+    def fetchall(self):
+        return list(self._rows)
+
+
+class MemoryStorage:
+    name = "memory"
+
+    def __init__(self, app=None):
+        self.data = DataService(generate=False)
+        self.tables = self.data.tables
+        self._raw = {
+            STATEMENTS["system"]["ping"]: lambda params: MemoryCursor([PingRow((1,))]),
+            STATEMENTS["system"]["entity_counts"]: lambda params: MemoryCursor(self.entity_counts()),
+        }
+
+    def entity_counts(self):
+        accounts = self.tables['accounts']
+        counts = [EntityCountRow((table, len(rows))) for table, rows in self.tables.items()]
+        with accounts.lock:
+            counts += [EntityCountRow((f'accounts.{acc_type}', len(ids)))
+                       for acc_type, ids in accounts.indexes['type'].items()]
+        return counts
+
+    # Интерфейс хранилища (общий с SQLiteStorage в app/db.py)
+
+    def execute(self, query, args=(), commit=False):
+        started = time.perf_counter()
+        try:
+            spec = getattr(query, 'spec', None)
+            if spec is None:
+                handler = self._raw.get(query)
+                if handler is None:
+                    raise sqlite3.NotSupportedError(f"Выражение не поддерживается хранилищем в памяти: {query}")
+                return handler(args)
+            return getattr(self, f"_{spec['op']}")(self.tables[spec['table']], spec, tuple(args))
+        finally:
+            add_db_time(time.perf_counter() - started)
+
+    def write(self, query, args=()):
+        return self.execute(query, args).fetchone()
+
+    def write_many(self, query, seq_of_args):
+        spec = query.spec
+        if spec['op'] != 'insert':
+            for args in seq_of_args:
+                self.execute(query, args)
+            return
+        started = time.perf_counter()
+        try:
+            self.tables[spec['table']].insert_many([self.insert_values(spec, args) for args in seq_of_args])
+        finally:
+            add_db_time(time.perf_counter() - started)
+
+    def reset(self):
+        self.data.clear()
+
+    def flush(self):
+        return 0
+
+    def stats(self):
+        return {"backend": self.name, "tables": {table: len(rows) for table, rows in self.tables.items()}}
+
+    # Выполнение описаний Statement.spec
+
+    @staticmethod
+    def insert_values(spec, args):
+        """Колонки новой строки: параметры INSERT и вычисленные выражения DEFAULT"""
+        values = dict(zip(spec['columns'], args))
+        for column, expression in spec['defaults'].items():
+            values[column] = default_value(expression)
+        return values
+
+    @staticmethod
+    def _matches(row, conditions, args):
+        for (column, op), value in zip(conditions, args):
+            current = row[column]
+            if current is None and op in NULL_OR_OPERATORS:
+                continue
+            if current is None or value is None or not OPERATORS[op](sort_value(current), sort_value(value)):
+                return False
+        return True
+
+    @staticmethod
+    def _equality_lookup(table, conditions, args):
+        """(колонка, значение) первого условия ``=`` по id или вторичному индексу"""
+        for (column, op), value in zip(conditions, args):
+            if op == '=' and (column == 'id' or column in table.indexes):
+                return column, value
+        return None, None
+
+    def _select(self, table, spec, args):
+        conditions = spec['conditions']
+        position = len(conditions)
+        condition_args, after = args[:position], None
+        if spec.get('after'):
+            after = args[position:position + len(spec['after'])]
+            position += len(spec['after'])
+        limit = args[position] if spec['limit'] else None
+        offset = args[position + 1] if spec['offset'] else 0
+        count = None if limit is None or limit < 0 else limit + offset
+        order = spec['order']
+        key = tuple(column for column, _ in order)
+
+        column, value = self._equality_lookup(table, conditions, condition_args)
+        # Условие, по которому взят индекс, строки из индекса уже выполняют
+        remaining = [(condition, arg) for condition, arg in zip(conditions, condition_args)
+                     if condition != (column, '=')]
+        predicate = None
+        if remaining:
+            remaining_conditions, remaining_args = zip(*remaining)
+            predicate = lambda row: self._matches(row, remaining_conditions, remaining_args)
+        if column == 'id':
+            row = table.get(value)
+            rows = [row] if row is not None and (predicate is None or predicate(row)) else []
+        elif not order:
+            # Порядок вставки (rowid): обход останавливается на LIMIT + OFFSET
+            rows = table.scan(predicate, count, column, value)
+        elif column is None and key in table.ordered and all(descending for _, descending in order):
+            # Как поиск по составному индексу в SQLite: от курсора вниз до LIMIT
+            rows = table.scan_ordered(key, predicate, count, before=after)
+        else:
+            rows = table.scan(predicate, None, column, value)
+            if after is not None:
+                bound = tuple(map(sort_value, after))
+                rows = [row for row in rows if table.order_key(row, spec['after']) < bound]
+            rows = self._ordered(rows, order, count)
+        return MemoryCursor(rows[offset:count])
+
+    @staticmethod
+    def _ordered(rows, order, count=None):
+        directions = {descending for _, descending in order}
+        if len(directions) == 1:
+            descending = directions.pop()
+            key = lambda row: tuple(sort_value(row[column]) for column, _ in order)
+            if count is not None:
+                return (heapq.nlargest if descending else heapq.nsmallest)(count, rows, key=key)
+            return sorted(rows, key=key, reverse=descending)
+        for column, descending in reversed(order):
+            rows = sorted(rows, key=lambda row: sort_value(row[column]), reverse=descending)
+        return rows
+
+    def _count(self, table, spec, args):
+        conditions = tuple((column, '=') for column in spec['where'])
+        if not conditions:
+            return MemoryCursor([CountRow((len(table),))])
+        column, value = self._equality_lookup(table, conditions, args)
+        if column == 'id':
+            rows = [row for row in (table.get(value),) if row is not None]
+        else:
+            rows = table.scan(None, None, column, value)
+        return MemoryCursor([CountRow((sum(1 for row in rows if self._matches(row, conditions, args)),))])
+
+    def _insert(self, table, spec, args):
+        row = table.insert(self.insert_values(spec, args))
+        return MemoryCursor([row] if spec.get('returning') else (), rowcount=1)
+
+    def _where(self, spec, args):
+        """(id, проверка остальных условий) для UPDATE/DELETE ... WHERE id = ? AND ..."""
+        conditions = tuple((column, '=') for column in spec['where'])
+        values = dict(zip(spec['where'], args))
+        return values['id'], lambda row: self._matches(row, conditions, args)
+
+    def _update(self, table, spec, args):
+        columns = spec['columns']
+        changes = dict(zip(columns, args))
+        if spec['coalesce']:
+            changes = {column: value for column, value in changes.items() if value is not None}
+        row_id, where = self._where(spec, args[len(columns):])
+        row = table.update(row_id, table.coerce(changes), where)
+        if row is None:
+            return MemoryCursor(rowcount=0)
+        return MemoryCursor([row] if spec.get('returning') else (), rowcount=1)
+
+    def _delete(self, table, spec, args):
+        row_id, where = self._where(spec, args)
+        return MemoryCursor(rowcount=0 if table.delete(row_id, where) is None else 1)
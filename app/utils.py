@@ -1,21 +1,42 @@
+import base64
+import binascii
 import functools
+import hashlib
 from datetime import datetime
+import json
 import logging
-from flask import request, jsonify, make_response, g
+import sqlite3
+from flask import request, jsonify, make_response, g, current_app, Response, stream_with_context
 from functools import wraps
 import uuid
+from urllib.parse import urlencode
+from app.config import RESPONSE_MESSAGES, HTTP_STATUS_CODES, PAGINATION_CONFIG
+from app.cache import row_etag
+from app.logs import info_enabled
+from app.db import execute_batch, execute_query
+from app.idempotency import check_idempotency_key
 
 def log_endpoint(func):
+    logger = logging.getLogger(func.__module__)
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        logger = logging.getLogger(func.__module__)
-        logger.info(f"Call {func.__name__} | {request.method} {request.path}")
+        # Строка собирается, только если запись пройдёт по уровню и выборке
+        if info_enabled(logger):
+            logger.info("Call %s | %s %s", func.__name__, request.method, request.path)
         return func(*args, **kwargs)
     return wrapper
 
 def serialize_row(row):
     return dict(row) if row else {}
 
+def serialize_rows(rows):
+    """Выборка -> список dict; имена колонок берутся один раз, а не через Row.keys() на строку"""
+    if not rows:
+        return []
+    columns = rows[0].keys()
+    return [dict(zip(columns, row)) for row in rows]
+
 def get_iso_date():
     return datetime.now().isoformat()
 
@@ -27,19 +48,28 @@ def require_headers_and_echo(f):
         if not auth:
             return jsonify({"error": "Missing Authorization header"}), 401
 
-        # Проверка X-Request-ID и генерация, если его нет
-        x_request_id = request.headers.get('X-Request-ID')
+        # X-Request-ID уже назначен в before_request (app/logs.py); без него
+        # (декоратор вне приложения) — берём из заголовка или генерируем
+        x_request_id = g.get('x_request_id') or request.headers.get('X-Request-ID')
         if not x_request_id:
             x_request_id = str(uuid.uuid4())
-        # Сохраним в g для использования в after_request
         g.x_request_id = x_request_id
         g.auth_header = auth
 
-        # Вызов основного обработчика
-        response = f(*args, **kwargs)
+        # Повтор POST с Idempotency-Key отдаётся без вызова обработчика
+        response = check_idempotency_key()
+        if response is None:
+            # Вызов основного обработчика
+            response = f(*args, **kwargs)
 
         # Обеспечим, что response — объект Response
         resp = make_response(response)
+        if request.method == 'GET' and resp.status_code == HTTP_STATUS_CODES["OK"] and not resp.is_streamed:
+            # Ответы без версии от entity_response (списки) получают ETag по
+            # хэшу тела: это экономит трафик, но не сериализацию
+            if resp.get_etag()[0] is None:
+                resp.set_etag(hashlib.blake2b(resp.get_data(), digest_size=12).hexdigest())
+            resp.make_conditional(request)
         resp.headers['X-Request-ID'] = g.x_request_id
         resp.headers['Authorization'] = g.auth_header
         return resp
@@ -52,4 +82,210 @@ def token_required(f):
         if token != "Bearer mock-token-123":
             return jsonify({"code": "UNAUTHORIZED", "message": "Invalid token"}), 401
         return f(*args, **kwargs)
-    return decorated
\ No newline at end of file
+    return decorated
+
+
+def entity_response(row, serialize=serialize_row):
+    """Ответ с сущностью и ETag по версии строки.
+
+    Для GET с совпавшим If-None-Match сразу отдаётся 304 — тело не
+    сериализуется вовсе.
+    """
+    etag = row_etag(row)
+    if request.method == 'GET' and etag in request.if_none_match:
+        response = current_app.response_class(status=HTTP_STATUS_CODES["NOT_MODIFIED"])
+    else:
+        response = jsonify(serialize(row))
+    response.set_etag(etag)
+    return response
+
+
+def encode_cursor(row, columns):
+    """Непрозрачный курсор: base64url от JSON-списка значений ключа последней строки"""
+    raw = json.dumps([row[column] for column in columns], ensure_ascii=False).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """Курсор -> кортеж значений ключа; ValueError, если курсор повреждён.
+
+    Все ключи курсоров — TEXT-колонки (даты и id), поэтому значение другого
+    типа (число, null, вложенный список) тоже считается повреждением.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError("Invalid cursor")
+    if not all(isinstance(value, str) for value in values):
+        raise ValueError("Invalid cursor")
+    return tuple(values)
+
+
+def pagination_info(rows, page_size, cursor_columns, page=None):
+    """Блок pagination ответа списка.
+
+    ``next_cursor`` отдаётся всегда, когда страница заполнена; ``page`` и
+    ``next_page`` — только в режиме page/page_size (без курсора).
+    """
+    full = len(rows) == page_size
+    info = {
+        "page_size": page_size,
+        "next_cursor": encode_cursor(rows[-1], cursor_columns) if full else None
+    }
+    if page is not None:
+        info["page"] = page
+        # Остальные параметры (фильтры) переносятся в ссылку как есть
+        query = urlencode({**request.args.to_dict(), "page": page + 1, "page_size": page_size})
+        info["next_page"] = f"?{query}" if full else None
+    return info
+
+
+STREAM_MIMETYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson"
+}
+
+
+def parse_page_args(args):
+    """page/page_size из query-строки с ограничениями PAGINATION_CONFIG; ValueError при мусоре"""
+    page = max(int(args.get('page', 1)), 1)
+    page_size = int(args.get('page_size', PAGINATION_CONFIG["default_page_size"]))
+    page_size = min(max(page_size, 1), PAGINATION_CONFIG["max_page_size"])
+    return page, page_size
+
+
+def stream_rows(cur, fmt, serialize=serialize_row):
+    """Генератор тела ответа: JSON-массив или NDJSON порциями по STREAM_CHUNK_SIZE строк.
+
+    Строки читаются из курсора fetchmany, так что в памяти держится только
+    текущая порция, а клиент получает первые байты сразу.
+    """
+    chunk_size = current_app.config['STREAM_CHUNK_SIZE']
+    dumps = current_app.json.dumps
+    first = True
+    if fmt == "json":
+        yield '['
+    for rows in iter(lambda: cur.fetchmany(chunk_size), []):
+        items = serialize_rows(rows) if serialize is serialize_row else [serialize(row) for row in rows]
+        if fmt == "ndjson":
+            yield ''.join(dumps(item) + '\n' for item in items)
+        else:
+            # Порция сериализуется одним вызовом, скобки массива отрезаются
+            yield ('' if first else ',') + dumps(items)[1:-1]
+        first = False
+    if fmt == "json":
+        yield ']'
+
+
+def list_response(query, page_query, params=(), serialize=serialize_row):
+    """Ответ GET-списка.
+
+    По умолчанию — страница ``page_query`` (page/page_size), ссылка на следующую
+    отдаётся в заголовке Link, тело остаётся JSON-массивом. С ``?stream=json``
+    или ``?stream=ndjson`` (либо Accept: application/x-ndjson) вся выборка
+    ``query`` отдаётся потоком из курсора БД без накопления в памяти.
+    """
+    fmt = request.args.get('stream')
+    if fmt is None and request.accept_mimetypes.best == STREAM_MIMETYPES["ndjson"]:
+        fmt = "ndjson"
+    if fmt is not None:
+        if fmt not in STREAM_MIMETYPES:
+            return jsonify({
+                "error": RESPONSE_MESSAGES["validation_error"],
+                "message": RESPONSE_MESSAGES["invalid_stream"]
+            }), HTTP_STATUS_CODES["BAD_REQUEST"]
+        cur = execute_query(query, params)
+        # stream_with_context держит контекст (и соединение из пула в g.db)
+        # до конца генератора; соединение вернётся в пул в teardown
+        return Response(stream_with_context(stream_rows(cur, fmt, serialize)), mimetype=STREAM_MIMETYPES[fmt])
+
+    try:
+        page, page_size = parse_page_args(request.args)
+    except ValueError:
+        return jsonify({
+            "error": RESPONSE_MESSAGES["validation_error"],
+            "message": "Invalid pagination parameters"
+        }), HTTP_STATUS_CODES["BAD_REQUEST"]
+
+    rows = execute_query(page_query, (*params, page_size, (page - 1) * page_size)).fetchall()
+    items = serialize_rows(rows) if serialize is serialize_row else [serialize(row) for row in rows]
+    response = make_response(jsonify(items), HTTP_STATUS_CODES["OK"])
+    if len(rows) == page_size:
+        response.headers['Link'] = f'<{request.path}?page={page + 1}&page_size={page_size}>; rel="next"'
+    return response
+
+
+def parse_batch_body():
+    """Разбирает тело batch-запроса: JSON-массив или NDJSON (application/x-ndjson).
+
+    Возвращает (items, error, status); при успехе error и status равны None.
+    """
+    try:
+        if request.mimetype == 'application/x-ndjson':
+            lines = request.get_data(as_text=True).splitlines()
+            items = [json.loads(line) for line in lines if line.strip()]
+        else:
+            items = request.get_json(silent=False)
+    except ValueError:
+        items = None
+    if not isinstance(items, list):
+        return None, RESPONSE_MESSAGES["invalid_batch"], HTTP_STATUS_CODES["BAD_REQUEST"]
+
+    max_size = current_app.config['BATCH_MAX_SIZE']
+    if len(items) > max_size:
+        return None, f"{RESPONSE_MESSAGES['batch_too_large']} ({max_size})", HTTP_STATUS_CODES["PAYLOAD_TOO_LARGE"]
+    return items, None, None
+
+
+def create_batch(query, validate, build_params):
+    """Общий обработчик POST .../batch.
+
+    ``validate(item)`` возвращает текст ошибки или None, ``build_params(item)`` —
+    пару (id, параметры INSERT). Сначала проверяются все элементы, затем
+    весь пакет вставляется одним executemany в одной транзакции.
+    """
+    items, error, status = parse_batch_body()
+    if error:
+        return jsonify({"error": RESPONSE_MESSAGES["validation_error"], "message": error}), status
+
+    errors = []
+    ids = []
+    rows = []
+    for index, item in enumerate(items):
+        message = validate(item)
+        if message is None:
+            try:
+                item_id, params = build_params(item)
+            except KeyError as e:
+                message = f"Missing required field {e}"
+        if message:
+            errors.append({"index": index, "message": message})
+            continue
+        ids.append(item_id)
+        rows.append(params)
+
+    if errors:
+        return jsonify({
+            "error": RESPONSE_MESSAGES["validation_error"],
+            "errors": errors
+        }), HTTP_STATUS_CODES["BAD_REQUEST"]
+
+    logger = logging.getLogger(__name__)
+    try:
+        execute_batch(query, rows)
+    except sqlite3.IntegrityError as e:
+        logger.warning(f"Batch rejected: {e}")
+        return jsonify({
+            "error": RESPONSE_MESSAGES["validation_error"],
+            "message": str(e)
+        }), HTTP_STATUS_CODES["BAD_REQUEST"]
+    except Exception as e:
+        logger.error(f"Batch insert error: {e}")
+        return jsonify({"error": RESPONSE_MESSAGES["db_error"]}), HTTP_STATUS_CODES["INTERNAL_SERVER_ERROR"]
+
+    return jsonify({
+        "created": len(ids),
+        "items": [{"index": index, "id": item_id, "status": "created"} for index, item_id in enumerate(ids)]
+    }), HTTP_STATUS_CODES["CREATED"]
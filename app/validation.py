@@ -0,0 +1,42 @@
+"""Прекомпилированные валидаторы JSON-схем.
+
+``jsonschema.validate`` на каждый вызов проверяет саму схему и создаёт новый
+валидатор. Здесь валидатор (Draft 7 с проверкой ``format``) строится один
+раз на схему при импорте, а ``validate`` повторяет семантику
+``jsonschema.validate``: бросает ValidationError с наиболее релевантной ошибкой.
+"""
+from jsonschema import Draft7Validator, FormatChecker
+from jsonschema.exceptions import best_match
+
+from app import schemas
+
+FORMAT_CHECKER = FormatChecker()
+
+# id(схемы) -> (схема, валидатор); схема хранится, чтобы id не переиспользовался
+_VALIDATORS = {}
+
+
+def compile_schema(schema):
+    Draft7Validator.check_schema(schema)
+    validator = Draft7Validator(schema, format_checker=FORMAT_CHECKER)
+    _VALIDATORS[id(schema)] = (schema, validator)
+    return validator
+
+
+def get_validator(schema):
+    """Валидатор схемы; схемы вне app.schemas компилируются при первом обращении"""
+    entry = _VALIDATORS.get(id(schema))
+    if entry is None:
+        return compile_schema(schema)
+    return entry[1]
+
+
+def validate(data, schema):
+    error = best_match(get_validator(schema).iter_errors(data))
+    if error is not None:
+        raise error
+
+
+for _name in schemas.__all__:
+    compile_schema(getattr(schemas, _name))
+del _name
@@ -0,0 +1,338 @@
+"""Потоки записи в SQLite для режимов WRITE_MODE, кроме "direct":
+GroupCommitWriter (``"group_commit"``) и WriteBehindBuffer (``"write_behind"``).
+"""
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from itertools import islice
+
+from app.metrics import add_db_time
+from app.statements import insert
+from app.storage import MemoryCursor, MemoryStorage
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class GroupCommitWriter:
+    """Групповая фиксация (``WRITE_MODE = "group_commit"``).
+
+    По умолчанию каждая запись маршрута — отдельная транзакция: свой COMMIT
+    (и fsync при synchronous=FULL) и своё ожидание блокировки записи SQLite,
+    за которую потоки конкурируют через busy_timeout. Здесь записи из потоков
+    запросов ставятся в очередь выделенного потока-писателя. Он берёт первую
+    запись и всё, что накопилось за время предыдущего COMMIT; если записи идут
+    параллельно, дособирает очередь не дольше GROUP_COMMIT_MAX_DELAY_MS (не
+    больше GROUP_COMMIT_MAX_BATCH записей), выполняет пакет в одной транзакции
+    и будит ожидающие потоки с их результатами.
+
+    Каждая запись пакета выполняется в своей точке сохранения: ошибка одной
+    (например, IntegrityError) откатывает только её и возвращается её потоку,
+    остальные фиксируются. Поток запроса ждёт COMMIT, поэтому чтение после
+    ответа видит запись, как и без группировки.
+    """
+
+    def __init__(self, open_connection, max_delay=0.002, max_batch=64):
+        self.open_connection = open_connection
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._last_batch = 0
+        self.batches = 0
+        self.writes = 0
+        self.largest_batch = 0
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='group-commit', daemon=True)
+                self._thread.start()
+
+    def submit(self, kind, query, args):
+        """Выполняет запись в ближайшем пакете и возвращает её результат.
+
+        ``kind``: "execute" (курсор с прочитанными строками и rowcount),
+        "write" (первая строка RETURNING или None), "write_many" (executemany).
+        """
+        if self._thread is None:
+            self._start()
+        future = Future()
+        started = time.perf_counter()
+        self._queue.put((kind, query, args, future))
+        try:
+            return future.result()
+        finally:
+            add_db_time(time.perf_counter() - started)
+
+    def close(self):
+        """Дописывает уже поставленные записи и останавливает поток"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        # Ожидание попутчиков ограничено размером предыдущего пакета (сколько
+        # писателей было параллельно): одиночный писатель не ждёт вовсе, а
+        # при устойчивой нагрузке пакет закрывается, как только соберётся
+        expected = min(self._last_batch, self.max_batch)
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic() if len(batch) < expected else 0
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Остановка обрабатывается после текущего пакета
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        self._last_batch = len(batch)
+        return batch
+
+    def _run(self):
+        conn = self.open_connection()
+        # Транзакциями управляет писатель: BEGIN IMMEDIATE ... COMMIT
+        conn.isolation_level = None
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                self._apply(conn, self._collect(item))
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _perform(conn, kind, query, args):
+        if kind == "write_many":
+            conn.executemany(query, args)
+            return None
+        cur = conn.execute(query, args)
+        # Строки дочитываются до COMMIT: курсор не переживает транзакцию
+        rows = cur.fetchall()
+        if kind == "write":
+            return rows[0] if rows else None
+        return MemoryCursor(rows, rowcount=cur.rowcount)
+
+    def _apply(self, conn, batch):
+        results = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for kind, query, args, future in batch:
+                conn.execute('SAVEPOINT write')
+                try:
+                    results.append((future, self._perform(conn, kind, query, args), None))
+                except Exception as e:
+                    conn.execute('ROLLBACK TO write')
+                    results.append((future, None, e))
+                conn.execute('RELEASE write')
+            conn.execute('COMMIT')
+        except BaseException as e:
+            if conn.in_transaction:
+                conn.rollback()
+            for _, _, _, future in batch:
+                future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+
+        self.batches += 1
+        self.writes += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "writes": self.writes,
+            "avg_batch": round(self.writes / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "queued": self._queue.qsize()
+        }
+
+
+class WriteBehindBuffer:
+    """Отложенная запись (``WRITE_MODE = "write_behind"``).
+
+    INSERT одной строки не ждёт SQLite: строка собирается по схеме в таблице
+    в памяти (app/storage.MemoryStorage), ставится в очередь и сразу
+    возвращается маршруту. Чтения по id сначала смотрят в эту таблицу.
+    Фоновый поток раз в WRITE_BEHIND_FLUSH_INTERVAL_MS (или по накоплении
+    WRITE_BEHIND_BATCH_SIZE строк) дописывает очередь в SQLite пакетами
+    executemany в одной транзакции и только после COMMIT убирает строки из
+    памяти — чтение по id видит строку всё время.
+
+    Очередь ограничена WRITE_BEHIND_MAX_PENDING: при переполнении запрос
+    ждёт ближайшей записи на диск. Списки читаются из SQLite и видят новые
+    строки с задержкой до одного сброса. Строка, которую SQLite отверг при
+    сбросе, теряется (клиент уже получил 201) и учитывается в ``failed``.
+    """
+
+    def __init__(self, open_connection, interval=0.05, batch_size=1000, max_pending=100000):
+        self.open_connection = open_connection
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.memory = MemoryStorage()
+        self._pending = deque()            # (таблица, строка, время постановки)
+        self._inserts = {}                 # таблица -> INSERT всех колонок схемы
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._conn = None
+        self._thread = None
+        self._closed = False
+        self.flushed = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_flush_seconds = 0.0
+
+    def _start(self):
+        with self._cond:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+                self._thread.start()
+                # Остаток очереди дописывается при штатной остановке процесса
+                atexit.register(self.close)
+
+    def insert(self, query, args):
+        """Строка INSERT из памяти; в SQLite она попадёт при ближайшем сбросе"""
+        if self._thread is None:
+            self._start()
+        spec = query.spec
+        table = self.memory.tables[spec['table']]
+        values = self.memory.insert_values(spec, args)
+        with self._cond:
+            while len(self._pending) >= self.max_pending:
+                self._cond.notify_all()
+                self._cond.wait()
+            row = table.insert(values)
+            self._pending.append((spec['table'], row, time.monotonic()))
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+        return row
+
+    def lookup(self, query, args):
+        """Курсор со строками ещё не сброшенной записи или None (читать из SQLite)"""
+        if not self._pending:
+            return None
+        rows = self.memory.execute(query, args).fetchall()
+        return MemoryCursor(rows) if rows else None
+
+    def _insert_statement(self, table_name):
+        statement = self._inserts.get(table_name)
+        if statement is None:
+            statement = self._inserts[table_name] = insert(table_name, self.memory.tables[table_name].columns)
+        return statement
+
+    def flush(self):
+        """Дописывает в SQLite всю очередь; возвращает число сброшенных строк"""
+        flushed = 0
+        with self._flush_lock:
+            while self._pending:
+                flushed += self._flush_batch(list(islice(self._pending, self.batch_size)))
+        return flushed
+
+    def _flush_batch(self, batch):
+        started = time.perf_counter()
+        if self._conn is None:
+            self._conn = self.open_connection()
+            self._conn.isolation_level = None
+        conn = self._conn
+        by_table = {}
+        for table_name, row, _ in batch:
+            by_table.setdefault(table_name, []).append(tuple(row))
+        failed = 0
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for table_name, rows in by_table.items():
+                conn.executemany(self._insert_statement(table_name), rows)
+            conn.execute('COMMIT')
+        except sqlite3.Error:
+            conn.rollback()
+            failed = self._flush_rows(conn, by_table)
+
+        with self._cond:
+            for _ in batch:
+                table_name, row, _ = self._pending.popleft()
+                self.memory.tables[table_name].delete(row['id'])
+            self._cond.notify_all()
+        self.flushes += 1
+        self.flushed += len(batch) - failed
+        self.failed += failed
+        self.last_flush_seconds = time.perf_counter() - started
+        return len(batch) - failed
+
+    def _flush_rows(self, conn, by_table):
+        """Повтор пакета по строке: отвергнутые SQLite строки пропускаются"""
+        failed = 0
+        conn.execute('BEGIN IMMEDIATE')
+        for table_name, rows in by_table.items():
+            statement = self._insert_statement(table_name)
+            for row in rows:
+                conn.execute('SAVEPOINT row')
+                try:
+                    conn.execute(statement, row)
+                except sqlite3.Error as e:
+                    conn.execute('ROLLBACK TO row')
+                    failed += 1
+                    logger.error("Write-behind row %s.%s rejected: %s", table_name, row[0], e)
+                conn.execute('RELEASE row')
+        conn.execute('COMMIT')
+        return failed
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or len(self._pending) >= self.batch_size,
+                                    timeout=self.interval)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Write-behind flush failed")
+                time.sleep(self.interval)
+
+    def close(self):
+        """Останавливает фоновый поток и дописывает очередь"""
+        with self._cond:
+            self._closed = True
+            thread, self._thread = self._thread, None
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join()
+        self.flush()
+        with self._flush_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self):
+        with self._cond:
+            depth = len(self._pending)
+            oldest = self._pending[0][2] if depth else None
+        return {
+            "queue_depth": depth,
+            "max_pending": self.max_pending,
+            "flush_lag_ms": round((time.monotonic() - oldest) * 1000, 3) if oldest is not None else 0.0,
+            "flushed": self.flushed,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_seconds * 1000, 3)
+        }
@@ -0,0 +1,8 @@
+"""ASGI-точка входа: те же маршруты за событийным циклом (app/asgi.py).
+
+    uvicorn asgi:app --workers 4 --backlog 2048
+    flask serve --backend uvicorn
+"""
+from app.asgi import create_asgi_app
+
+app = create_asgi_app()
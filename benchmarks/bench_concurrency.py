@@ -0,0 +1,166 @@
+"""Задержки при тысяче одновременных keep-alive соединений: WSGI (gunicorn gthread) против ASGI (uvicorn).
+
+Каждый режим запускается отдельным процессом на временной БД с тестовыми
+данными; клиент на asyncio открывает --connections соединений и по каждому
+последовательно отправляет --requests запросов.
+
+Запуск из корня проекта (нужны gunicorn и uvicorn):
+    python -m benchmarks.bench_concurrency --connections 1000 --requests 5
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from app.config import Config
+
+MODES = {
+    "wsgi": "gunicorn",
+    "asgi": "uvicorn",
+}
+
+
+def serve(args):
+    """Серверная сторона: вызывается в дочернем процессе"""
+    from app import create_app
+    from app.db import init_db, fill_synthetic_db
+    from app.server import SERVER_BACKENDS
+
+    class BenchConfig(Config):
+        DATABASE = args.db
+        LOG_FILE = None
+        LOG_INFO_SAMPLE_RATE = 0.0
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        init_db(fill_test_data=True)
+        if args.scale:
+            fill_synthetic_db(args.scale, seed=1)
+    SERVER_BACKENDS[MODES[args.serve]](app, {
+        "bind": f"127.0.0.1:{args.port}",
+        "workers": 1,  # uvicorn принимает готовый объект приложения только с одним воркером
+        "threads": args.threads,
+        "keep_alive": 60,
+        "backlog": 4096,
+        "timeout": 120,
+    })
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    headers = {}
+    for line in head.split(b'\r\n')[1:]:
+        if b':' in line:
+            name, _, value = line.partition(b':')
+            headers[name.strip().lower()] = value.strip()
+    if b'content-length' in headers:
+        await reader.readexactly(int(headers[b'content-length']))
+    elif headers.get(b'transfer-encoding') == b'chunked':
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    return status
+
+
+async def client(port, path, requests, latencies, errors):
+    request = (f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n"
+               "Authorization: Bearer mock-token-123\r\nConnection: keep-alive\r\n\r\n").encode()
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    except OSError:
+        errors.append('connect')
+        return
+    try:
+        for _ in range(requests):
+            started = time.perf_counter()
+            writer.write(request)
+            status = await read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors.append(status)
+    except (OSError, asyncio.IncompleteReadError) as e:
+        errors.append(type(e).__name__)
+    finally:
+        writer.close()
+
+
+async def load(port, args):
+    latencies, errors = [], []
+    started = time.perf_counter()
+    await asyncio.gather(*(client(port, args.path, args.requests, latencies, errors)
+                           for _ in range(args.connections)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def wait_for_port(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Сервер не открыл порт {port} за {timeout} с")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, q):
+    return statistics.quantiles(values, n=100, method='inclusive')[q - 1] if len(values) > 1 else values[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--connections', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=5, help='запросов на соединение')
+    parser.add_argument('--threads', type=int, default=Config.SERVER_THREADS)
+    parser.add_argument('--scale', type=int, default=0, help='синтетических строк на таблицу')
+    parser.add_argument('--path', default='/accounts-v1.3.3/?page_size=20')
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--serve', choices=list(MODES), help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    print(f"{'mode':<6}{'ok':>8}{'errors':>8}{'req/s':>9}{'p50, ms':>10}{'p99, ms':>10}{'max, ms':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in args.modes:
+            port = free_port()
+            server = subprocess.Popen(
+                [sys.executable, '-m', 'benchmarks.bench_concurrency', '--serve', mode,
+                 '--port', str(port), '--db', os.path.join(tmp, f'{mode}.db'),
+                 '--threads', str(args.threads), '--scale', str(args.scale)],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            try:
+                wait_for_port(port)
+                latencies, errors, elapsed = asyncio.run(load(port, args))
+            finally:
+                server.terminate()
+                server.wait()
+            if not latencies:
+                print(f"{mode:<6}{0:>8}{len(errors):>8}")
+                continue
+            ms = sorted(value * 1000 for value in latencies)
+            print(f"{mode:<6}{len(latencies) - len(errors):>8}{len(errors):>8}{len(latencies) / elapsed:>9.0f}"
+                  f"{percentile(ms, 50):>10.1f}{percentile(ms, 99):>10.1f}{ms[-1]:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Пропускная способность POST /payments-v1.3.1/ при N потоках: COMMIT на запись против группового.
+
+Каждый режим — на своей временной БД; потоки вызывают приложение через
+test_client, так что измеряется слой Flask + SQLite без сети.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_group_commit --threads 1 4 16 --requests 300
+"""
+import argparse
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from app import create_app
+from app.config import Config
+from app.db import init_db, close_pool
+
+HEADERS = {"Authorization": "Bearer mock-token-123"}
+PAYMENT = {"amount": 100, "currency": "RUB", "recipient": "Иван", "account_id": "bench-acc"}
+
+
+def run(database, write_mode, threads, requests, synchronous):
+    config = type('BenchConfig', (Config,), {
+        "DATABASE": database,
+        "WRITE_MODE": write_mode,
+        "DB_SYNCHRONOUS": synchronous,
+        "LOG_FILE": None,
+    })
+    app = create_app(config_class=config)
+    with app.app_context():
+        init_db()
+    errors = []
+
+    def worker():
+        client = app.test_client()
+        for _ in range(requests):
+            if client.post('/payments-v1.3.1/', json=PAYMENT, headers=HEADERS).status_code != 201:
+                errors.append(1)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    close_pool(database)
+    return threads * requests / elapsed, len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--requests', type=int, default=300, help='запросов на поток')
+    parser.add_argument('--synchronous', choices=['NORMAL', 'FULL'], default='FULL',
+                        help='PRAGMA synchronous (FULL: fsync на каждый COMMIT)')
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    print(f"{'threads':<9}{'direct, req/s':>15}{'group, req/s':>15}{'speedup':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for threads in args.threads:
+            results = {}
+            for mode in ("direct", "group_commit"):
+                database = os.path.join(tmp, f'{mode}-{threads}.db')
+                results[mode], errors = run(database, mode, threads, args.requests, args.synchronous)
+                if errors:
+                    print(f"{mode}: ошибок {errors}")
+            print(f"{threads:<9}{results['direct']:>15.0f}{results['group_commit']:>15.0f}"
+                  f"{results['group_commit'] / results['direct']:>9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Сравнение req/s для payments и accounts с кэшем подготовленных выражений и без него.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_statement_cache --requests 2000
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from app import create_app
+from app.config import Config
+from app.db import init_db, close_pool
+
+HEADERS = {"Authorization": "Bearer mock-token-123"}
+
+PAYMENT = {"amount": 100, "currency": "RUB", "recipient": "Иван", "account_id": "bench-acc"}
+ACCOUNT = {"balance": 1000, "currency": "RUB", "owner": "Иван Иванов", "status": "active"}
+
+
+def make_app(database, statement_cache_size):
+    config = type('BenchConfig', (Config,), {
+        "DATABASE": database,
+        "DB_STATEMENT_CACHE_SIZE": statement_cache_size
+    })
+    app = create_app(config_class=config)
+    with app.app_context():
+        init_db()
+    return app
+
+
+def measure(client, method, url, requests, **kwargs):
+    call = getattr(client, method)
+    started = time.perf_counter()
+    for _ in range(requests):
+        call(url, headers=HEADERS, **kwargs)
+    return requests / (time.perf_counter() - started)
+
+
+def run(statement_cache_size, requests):
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'bench.db')
+        app = make_app(database, statement_cache_size)
+        client = app.test_client()
+        payment_id = client.post('/payments-v1.3.1/', json=PAYMENT, headers=HEADERS).get_json()["id"]
+        account_id = client.post('/accounts-v1.3.3/', json=ACCOUNT, headers=HEADERS).get_json()["id"]
+        results = {
+            "POST /payments-v1.3.1/": measure(client, 'post', '/payments-v1.3.1/', requests, json=PAYMENT),
+            "GET  /payments-v1.3.1/<id>": measure(client, 'get', f'/payments-v1.3.1/{payment_id}', requests),
+            "POST /accounts-v1.3.3/": measure(client, 'post', '/accounts-v1.3.3/', requests, json=ACCOUNT),
+            "GET  /accounts-v1.3.3/<id>": measure(client, 'get', f'/accounts-v1.3.3/{account_id}', requests),
+        }
+        close_pool(database)
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--cache-size', type=int, default=Config.DB_STATEMENT_CACHE_SIZE)
+    args = parser.parse_args()
+    # Логирование каждого запроса заглушает разницу в разборе SQL
+    logging.disable(logging.INFO)
+
+    before = run(0, args.requests)
+    after = run(args.cache_size, args.requests)
+    print(f"{'endpoint':<30}{'no cache, req/s':>18}{'cache, req/s':>16}{'speedup':>10}")
+    for name in before:
+        print(f"{name:<30}{before[name]:>18.0f}{after[name]:>16.0f}{after[name] / before[name]:>9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
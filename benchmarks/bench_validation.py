@@ -0,0 +1,39 @@
+"""Стоимость проверки одного тела запроса: jsonschema.validate против прекомпилированного валидатора.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_validation --iterations 20000
+"""
+import argparse
+import timeit
+
+import jsonschema
+
+from app import schemas
+from app.validation import validate
+
+SAMPLES = {
+    "payment_schema": {"amount": 100, "currency": "RUB", "recipient": "Иван"},
+    "physical_account_schema": {"balance": 1000, "currency": "RUB", "owner": "Иван Иванов", "status": "active"},
+    "vrp_schema": {"max_amount": 5000, "frequency": "MONTHLY", "valid_until": "2030-01-01",
+                   "recipient_account": "RU0012345678"},
+    "transaction_schema": {"date": "2025-01-01T10:00:00", "amount": 1, "currency": "RUB",
+                           "account_id": "acc", "status": "SUCCESS"},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'schema':<26}{'validate(), us':>16}{'compiled, us':>14}{'speedup':>10}")
+    for name, data in SAMPLES.items():
+        schema = getattr(schemas, name)
+        before = timeit.timeit(lambda: jsonschema.validate(data, schema), number=args.iterations)
+        after = timeit.timeit(lambda: validate(data, schema), number=args.iterations)
+        per_call = 1e6 / args.iterations
+        print(f"{name:<26}{before * per_call:>16.1f}{after * per_call:>14.1f}{before / after:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
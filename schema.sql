@@ -37,13 +37,14 @@ CREATE TABLE IF NOT EXISTS consents (
     account_id TEXT NOT NULL,
     scope TEXT,
     subject TEXT,
+    valid_until TIMESTAMP,                -- NULL: бессрочное; по истечении статус EXPIRED (app/expiry.py)
     FOREIGN KEY (account_id) REFERENCES accounts(id)
 );
 
 
 CREATE TABLE IF NOT EXISTS vrps (
     id TEXT PRIMARY KEY,
-    status TEXT NOT NULL CHECK(status IN ('ACTIVE', 'PAUSED', 'CANCELLED')),
+    status TEXT NOT NULL CHECK(status IN ('ACTIVE', 'PAUSED', 'CANCELLED', 'EXPIRED')),
     max_amount REAL NOT NULL CHECK(max_amount > 0),
     frequency TEXT NOT NULL CHECK(frequency IN ('DAILY', 'WEEKLY', 'MONTHLY')),
     valid_until DATE NOT NULL,
@@ -106,6 +107,109 @@ CREATE TABLE IF NOT EXISTS transactions (
 );
 
 
+-- Ответы POST с Idempotency-Key (IDEMPOTENCY_PERSIST); key — хэш (Authorization, путь, ключ)
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    body BLOB NOT NULL,
+    content_type TEXT,
+    created_at REAL NOT NULL
+) WITHOUT ROWID;
+
+
 CREATE INDEX IF NOT EXISTS idx_accounts_type ON accounts(type);
 CREATE INDEX IF NOT EXISTS idx_payments_status ON payments(status);
 CREATE INDEX IF NOT EXISTS idx_vrp_recipient ON vrps(recipient_account);
+-- Проверка разрешений TPP по счёту (/consent-*/check)
+CREATE INDEX IF NOT EXISTS idx_consents_tpp_account ON consents(tpp_id, account_id);
+-- Составные индексы под keyset-пагинацию (ORDER BY ... DESC, id DESC)
+CREATE INDEX IF NOT EXISTS idx_transactions_date_id ON transactions(date, id);
+CREATE INDEX IF NOT EXISTS idx_vrps_valid_until_id ON vrps(valid_until, id);
+-- Списки VRP по статусу и поиск истёкших записей (status = ? AND valid_until < ?)
+CREATE INDEX IF NOT EXISTS idx_vrps_status_valid_until ON vrps(status, valid_until, id);
+CREATE INDEX IF NOT EXISTS idx_consents_status_valid_until ON consents(status, valid_until, id);
+-- История по счёту: account_id = ? + диапазон дат + сортировка по (date, id) без TEMP B-TREE
+CREATE INDEX IF NOT EXISTS idx_transactions_account_date ON transactions(account_id, date, id);
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_created ON idempotency_keys(created_at);
+
+-- Счётчики строк для /metrics: поддерживаются триггерами, чтобы метрики не
+-- делали COUNT(*) по растущим таблицам. Ключ — таблица или "accounts.<type>".
+CREATE TABLE IF NOT EXISTS entity_counts (
+    name TEXT PRIMARY KEY,
+    count INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+-- Начальные значения для уже существующих данных (при повторном init_db строки сохраняются)
+INSERT OR IGNORE INTO entity_counts (name, count)
+SELECT 'accounts', COUNT(*) FROM accounts
+UNION ALL SELECT 'accounts.physical_entity', COUNT(*) FROM accounts WHERE type = 'physical_entity'
+UNION ALL SELECT 'accounts.legal_entity', COUNT(*) FROM accounts WHERE type = 'legal_entity'
+UNION ALL SELECT 'payments', COUNT(*) FROM payments
+UNION ALL SELECT 'consents', COUNT(*) FROM consents
+UNION ALL SELECT 'vrps', COUNT(*) FROM vrps
+UNION ALL SELECT 'medical_insured', COUNT(*) FROM medical_insured
+UNION ALL SELECT 'bank_docs', COUNT(*) FROM bank_docs
+UNION ALL SELECT 'insurance_docs', COUNT(*) FROM insurance_docs
+UNION ALL SELECT 'product_agreements', COUNT(*) FROM product_agreements
+UNION ALL SELECT 'transactions', COUNT(*) FROM transactions;
+
+CREATE TRIGGER IF NOT EXISTS trg_accounts_count_insert AFTER INSERT ON accounts BEGIN
+    UPDATE entity_counts SET count = count + 1 WHERE name IN ('accounts', 'accounts.' || NEW.type);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_accounts_count_delete AFTER DELETE ON accounts BEGIN
+    UPDATE entity_counts SET count = count - 1 WHERE name IN ('accounts', 'accounts.' || OLD.type);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_accounts_count_type AFTER UPDATE OF type ON accounts
+WHEN OLD.type <> NEW.type BEGIN
+    UPDATE entity_counts SET count = count - 1 WHERE name = 'accounts.' || OLD.type;
+    UPDATE entity_counts SET count = count + 1 WHERE name = 'accounts.' || NEW.type;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_payments_count_insert AFTER INSERT ON payments BEGIN
+    UPDATE entity_counts SET count = count + 1 WHERE name = 'payments';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_payments_count_delete AFTER DELETE ON payments BEGIN
+    UPDATE entity_counts SET count = count - 1 WHERE name = 'payments';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_consents_count_insert AFTER INSERT ON consents BEGIN
+    UPDATE entity_counts SET count = count + 1 WHERE name = 'consents';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_consents_count_delete AFTER DELETE ON consents BEGIN
+    UPDATE entity_counts SET count = count - 1 WHERE name = 'consents';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_vrps_count_insert AFTER INSERT ON vrps BEGIN
+    UPDATE entity_counts SET count = count + 1 WHERE name = 'vrps';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_vrps_count_delete AFTER DELETE ON vrps BEGIN
+    UPDATE entity_counts SET count = count - 1 WHERE name = 'vrps';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_medical_insured_count_insert AFTER INSERT ON medical_insured BEGIN
+    UPDATE entity_counts SET count = count + 1 WHERE name = 'medical_insured';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_medical_insured_count_delete AFTER DELETE ON medical_insured BEGIN
+    UPDATE entity_counts SET count = count - 1 WHERE name = 'medical_insured';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_bank_docs_count_insert AFTER INSERT ON bank_docs BEGIN
+    UPDATE entity_counts SET count = count + 1 WHERE name = 'bank_docs';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_bank_docs_count_delete AFTER DELETE ON bank_docs BEGIN
+    UPDATE entity_counts SET count = count - 1 WHERE name = 'bank_docs';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_insurance_docs_count_insert AFTER INSERT ON insurance_docs BEGIN
+    UPDATE entity_counts SET count = count + 1 WHERE name = 'insurance_docs';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_insurance_docs_count_delete AFTER DELETE ON insurance_docs BEGIN
+    UPDATE entity_counts SET count = count - 1 WHERE name = 'insurance_docs';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_product_agreements_count_insert AFTER INSERT ON product_agreements BEGIN
+    UPDATE entity_counts SET count = count + 1 WHERE name = 'product_agreements';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_product_agreements_count_delete AFTER DELETE ON product_agreements BEGIN
+    UPDATE entity_counts SET count = count - 1 WHERE name = 'product_agreements';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_transactions_count_insert AFTER INSERT ON transactions BEGIN
+    UPDATE entity_counts SET count = count + 1 WHERE name = 'transactions';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_transactions_count_delete AFTER DELETE ON transactions BEGIN
+    UPDATE entity_counts SET count = count - 1 WHERE name = 'transactions';
+END;
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import unittest
+from app.asgi import create_asgi_app
+from app.config import TestConfig
+from app.db import init_db
+
+HEADERS = [(b"authorization", b"Bearer mock-token-123"), (b"x-request-id", b"asgi-1")]
+
+
+def http_scope(method, path, query=b"", headers=()):
+    return {
+        "type": "http", "http_version": "1.1", "method": method, "scheme": "http",
+        "path": path, "root_path": "", "query_string": query,
+        "headers": [*HEADERS, *headers], "server": ("testserver", 80), "client": ("127.0.0.1", 5000),
+    }
+
+
+async def call(app, scope, body=b""):
+    """Один запрос через ASGI: тело отдаётся двумя сообщениями, ответ собирается из send"""
+    incoming = [
+        {"type": "http.request", "body": body[:3], "more_body": True},
+        {"type": "http.request", "body": body[3:], "more_body": False},
+    ]
+    sent = []
+
+    async def receive():
+        return incoming.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent
+
+
+class TestAsgiAdapter(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.asgi = create_asgi_app(TestConfig)
+        cls.asgi.wsgi_app.config['STREAM_CHUNK_SIZE'] = 1
+        with cls.asgi.wsgi_app.app_context():
+            init_db(fill_test_data=True)
+
+    def request(self, method, path, **kwargs):
+        sent = asyncio.run(call(self.asgi, http_scope(method, path, **{
+            k: v for k, v in kwargs.items() if k in ("query", "headers")}), kwargs.get("body", b"")))
+        start, bodies = sent[0], sent[1:]
+        self.assertEqual(start["type"], "http.response.start")
+        self.assertFalse(bodies[-1].get("more_body", False))
+        return start, bodies
+
+    def test_same_response_as_wsgi(self):
+        start, bodies = self.request("GET", "/accounts-v1.3.3/", query=b"page_size=2")
+        self.assertEqual(start["status"], 200)
+        self.assertEqual(len(bodies), 1)  # заголовки и тело одним переходом
+        headers = dict(start["headers"])
+        self.assertEqual(headers[b"x-request-id"], b"asgi-1")
+
+        expected = self.asgi.wsgi_app.test_client().get(
+            "/accounts-v1.3.3/?page_size=2", headers={k.decode(): v.decode() for k, v in HEADERS})
+        self.assertEqual(json.loads(bodies[0]["body"]), expected.get_json())
+
+    def test_post_body(self):
+        payload = json.dumps({"amount": 10, "currency": "RUB", "recipient": "Иван", "account_id": "asgi-acc"})
+        start, bodies = self.request("POST", "/payments-v1.3.1/", body=payload.encode(),
+                                     headers=[(b"content-type", b"application/json")])
+        self.assertEqual(start["status"], 201)
+        self.assertEqual(json.loads(bodies[0]["body"])["recipient"], "Иван")
+
+    def test_streaming_response(self):
+        start, bodies = self.request("GET", "/accounts-v1.3.3/", query=b"stream=ndjson")
+        self.assertEqual(start["status"], 200)
+        self.assertGreater(len(bodies), 1)
+        lines = b"".join(message["body"] for message in bodies).splitlines()
+        self.assertTrue(all(json.loads(line)["id"] for line in lines))
+
+    def test_lifespan(self):
+        asgi = create_asgi_app(TestConfig)
+        messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        asyncio.run(asgi({"type": "lifespan"}, receive, send))
+        self.assertEqual(sent, ["lifespan.startup.complete", "lifespan.shutdown.complete"])
+
+
+if __name__ == '__main__':
+    unittest.main()
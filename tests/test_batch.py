@@ -0,0 +1,77 @@
+import json
+import unittest
+from app import create_app
+from app.config import TestConfig
+from app.db import init_db, get_db
+
+HEADERS = {"Authorization": "Bearer mock-token-123"}
+
+
+class TestBatchCreate(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Инициализация тестовой среды"""
+        cls.app = create_app(config_class=TestConfig)
+        with cls.app.app_context():
+            init_db()
+
+    def setUp(self):
+        self.client = self.app.test_client()
+
+    def test_payments_batch(self):
+        payments = [
+            {"amount": 100 + i, "currency": "RUB", "recipient": "Иван", "account_id": "batch-acc"}
+            for i in range(3)
+        ]
+        response = self.client.post('/payments-v1.3.1/batch', json=payments, headers=HEADERS)
+        self.assertEqual(response.status_code, 201)
+        result = response.get_json()
+        self.assertEqual(result["created"], 3)
+        self.assertEqual([item["index"] for item in result["items"]], [0, 1, 2])
+
+        with self.app.app_context():
+            row = get_db().execute(
+                'SELECT amount FROM payments WHERE id = ?',
+                (result["items"][2]["id"],)
+            ).fetchone()
+            self.assertEqual(row["amount"], 102)
+
+    def test_accounts_batch_ndjson(self):
+        body = "\n".join(json.dumps(
+            {"balance": 10, "currency": "RUB", "company": f"ООО {i}", "status": "active"}
+        ) for i in range(2))
+        response = self.client.post(
+            '/accounts-le-v2.0.0/batch',
+            data=body,
+            headers={**HEADERS, "Content-Type": "application/x-ndjson"}
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.get_json()["created"], 2)
+
+    def test_batch_rejected_as_a_whole(self):
+        transactions = [
+            {"id": "batch-tx-1", "date": "2025-01-01T10:00:00", "amount": 1,
+             "currency": "RUB", "account_id": "acc", "status": "SUCCESS"},
+            {"id": "batch-tx-2", "amount": 1, "currency": "RUB", "account_id": "acc", "status": "SUCCESS"},
+        ]
+        response = self.client.post('/transaction-history-v1.0.0/batch', json=transactions, headers=HEADERS)
+        self.assertEqual(response.status_code, 400)
+        errors = response.get_json()["errors"]
+        self.assertEqual([error["index"] for error in errors], [1])
+
+        with self.app.app_context():
+            row = get_db().execute('SELECT 1 FROM transactions WHERE id = ?', ('batch-tx-1',)).fetchone()
+            self.assertIsNone(row)
+
+    def test_batch_size_limit(self):
+        self.app.config['BATCH_MAX_SIZE'] = 1
+        try:
+            response = self.client.post('/payments-v1.3.1/batch', json=[{}, {}], headers=HEADERS)
+            self.assertEqual(response.status_code, 413)
+        finally:
+            self.app.config['BATCH_MAX_SIZE'] = TestConfig.BATCH_MAX_SIZE
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from app import create_app
+from app.cache import LRUCache, get_cache
+from app.config import TestConfig
+from app.db import init_db
+
+HEADERS = {"Authorization": "Bearer mock-token-123"}
+PAYMENT = {"amount": 100, "currency": "RUB", "recipient": "Иван", "account_id": "cache-acc"}
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_ttl(self):
+        now = [0.0]
+        cache = LRUCache(ttl=10, clock=lambda: now[0])
+        cache.set("a", 1, 1)
+        self.assertEqual(cache.get("a"), 1)
+        now[0] = 10.0
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_limits(self):
+        cache = LRUCache(max_entries=2, max_bytes=10)
+        cache.set("a", 1, 4)
+        cache.set("b", 2, 4)
+        cache.get("a")
+        cache.set("c", 3, 4)  # вытесняет b — давно не читанный
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        cache.set("d", 4, 8)  # по байтам помещается только d
+        self.assertEqual(cache.stats()["bytes"], 8)
+        self.assertEqual(cache.get("d"), 4)
+        self.assertEqual(cache.stats()["evictions"], 3)
+
+
+class TestEntityCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Инициализация тестовой среды"""
+        cls.app = create_app(config_class=TestConfig)
+        with cls.app.app_context():
+            init_db()
+
+    def setUp(self):
+        self.client = self.app.test_client()
+        get_cache(self.app).clear()
+
+    def test_hit_ratio_on_metrics(self):
+        payment_id = self.client.post('/payments-v1.3.1/', json=PAYMENT, headers=HEADERS).get_json()["id"]
+        for _ in range(3):
+            response = self.client.get(f'/payments-v1.3.1/{payment_id}', headers=HEADERS)
+            self.assertEqual(response.get_json()["amount"], 100)
+        stats = self.client.get('/metrics').get_json()["response_cache"]
+        self.assertGreaterEqual(stats["hits"], 2)
+        self.assertGreater(stats["hit_ratio"], 0)
+
+    def test_put_and_delete_invalidate(self):
+        payment_id = self.client.post('/payments-v1.3.1/', json=PAYMENT, headers=HEADERS).get_json()["id"]
+        url = f'/payments-v1.3.1/{payment_id}'
+        self.client.get(url, headers=HEADERS)
+        self.client.put(url, json={**PAYMENT, "amount": 500}, headers=HEADERS)
+        self.assertEqual(self.client.get(url, headers=HEADERS).get_json()["amount"], 500)
+        self.client.delete(url, headers=HEADERS)
+        self.assertEqual(self.client.get(url, headers=HEADERS).status_code, 404)
+
+    def test_type_checked_on_cached_row(self):
+        payment_id = self.client.post('/payments-v1.3.1/', json=PAYMENT, headers=HEADERS).get_json()["id"]
+        self.client.get(f'/payments-v1.3.1/{payment_id}', headers=HEADERS)
+        # Обычный платёж из кэша не должен отдаваться как платёж по 211-ФЗ
+        response = self.client.get(f'/pm-211fz-v1.3.1/{payment_id}', headers=HEADERS)
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
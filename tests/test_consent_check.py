@@ -0,0 +1,147 @@
+import unittest
+from unittest import mock
+from app import create_app
+from app.cache import get_permission_cache
+from app.config import TestConfig
+from app.db import init_db, get_pool
+from app.statements import STATEMENTS
+
+HEADERS = {"Authorization": "Bearer mock-token-123"}
+CONSENT = {"tpp_id": "tpp-check", "permissions": ["accounts:read", "payments:write"], "account_id": "check-acc",
+           "subject": "Проверка", "scope": "accounts"}
+
+
+def check_url(permission, tpp_id="tpp-check", account_id="check-acc", prefix='/consent-pe-v2.0.0'):
+    return f'{prefix}/check?tpp_id={tpp_id}&account_id={account_id}&permission={permission}'
+
+
+class ConsentCheckTests:
+    config_class = TestConfig
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app(cls.config_class)
+        with cls.app.app_context():
+            init_db(fill_test_data=True)
+
+    def setUp(self):
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            init_db()
+
+    def allowed(self, permission, **kwargs):
+        response = self.client.get(check_url(permission, **kwargs), headers=HEADERS)
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()["allowed"]
+
+    def test_check_permission(self):
+        consent = self.client.post('/consent-pe-v2.0.0/', json=CONSENT, headers=HEADERS).get_json()
+        response = self.client.get(check_url("payments:write"), headers=HEADERS)
+        self.assertEqual(response.get_json(), {
+            "allowed": True, "consent_id": consent["id"], "tpp_id": "tpp-check",
+            "account_id": "check-acc", "permission": "payments:write"
+        })
+        self.assertFalse(self.allowed("cards:read"))
+        self.assertFalse(self.allowed("accounts:read", tpp_id="tpp-other"))
+        self.assertFalse(self.allowed("accounts:read", account_id="other-acc"))
+        # Согласие физического лица не даёт разрешений по проверке для юридических
+        self.assertFalse(self.allowed("accounts:read", prefix='/consent-le-v2.0.0'))
+
+        response = self.client.get('/consent-pe-v2.0.0/check?tpp_id=tpp-check', headers=HEADERS)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("account_id, permission", response.get_json()["message"])
+
+    def test_repeated_checks_served_from_cache(self):
+        self.client.post('/consent-le-v2.0.0/', json=CONSENT, headers=HEADERS)
+        cache = get_permission_cache(self.app)
+        self.assertTrue(self.allowed("accounts:read", prefix='/consent-le-v2.0.0'))
+        hits = cache.stats()["hits"]
+        for _ in range(3):
+            self.assertTrue(self.allowed("accounts:read", prefix='/consent-le-v2.0.0'))
+            self.assertFalse(self.allowed("cards:read", prefix='/consent-le-v2.0.0'))
+        self.assertEqual(cache.stats()["hits"], hits + 6)
+        metrics = self.client.get('/metrics', headers=HEADERS).get_json()
+        self.assertGreater(metrics["permission_cache"]["hits"], 0)
+
+    def test_cache_invalidated_by_changes(self):
+        # Закэшированный отказ сбрасывается созданием согласия
+        self.assertFalse(self.allowed("accounts:read"))
+        consent = self.client.post('/consent-pe-v2.0.0/', json=CONSENT, headers=HEADERS).get_json()
+        self.assertTrue(self.allowed("accounts:read"))
+
+        url = f'/consent-pe-v2.0.0/{consent["id"]}'
+        self.client.put(url, json={**CONSENT, "permissions": ["accounts:read"]}, headers=HEADERS)
+        self.assertFalse(self.allowed("payments:write"))
+
+        moved = {**CONSENT, "tpp_id": "tpp-moved"}
+        self.client.put(url, json=moved, headers=HEADERS)
+        self.assertFalse(self.allowed("accounts:read"))
+        self.assertTrue(self.allowed("accounts:read", tpp_id="tpp-moved"))
+
+        self.client.put(url, json={**moved, "status": "REVOKED"}, headers=HEADERS)
+        self.assertFalse(self.allowed("accounts:read", tpp_id="tpp-moved"))
+
+        self.client.put(url, json={**moved, "status": "ACTIVE"}, headers=HEADERS)
+        self.assertTrue(self.allowed("accounts:read", tpp_id="tpp-moved"))
+        self.assertEqual(self.client.delete(url, headers=HEADERS).status_code, 204)
+        self.assertFalse(self.allowed("accounts:read", tpp_id="tpp-moved"))
+
+    def test_expired_consent_grants_nothing(self):
+        # ACTIVE-согласие с прошедшим valid_until, которое ещё не перевёл в EXPIRED проход истечения
+        self.client.post('/consent-pe-v2.0.0/', json={**CONSENT, "valid_until": "2025-01-01T00:00:00"},
+                         headers=HEADERS)
+        self.assertFalse(self.allowed("accounts:read"))
+
+        consent = self.client.post('/consent-pe-v2.0.0/', json={**CONSENT, "valid_until": "2025-06-01T12:00:00"},
+                                   headers=HEADERS).get_json()
+        cutoff = 'app.routes.consents.grants_cutoff'
+        with mock.patch(cutoff, return_value="2025-06-01T11:59:59"):
+            self.assertTrue(self.allowed("accounts:read"))
+        # Закэшированный результат не переживает valid_until согласия
+        with mock.patch(cutoff, return_value="2025-06-01T12:00:00"):
+            self.assertFalse(self.allowed("accounts:read"))
+        self.assertEqual(self.client.get(f'/consent-pe-v2.0.0/{consent["id"]}', headers=HEADERS).get_json()["status"],
+                         "ACTIVE")
+
+    def test_partial_put_updates_only_sent_fields(self):
+        consent = self.client.post('/consent-pe-v2.0.0/', json={**CONSENT, "valid_until": "2099-01-01T00:00:00"},
+                                   headers=HEADERS).get_json()
+        url = f'/consent-pe-v2.0.0/{consent["id"]}'
+        scope = {"subject": CONSENT["subject"], "scope": CONSENT["scope"]}
+        response = self.client.put(url, json={**scope, "tpp_id": "tpp-partial"}, headers=HEADERS).get_json()
+        self.assertEqual(response["tpp_id"], "tpp-partial")
+        self.assertEqual(response["permissions"], CONSENT["permissions"])
+        self.assertEqual(response["valid_until"], "2099-01-01T00:00:00")
+        # null сбрасывает nullable-колонку, для NOT NULL колонок означает «не менять»
+        response = self.client.put(url, json={**scope, "valid_until": None, "status": None}, headers=HEADERS)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.get_json()["valid_until"])
+        self.assertEqual(response.get_json()["status"], "ACTIVE")
+        # Без изменяемых полей строка возвращается как есть
+        self.assertEqual(self.client.put(url, json=scope, headers=HEADERS).get_json(), response.get_json())
+
+
+class TestConsentCheck(ConsentCheckTests, unittest.TestCase):
+
+    def test_lookup_uses_index(self):
+        pool = get_pool(self.app)
+        conn = pool.acquire()
+        try:
+            plan = conn.execute(f'EXPLAIN QUERY PLAN {STATEMENTS["consents"]["list_by_tpp_and_account"]}',
+                                ("tpp-check", "check-acc", "physical_entity", "ACTIVE",
+                                 "2025-06-01T12:00:00")).fetchall()
+        finally:
+            pool.release(conn)
+        self.assertIn("idx_consents_tpp_account", " ".join(row[-1] for row in plan))
+
+
+class MemoryConfig(TestConfig):
+    STORAGE_BACKEND = "memory"
+
+
+class TestMemoryConsentCheck(ConsentCheckTests, unittest.TestCase):
+    config_class = MemoryConfig
+
+
+if __name__ == '__main__':
+    unittest.main()
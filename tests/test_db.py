@@ -0,0 +1,308 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from app import create_app
+from app.config import TestConfig
+from app.db import (
+    init_db, get_db, get_pool, execute_returning, fill_test_db, fill_synthetic_db,
+    ConnectionPool, PoolTimeoutError, SharedCacheConnection, close_pool, upgrade_db
+)
+from app.statements import STATEMENTS, ENTITY_COUNT_TABLES
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Инициализация тестовой среды"""
+        cls.app = create_app(config_class=TestConfig)
+        with cls.app.app_context():
+            init_db()
+
+    def test_connection_reused_between_requests(self):
+        with self.app.app_context():
+            first = get_db()
+        with self.app.app_context():
+            second = get_db()
+        self.assertIs(first, second)
+
+    def test_pragmas_applied(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            pool = ConnectionPool(os.path.join(tmp, 'pragmas.db'), cache_size_kib=TestConfig.DB_CACHE_SIZE_KIB)
+            db = pool.acquire()
+            try:
+                self.assertEqual(db.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+                # synchronous=NORMAL == 1
+                self.assertEqual(db.execute('PRAGMA synchronous').fetchone()[0], 1)
+                self.assertEqual(
+                    db.execute('PRAGMA cache_size').fetchone()[0],
+                    -TestConfig.DB_CACHE_SIZE_KIB
+                )
+            finally:
+                pool.release(db)
+                pool.close()
+
+    def test_shared_memory_database(self):
+        with self.app.app_context():
+            db = get_db()
+            self.assertIsInstance(db, SharedCacheConnection)
+            self.assertEqual(db.execute('PRAGMA read_uncommitted').fetchone()[0], 0)
+        # БД переживает закрытие всех соединений пула
+        close_pool(TestConfig.DATABASE)
+        with self.app.app_context():
+            self.assertIsNotNone(get_db().execute(STATEMENTS["system"]["entity_counts"]).fetchone())
+
+    def test_shared_cache_reader_waits_for_commit(self):
+        pool = get_pool(self.app)
+        writer, reader = pool.acquire(), pool.acquire()
+        query = "SELECT COUNT(*) FROM transactions WHERE id = 'tx-locked'"
+        try:
+            writer.execute("INSERT INTO transactions (id, date, amount, currency, account_id, status) "
+                           "VALUES ('tx-locked', '2025-01-01', 1, 'RUB', 'acc', 'SUCCESS')")
+            # Читатель получает SQLITE_LOCKED и повторяет запрос, пока писатель не зафиксирует строку
+            timer = threading.Timer(0.05, writer.commit)
+            timer.start()
+            self.assertEqual(reader.execute(query).fetchone()[0], 1)
+            timer.join()
+        finally:
+            writer.execute("DELETE FROM transactions WHERE id = 'tx-locked'")
+            writer.commit()
+            pool.release(writer)
+            pool.release(reader)
+
+    def test_init_db_migrates_previous_schema(self):
+        # Таблицы в том виде, в каком их создавала прежняя schema.sql
+        previous = """
+            CREATE TABLE consents (
+                id TEXT PRIMARY KEY,
+                type TEXT NOT NULL CHECK(type IN ('physical_entity', 'legal_entity')),
+                status TEXT NOT NULL CHECK(status IN ('ACTIVE', 'REVOKED', 'EXPIRED')),
+                tpp_id TEXT NOT NULL,
+                permissions TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                account_id TEXT NOT NULL,
+                scope TEXT,
+                subject TEXT
+            );
+            CREATE TABLE vrps (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL CHECK(status IN ('ACTIVE', 'PAUSED', 'CANCELLED')),
+                max_amount REAL NOT NULL CHECK(max_amount > 0),
+                frequency TEXT NOT NULL CHECK(frequency IN ('DAILY', 'WEEKLY', 'MONTHLY')),
+                valid_until DATE NOT NULL,
+                recipient_account TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE INDEX idx_vrps_valid_until_id ON vrps(valid_until, id);
+            INSERT INTO consents (id, type, status, tpp_id, permissions, account_id)
+            VALUES ('consent-old', 'physical_entity', 'ACTIVE', 'tpp', '[]', 'acc');
+            INSERT INTO vrps (id, status, max_amount, frequency, valid_until, recipient_account)
+            VALUES ('vrp-old', 'ACTIVE', 100, 'MONTHLY', '2025-01-01', 'acc');
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            db = sqlite3.connect(os.path.join(tmp, 'previous.db'))
+            try:
+                db.executescript(previous)
+                init_db(db=db)
+                init_db(db=db)  # повторный запуск ничего не меняет
+
+                self.assertIn('valid_until', {row[1] for row in db.execute('PRAGMA table_info(consents)')})
+                db.execute("UPDATE vrps SET status = 'EXPIRED' WHERE id = 'vrp-old'")
+                self.assertEqual(db.execute("SELECT status, max_amount FROM vrps").fetchall(), [('EXPIRED', 100)])
+                indexes = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE tbl_name = 'vrps'")}
+                self.assertTrue({'idx_vrps_valid_until_id', 'idx_vrps_status_valid_until',
+                                 'trg_vrps_count_insert'} <= indexes)
+                db.execute("INSERT INTO vrps (id, status, max_amount, frequency, valid_until, recipient_account) "
+                           "VALUES ('vrp-new', 'ACTIVE', 1, 'DAILY', '2099-01-01', 'acc')")
+                counts = dict(db.execute("SELECT name, count FROM entity_counts WHERE name IN ('vrps', 'consents')"))
+                self.assertEqual(counts, {'vrps': 2, 'consents': 1})
+            finally:
+                db.close()
+
+    def test_pool_timeout(self):
+        pool = ConnectionPool(TestConfig.DATABASE, size=1, timeout=0.01)
+        conn = pool.acquire()
+        try:
+            with self.assertRaises(PoolTimeoutError):
+                pool.acquire()
+        finally:
+            pool.release(conn)
+            pool.close()
+
+    def test_release_rolls_back_open_transaction(self):
+        pool = get_pool(self.app)
+        with self.app.app_context():
+            db = get_db()
+            db.execute("INSERT INTO transactions (id, date, amount, currency, account_id, status) "
+                       "VALUES ('tx-rollback', '2025-01-01', 1, 'RUB', 'acc', 'SUCCESS')")
+        self.assertGreater(pool.stats()["idle"], 0)
+        with self.app.app_context():
+            row = get_db().execute("SELECT 1 FROM transactions WHERE id = 'tx-rollback'").fetchone()
+            self.assertIsNone(row)
+
+    def test_statement_cache_counters(self):
+        pool = ConnectionPool(TestConfig.DATABASE, size=1, statement_cache_size=2)
+        conn = pool.acquire()
+        try:
+            query = STATEMENTS["transactions"]["select_by_id"]
+            conn.execute(query, ('tx1',))
+            conn.execute(query, ('tx2',))
+            stats = pool.stats()["statement_cache"]
+            self.assertEqual(stats["hits"], 1)
+            # PRAGMA-запросы при открытии соединения тоже проходят через кэш
+            self.assertGreaterEqual(stats["misses"], 1)
+        finally:
+            pool.release(conn)
+            pool.close()
+
+    def test_execute_returning(self):
+        sql = STATEMENTS["vrps"]
+        with self.app.app_context():
+            vrp = execute_returning(
+                sql["insert_returning"],
+                ('vrp-returning', 'ACTIVE', 100, 'DAILY', '2030-01-01', 'RU0012345678')
+            )
+            self.assertEqual(vrp["id"], 'vrp-returning')
+            self.assertIsNotNone(vrp["created_at"])
+
+            updated = execute_returning(
+                sql["update_returning"],
+                (200, 'WEEKLY', '2031-01-01', 'RU0012345678', 'vrp-returning')
+            )
+            self.assertEqual(updated["max_amount"], 200)
+            self.assertIsNone(execute_returning(
+                sql["update_returning"],
+                (200, 'WEEKLY', '2031-01-01', 'RU0012345678', 'missing')
+            ))
+        with self.app.app_context():
+            row = get_db().execute(sql["select_by_id"], ('vrp-returning',)).fetchone()
+            self.assertEqual(row["frequency"], 'WEEKLY')
+
+
+class TestFillDb(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app(config_class=TestConfig)
+        with self.app.app_context():
+            init_db()
+
+    def test_fill_test_db(self):
+        with self.app.app_context():
+            fill_test_db()
+            db = get_db()
+            self.assertEqual(db.execute('SELECT COUNT(*) FROM consents').fetchone()[0], 2)
+            self.assertEqual(db.execute('SELECT COUNT(*) FROM accounts').fetchone()[0], 4)
+            payment = db.execute('SELECT type, created_at FROM payments').fetchone()
+            self.assertEqual(payment["type"], 'standard')
+            self.assertIsNotNone(payment["created_at"])
+            # pragma пула восстановлены после загрузки
+            self.assertEqual(db.execute('PRAGMA synchronous').fetchone()[0], 1)
+
+    def test_fixtures_fill_every_table(self):
+        for fill_test_data in (True, False):
+            with self.subTest(from_snapshot=fill_test_data), self.app.app_context():
+                # Снимок с фикстурами и прямая загрузка fill_test_db
+                init_db(fill_test_data=fill_test_data)
+                if not fill_test_data:
+                    fill_test_db()
+                db = get_db()
+                for table in ENTITY_COUNT_TABLES:
+                    self.assertGreater(db.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0], 0, table)
+
+    def test_fill_synthetic_db(self):
+        with self.app.app_context():
+            inserted = fill_synthetic_db(25, chunk_size=10, seed=1)
+            self.assertEqual(inserted, {"accounts": 25, "payments": 25, "consents": 25, "transactions": 25})
+            db = get_db()
+            orphans = db.execute(
+                'SELECT COUNT(*) FROM transactions t LEFT JOIN accounts a ON a.id = t.account_id '
+                'WHERE a.id IS NULL'
+            ).fetchone()[0]
+            self.assertEqual(orphans, 0)
+
+    def test_init_db_command_scale(self):
+        result = self.app.test_cli_runner().invoke(args=['init-db', '--scale', '5'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        with self.app.app_context():
+            count = get_db().execute('SELECT COUNT(*) FROM payments').fetchone()[0]
+            self.assertEqual(count, 5)
+
+
+class TestSnapshotInit(unittest.TestCase):
+
+    def test_file_database_from_snapshot(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            class SnapshotConfig(TestConfig):
+                DATABASE = os.path.join(tmp, 'snapshot.db')
+
+            app = create_app(config_class=SnapshotConfig)
+            with app.app_context():
+                init_db(fill_test_data=True, reset=True)
+                db = get_db()
+                self.assertEqual(db.execute('SELECT COUNT(*) FROM accounts').fetchone()[0], 4)
+                counts = dict(db.execute(STATEMENTS["system"]["entity_counts"]).fetchall())
+                self.assertEqual(counts["accounts"], 4)
+                db.execute("DELETE FROM accounts")
+                db.commit()
+            with app.app_context():
+                # Повторный init_db с reset возвращает содержимое снимка целиком
+                init_db(fill_test_data=True, reset=True)
+                self.assertEqual(get_db().execute('SELECT COUNT(*) FROM accounts').fetchone()[0], 4)
+            close_pool(SnapshotConfig.DATABASE)
+
+    def test_file_database_keeps_rows(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            class FileConfig(TestConfig):
+                DATABASE = os.path.join(tmp, 'kept.db')
+
+            app = create_app(config_class=FileConfig)
+            with app.app_context():
+                init_db(fill_test_data=True, reset=True)
+                get_db().execute("DELETE FROM accounts WHERE rowid = (SELECT MIN(rowid) FROM accounts)")
+                get_db().commit()
+            # Без reset (перезапуск, flask serve) строки файла сохраняются
+            for restart in (init_db, upgrade_db):
+                with app.app_context():
+                    restart()
+                    self.assertEqual(get_db().execute('SELECT COUNT(*) FROM accounts').fetchone()[0], 3)
+            close_pool(FileConfig.DATABASE)
+
+    def test_memory_database_reset(self):
+        app = create_app(config_class=TestConfig)
+        with app.app_context():
+            init_db(fill_test_data=True)
+            ids = [row[0] for row in get_db().execute('SELECT id FROM accounts ORDER BY id')]
+            get_db().execute("DELETE FROM accounts")
+            get_db().commit()
+        with app.app_context():
+            init_db(fill_test_data=True)
+            self.assertEqual([row[0] for row in get_db().execute('SELECT id FROM accounts ORDER BY id')], ids)
+            init_db()
+            self.assertEqual(get_db().execute('SELECT COUNT(*) FROM accounts').fetchone()[0], 0)
+
+    def test_locked_table_retried(self):
+        app = create_app(config_class=TestConfig)
+        with app.app_context():
+            init_db()
+        pool = get_pool(app)
+        writer, other = pool.acquire(), pool.acquire()
+        try:
+            # Незавершённая транзакция держит блокировку таблицы до COMMIT
+            writer.execute("INSERT INTO transactions (id, date, amount, currency, account_id, status) "
+                           "VALUES ('tx-lock-1', '2025-01-01', 1, 'RUB', 'acc', 'SUCCESS')")
+            threading.Timer(0.05, writer.commit).start()
+            other.execute("INSERT INTO transactions (id, date, amount, currency, account_id, status) "
+                          "VALUES ('tx-lock-2', '2025-01-01', 1, 'RUB', 'acc', 'SUCCESS')")
+            other.commit()
+            self.assertEqual(other.execute("SELECT COUNT(*) FROM transactions WHERE id LIKE 'tx-lock-%'")
+                             .fetchone()[0], 2)
+        finally:
+            pool.release(writer)
+            pool.release(other)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+from app import create_app
+from app.config import TestConfig
+from app.db import init_db, get_db, fill_synthetic_db
+
+HEADERS = {"Authorization": "Bearer mock-token-123"}
+
+# (таблица, URL создания, URL записи, тело POST)
+ENTITIES = [
+    ("accounts", '/accounts-v1.3.3/', '/accounts-v1.3.3/',
+     {"balance": 10, "currency": "RUB", "owner": "Иван", "status": "active"}),
+    ("accounts", '/accounts-le-v2.0.0/', '/accounts-le-v2.0.0/',
+     {"balance": 10, "currency": "RUB", "company": "ООО Ромашка", "status": "active"}),
+    ("payments", '/payments-v1.3.1/', '/payments-v1.3.1/',
+     {"amount": 100, "currency": "RUB", "recipient": "Иван", "account_id": "cnt-acc"}),
+    ("payments", '/pm-211fz-v1.3.1/', '/pm-211fz-v1.3.1/',
+     {"amount": 1000, "currency": "RUB", "recipient": "budget-acc-1", "purpose": "Оплата налогов",
+      "budget_code": "18210102010011000110", "account_id": "cnt-acc"}),
+    ("consents", '/consent-pe-v2.0.0/', '/consent-pe-v2.0.0/',
+     {"tpp_id": "tpp1", "permissions": ["read"], "subject": "cnt", "scope": "accounts", "account_id": "cnt-acc"}),
+    ("consents", '/consent-le-v2.0.0/', '/consent-le-v2.0.0/',
+     {"tpp_id": "tpp1", "permissions": ["read"], "subject": "cnt", "scope": "accounts", "account_id": "cnt-acc"}),
+    ("bank_docs", '/bank-doc-v1.0.1/', '/bank-doc-v1.0.1/',
+     {"type": "STATEMENT", "content": "dGVzdA==", "signature": "sig", "account_id": "cnt-acc"}),
+    ("insurance_docs", '/insurance-doc-v1.0.1/', '/insurance-doc-v1.0.1/',
+     {"type": "POLICY", "content": "dGVzdA==", "policy_number": "CNT-1", "valid_until": "2030-12-31"}),
+    ("vrps", '/vrp-v1.3.1/', '/vrp-v1.3.1/',
+     {"max_amount": 5000, "frequency": "MONTHLY", "valid_until": "2030-01-01",
+      "recipient_account": "RU0012345678"}),
+    ("medical_insured", '/medical-insured-person-v3.0.3/', '/medical-insured-person-v3.0.3/',
+     {"name": "Иван Иванов", "policy_number": "CNT-POL-1", "birth_date": "1990-01-01"}),
+    ("product_agreements", '/product-agreement-consents-v1.0.1/', '/product-agreement-consents-v1.0.1/',
+     {"product_type": "LOAN", "terms": {"rate": 0.15}, "account_id": "cnt-acc"}),
+]
+
+
+class TestEntityCounts(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app(TestConfig)
+        with cls.app.app_context():
+            init_db(fill_test_data=True)
+
+    def setUp(self):
+        self.client = self.app.test_client()
+
+    def metrics(self):
+        return self.client.get('/metrics').get_json()
+
+    def assert_counts_match_tables(self):
+        data = self.metrics()
+        with self.app.app_context():
+            db = get_db()
+            for table, count in data["entities"].items():
+                self.assertEqual(count, db.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0], table)
+            for key, acc_type in (("physical", "physical_entity"), ("legal", "legal_entity")):
+                actual = db.execute('SELECT COUNT(*) FROM accounts WHERE type = ?', (acc_type,)).fetchone()[0]
+                self.assertEqual(data["accounts"][key], actual)
+        return data
+
+    def test_post_and_delete_in_every_blueprint(self):
+        self.assert_counts_match_tables()
+        for table, create_url, item_url, payload in ENTITIES:
+            with self.subTest(url=create_url):
+                before = self.metrics()["entities"][table]
+
+                response = self.client.post(create_url, json=payload, headers=HEADERS)
+                self.assertEqual(response.status_code, 201, response.get_data(as_text=True))
+                entity_id = response.get_json()["id"]
+                self.assertEqual(self.assert_counts_match_tables()["entities"][table], before + 1)
+
+                response = self.client.delete(item_url + entity_id, headers=HEADERS)
+                self.assertIn(response.status_code, (200, 204))
+                self.assertEqual(self.assert_counts_match_tables()["entities"][table], before)
+
+    def test_batch_inserts(self):
+        before = self.metrics()["transactions_total"]
+        transactions = [
+            {"date": "2025-01-01T10:00:00", "amount": i + 1, "currency": "RUB",
+             "account_id": "cnt-acc", "status": "SUCCESS"}
+            for i in range(5)
+        ]
+        response = self.client.post('/transaction-history-v1.0.0/batch', json=transactions, headers=HEADERS)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.assert_counts_match_tables()["transactions_total"], before + 5)
+
+    def test_account_type_change(self):
+        with self.app.app_context():
+            db = get_db()
+            account_id = db.execute('SELECT id FROM accounts WHERE type = ?', ("physical_entity",)).fetchone()[0]
+            db.execute('UPDATE accounts SET type = ? WHERE id = ?', ("legal_entity", account_id))
+            db.commit()
+        self.assert_counts_match_tables()
+
+    def test_synthetic_fill_recounts(self):
+        with self.app.app_context():
+            triggers = get_db().execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger'").fetchone()[0]
+            fill_synthetic_db(20, seed=1)
+            self.assertEqual(
+                get_db().execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger'").fetchone()[0],
+                triggers
+            )
+        self.assert_counts_match_tables()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from unittest import mock
+from app import create_app
+from app.config import TestConfig
+from app.db import init_db
+
+HEADERS = {"Authorization": "Bearer mock-token-123"}
+CONSENT = {
+    "tpp_id": "tpp1", "permissions": ["read"], "account_id": "etag-acc",
+    "subject": "subject", "scope": "accounts"
+}
+
+
+class TestConditionalGet(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Инициализация тестовой среды"""
+        cls.app = create_app(config_class=TestConfig)
+        with cls.app.app_context():
+            init_db()
+
+    def setUp(self):
+        self.client = self.app.test_client()
+        response = self.client.post('/consent-pe-v2.0.0/', json=CONSENT, headers=HEADERS)
+        self.url = f'/consent-pe-v2.0.0/{response.get_json()["id"]}'
+
+    def test_not_modified_skips_serialization(self):
+        etag = self.client.get(self.url, headers=HEADERS).headers['ETag']
+        with mock.patch('app.routes.consents.serialize_consent') as serialize:
+            response = self.client.get(self.url, headers={**HEADERS, "If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+        self.assertIn('X-Request-ID', response.headers)
+        serialize.assert_not_called()
+
+    def test_etag_changes_after_update(self):
+        etag = self.client.get(self.url, headers=HEADERS).headers['ETag']
+        self.client.put(self.url, json={**CONSENT, "status": "REVOKED"}, headers=HEADERS)
+        response = self.client.get(self.url, headers={**HEADERS, "If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["status"], "REVOKED")
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_list_endpoint(self):
+        url = '/accounts-v1.3.3/'
+        etag = self.client.get(url, headers=HEADERS).headers['ETag']
+        response = self.client.get(url, headers={**HEADERS, "If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+
+if __name__ == '__main__':
+    unittest.main()
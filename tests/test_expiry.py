@@ -0,0 +1,148 @@
+import time
+import unittest
+from datetime import datetime
+from unittest import mock
+from app import create_app
+from app.config import TestConfig
+from app.db import init_db, get_pool, get_storage
+from app.expiry import ExpirySweeper, get_sweeper
+from app.statements import STATEMENTS
+
+HEADERS = {"Authorization": "Bearer mock-token-123"}
+NOW = datetime(2025, 6, 1, 12, 0, 0)
+CONSENT = {"tpp_id": "tpp-exp", "permissions": ["accounts:read"], "account_id": "exp-acc",
+           "subject": "Истечение", "scope": "accounts"}
+
+
+def vrp_row(vrp_id, valid_until, status="ACTIVE"):
+    return vrp_id, status, 1000, "MONTHLY", valid_until, "RU0012345678"
+
+
+class ExpiryTests:
+    config_class = TestConfig
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app(cls.config_class)
+
+    def setUp(self):
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            init_db(fill_test_data=True)
+            get_storage().write_many(STATEMENTS["vrps"]["insert"], [
+                vrp_row("vrp-due-1", "2025-01-01"),
+                vrp_row("vrp-due-2", "2025-05-31"),
+                vrp_row("vrp-today", "2025-06-01"),
+                vrp_row("vrp-paused", "2025-01-01", status="PAUSED"),
+            ])
+
+    def vrp_ids(self, query=''):
+        response = self.client.get(f'/vrp-v1.3.1/{query}', headers=HEADERS)
+        self.assertEqual(response.status_code, 200)
+        return {vrp["id"] for vrp in response.get_json()["vrps"]}
+
+    # Проверки разрешений смотрят на valid_until на минуту раньше прохода
+    @mock.patch('app.routes.consents.grants_cutoff', return_value="2025-06-01T11:59:00")
+    def test_sweep_expires_due_rows(self, _):
+        due = self.client.post('/consent-pe-v2.0.0/', json={**CONSENT, "valid_until": "2025-06-01T11:59:59"},
+                               headers=HEADERS).get_json()
+        later = self.client.post('/consent-pe-v2.0.0/', json={**CONSENT, "valid_until": "2025-06-01T12:00:01"},
+                                 headers=HEADERS).get_json()
+        self.client.post('/consent-pe-v2.0.0/', json=CONSENT, headers=HEADERS)
+        # Строки уже в кэшах: проход должен их сбросить
+        self.assertEqual(self.client.get('/vrp-v1.3.1/vrp-due-1', headers=HEADERS).get_json()["status"], "ACTIVE")
+        check = '/consent-pe-v2.0.0/check?tpp_id=tpp-exp&account_id=exp-acc&permission=accounts:read'
+        self.assertEqual(self.client.get(check, headers=HEADERS).get_json()["consent_id"], due["id"])
+
+        self.assertEqual(get_sweeper(self.app).sweep(NOW), {"consents": 1, "vrps": 2})
+        self.assertEqual(self.client.get(f'/consent-pe-v2.0.0/{due["id"]}', headers=HEADERS).get_json()["status"],
+                         "EXPIRED")
+        self.assertEqual(self.client.get('/vrp-v1.3.1/vrp-due-1', headers=HEADERS).get_json()["status"], "EXPIRED")
+        self.assertEqual(self.client.get('/vrp-v1.3.1/vrp-today', headers=HEADERS).get_json()["status"], "ACTIVE")
+        self.assertEqual(self.client.get('/vrp-v1.3.1/vrp-paused', headers=HEADERS).get_json()["status"], "PAUSED")
+        self.assertEqual(self.client.get(check, headers=HEADERS).get_json()["consent_id"], later["id"])
+        # Повторный проход ничего не находит
+        self.assertEqual(get_sweeper(self.app).sweep(NOW), {"consents": 0, "vrps": 0})
+
+    def test_sweep_in_batches(self):
+        with self.app.app_context():
+            get_storage().write_many(STATEMENTS["vrps"]["insert"],
+                                     [vrp_row(f"vrp-batch-{i}", f"2025-02-{i + 1:02d}") for i in range(7)])
+        sweeper = ExpirySweeper(self.app, interval=0, batch_size=3)
+        self.assertEqual(sweeper.sweep(NOW)["vrps"], 9)
+        stats = sweeper.stats()
+        self.assertEqual(stats["runs"], 1)
+        self.assertEqual(stats["expired"]["vrps"], 9)
+        self.assertEqual(stats["last_run_at"], "2025-06-01T12:00:00")
+
+    def test_vrp_list_filters_by_status(self):
+        self.assertTrue({"vrp-due-1", "vrp-due-2"} <= self.vrp_ids())
+        get_sweeper(self.app).sweep(NOW)
+        current = self.vrp_ids()
+        self.assertNotIn("vrp-due-1", current)
+        self.assertIn("vrp-paused", current)
+        self.assertIn("vrp-today", current)
+        self.assertEqual(self.vrp_ids('?status=ACTIVE&page=1') & {"vrp-paused", "vrp-due-1"}, set())
+        self.assertEqual(self.vrp_ids('?status=EXPIRED'), {"vrp-due-1", "vrp-due-2"})
+        self.assertEqual(self.vrp_ids('?status=PAUSED&page=1'), {"vrp-paused"})
+        self.assertTrue({"vrp-due-1", "vrp-paused", "vrp-today"} <= self.vrp_ids('?status=all'))
+
+        first = self.client.get('/vrp-v1.3.1/?status=EXPIRED&page_size=1', headers=HEADERS).get_json()
+        cursor = first["pagination"]["next_cursor"]
+        second = self.client.get(f'/vrp-v1.3.1/?status=EXPIRED&page_size=1&cursor={cursor}', headers=HEADERS)
+        self.assertEqual([vrp["id"] for vrp in first["vrps"] + second.get_json()["vrps"]], ["vrp-due-2", "vrp-due-1"])
+
+        self.assertEqual(self.client.get('/vrp-v1.3.1/?status=DONE', headers=HEADERS).status_code, 400)
+
+    def test_background_sweep_and_metrics(self):
+        sweeper = ExpirySweeper(self.app, interval=0.01)
+        sweeper.start()
+        deadline = time.monotonic() + 5
+        while sweeper.runs < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        sweeper.stop()
+        self.assertGreaterEqual(sweeper.runs, 2)
+        self.assertFalse(sweeper.stats()["running"])
+        self.assertEqual(self.client.get('/vrp-v1.3.1/vrp-due-1', headers=HEADERS).get_json()["status"], "EXPIRED")
+
+        get_sweeper(self.app).sweep(NOW)
+        metrics = self.client.get('/metrics', headers=HEADERS).get_json()["expiry"]
+        self.assertGreaterEqual(metrics["runs"], 1)
+        self.assertFalse(metrics["running"])
+        prometheus = self.client.get('/metrics?format=prometheus', headers=HEADERS).get_data(as_text=True)
+        self.assertIn('expiry_sweep_last_run_seconds', prometheus)
+        self.assertIn('expired_total{table="vrps"}', prometheus)
+
+
+class TestExpiry(ExpiryTests, unittest.TestCase):
+
+    def query_plan(self, query, args):
+        pool = get_pool(self.app)
+        conn = pool.acquire()
+        try:
+            return " ".join(row[-1] for row in conn.execute(f'EXPLAIN QUERY PLAN {query}', args))
+        finally:
+            pool.release(conn)
+
+    def test_queries_use_status_indexes(self):
+        for table in ("vrps", "consents"):
+            plan = self.query_plan(STATEMENTS[table]["due_for_expiry"], ("ACTIVE", "2025-06-01", 10))
+            self.assertIn(f"idx_{table}_status_valid_until", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+        plan = self.query_plan(STATEMENTS["vrps"]["list_by_status_after"], ("ACTIVE", "2025-06-01", "x", 10))
+        self.assertIn("idx_vrps_status_valid_until", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+        plan = self.query_plan(STATEMENTS["vrps"]["list_current_after"], ("EXPIRED", "2025-06-01", "x", 10))
+        self.assertNotIn("TEMP B-TREE", plan)
+
+
+class MemoryConfig(TestConfig):
+    STORAGE_BACKEND = "memory"
+
+
+class TestMemoryExpiry(ExpiryTests, unittest.TestCase):
+    config_class = MemoryConfig
+
+
+if __name__ == '__main__':
+    unittest.main()
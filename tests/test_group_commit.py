@@ -0,0 +1,91 @@
+import sqlite3
+import threading
+import unittest
+from app import create_app
+from app.config import TestConfig
+from app.db import init_db, get_writer, close_pool
+from app.statements import STATEMENTS
+
+HEADERS = {"Authorization": "Bearer mock-token-123"}
+PAYMENT = {"amount": 10, "currency": "RUB", "recipient": "Пакет", "account_id": "gc-acc"}
+
+
+class GroupCommitConfig(TestConfig):
+    WRITE_MODE = "group_commit"
+    GROUP_COMMIT_MAX_DELAY_MS = 20.0
+    GROUP_COMMIT_MAX_BATCH = 8
+
+
+class TestGroupCommit(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app(GroupCommitConfig)
+        with cls.app.app_context():
+            init_db()
+
+    def test_concurrent_posts_share_commits(self):
+        writer = get_writer(self.app)
+        before = writer.stats()
+        ids, errors = [], []
+
+        def post():
+            response = self.app.test_client().post('/payments-v1.3.1/', json=PAYMENT, headers=HEADERS)
+            (ids if response.status_code == 201 else errors).append(response.get_json().get("id"))
+
+        threads = [threading.Thread(target=post) for _ in range(24)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(set(ids)), 24)
+        stats = writer.stats()
+        self.assertEqual(stats["writes"] - before["writes"], 24)
+        self.assertLess(stats["batches"] - before["batches"], 24)
+        self.assertLessEqual(stats["largest_batch"], GroupCommitConfig.GROUP_COMMIT_MAX_BATCH)
+        # Ответ отдан после COMMIT: запись сразу читается через пул
+        client = self.app.test_client()
+        for payment_id in ids:
+            self.assertEqual(client.get(f'/payments-v1.3.1/{payment_id}', headers=HEADERS).status_code, 200)
+
+    def test_failed_write_isolated_in_batch(self):
+        writer = get_writer(self.app)
+        insert = STATEMENTS["payments"]["insert"]
+        row = ('gc-dup', 'PENDING', '2025-01-01T00:00:00', 1, 'RUB', 'x', 'gc-acc')
+        writer.submit("execute", insert, row)
+        outcomes = {}
+
+        def submit(key, args):
+            try:
+                outcomes[key] = writer.submit("execute", insert, args).rowcount
+            except sqlite3.IntegrityError:
+                outcomes[key] = "duplicate"
+
+        threads = [
+            threading.Thread(target=submit, args=("dup", row)),
+            threading.Thread(target=submit, args=("new", ('gc-new',) + row[1:])),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(outcomes, {"dup": "duplicate", "new": 1})
+        self.assertEqual(self.app.test_client().get('/payments-v1.3.1/gc-new', headers=HEADERS).status_code, 200)
+
+    def test_metrics_and_close(self):
+        self.app.test_client().post('/payments-v1.3.1/', json=PAYMENT, headers=HEADERS)
+        metrics = self.app.test_client().get('/metrics', headers=HEADERS).get_json()
+        self.assertGreater(metrics["db_pool"]["group_commit"]["writes"], 0)
+
+        # close_pool останавливает писателя; следующая запись запускает нового
+        writer = get_writer(self.app)
+        close_pool(GroupCommitConfig.DATABASE)
+        self.assertIsNot(get_writer(self.app), writer)
+        response = self.app.test_client().post('/payments-v1.3.1/', json=PAYMENT, headers=HEADERS)
+        self.assertEqual(response.status_code, 201)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import hashlib
+import sqlite3
+import unittest
+from unittest import mock
+from app import create_app
+from app.config import TestConfig
+from app.db import init_db
+from app.idempotency import get_idempotency_store
+from app.statements import STATEMENTS
+
+HEADERS = {"Authorization": "Bearer mock-token-123"}
+PAYMENT = {"amount": 10, "currency": "RUB", "recipient": "Повтор", "account_id": "idem-acc"}
+PM_211FZ = {"amount": 1000, "currency": "RUB", "recipient": "budget-acc-1", "purpose": "Оплата налогов",
+            "budget_code": "18210102010011000110", "account_id": "idem-acc"}
+CONSENT = {"tpp_id": "tpp-idem", "permissions": ["read"], "account_id": "idem-acc", "subject": "Повтор", "scope": "accounts"}
+
+
+def with_key(key, **headers):
+    return {**HEADERS, "Idempotency-Key": key, **headers}
+
+
+class TestIdempotency(unittest.TestCase):
+    config_class = TestConfig
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app(cls.config_class)
+        with cls.app.app_context():
+            init_db(fill_test_data=True)
+
+    def setUp(self):
+        self.client = self.app.test_client()
+
+    def payment_count(self):
+        return self.client.get('/metrics', headers=HEADERS).get_json()["entities"]["payments"]
+
+    def test_retry_replays_response(self):
+        for url, payload in (('/payments-v1.3.1/', PAYMENT), ('/pm-211fz-v1.3.1/', PM_211FZ)):
+            with self.subTest(url=url):
+                before = self.payment_count()
+                first = self.client.post(url, json=payload, headers=with_key(f"retry-{url}"))
+                self.assertEqual(first.status_code, 201)
+                self.assertNotIn('Idempotent-Replayed', first.headers)
+
+                retry = self.client.post(url, json=payload, headers=with_key(f"retry-{url}", **{"X-Request-ID": "r-2"}))
+                self.assertEqual(retry.status_code, 201)
+                self.assertEqual(retry.headers['Idempotent-Replayed'], 'true')
+                self.assertEqual(retry.headers['X-Request-ID'], 'r-2')
+                self.assertEqual(retry.headers['Authorization'], HEADERS["Authorization"])
+                self.assertEqual(retry.get_json(), first.get_json())
+                self.assertEqual(self.payment_count(), before + 1)
+
+    def test_key_scoped_by_path_and_client(self):
+        first = self.client.post('/consent-pe-v2.0.0/', json=CONSENT,
+                                 headers=with_key("scoped"))
+        other_path = self.client.post('/consent-le-v2.0.0/', json=CONSENT,
+                                      headers=with_key("scoped"))
+        other_client = self.client.post('/consent-pe-v2.0.0/', json=CONSENT,
+                                        headers={"Authorization": "Bearer other", "Idempotency-Key": "scoped"})
+        ids = {response.get_json()["id"] for response in (first, other_path, other_client)}
+        self.assertEqual(len(ids), 3)
+
+    def test_conflicts(self):
+        self.client.post('/payments-v1.3.1/', json=PAYMENT, headers=with_key("conflict"))
+        response = self.client.post('/payments-v1.3.1/', json={**PAYMENT, "amount": 11}, headers=with_key("conflict"))
+        self.assertEqual(response.status_code, 422)
+
+        # Первый запрос с ключом ещё выполняется
+        store = get_idempotency_store(self.app)
+        with self.app.test_request_context('/payments-v1.3.1/', method='POST', json=PAYMENT) as ctx:
+            scope = store.scope_key(HEADERS["Authorization"], '/payments-v1.3.1/', "busy")
+            fingerprint = hashlib.blake2b(ctx.request.get_data(), digest_size=16).hexdigest()
+            self.assertEqual(store.begin(scope, fingerprint)[0], "new")
+        response = self.client.post('/payments-v1.3.1/', json=PAYMENT, headers=with_key("busy"))
+        self.assertEqual(response.status_code, 409)
+        store.release(scope)
+        self.assertEqual(self.client.post('/payments-v1.3.1/', json=PAYMENT, headers=with_key("busy")).status_code, 201)
+
+        self.assertEqual(self.client.post('/payments-v1.3.1/', json=PAYMENT,
+                                          headers=with_key("x" * 300)).status_code, 400)
+
+    def test_unauthorized_not_stored(self):
+        entries = get_idempotency_store(self.app).stats()["entries"]
+        for _ in range(2):
+            response = self.client.post('/payments-v1.3.1/', json=PAYMENT, headers={"Idempotency-Key": "no-auth"})
+            self.assertEqual(response.status_code, 401)
+            self.assertNotIn('Idempotent-Replayed', response.headers)
+        self.assertEqual(get_idempotency_store(self.app).stats()["entries"], entries)
+
+    def test_client_errors_replayed(self):
+        invalid = {**PAYMENT, "amount": -1}
+        first = self.client.post('/payments-v1.3.1/', json=invalid, headers=with_key("invalid"))
+        self.assertEqual(first.status_code, 400)
+        retry = self.client.post('/payments-v1.3.1/', json=invalid, headers=with_key("invalid"))
+        self.assertEqual(retry.status_code, 400)
+        self.assertEqual(retry.headers['Idempotent-Replayed'], 'true')
+
+    def test_without_key_and_metrics(self):
+        first = self.client.post('/payments-v1.3.1/', json=PAYMENT, headers=HEADERS)
+        second = self.client.post('/payments-v1.3.1/', json=PAYMENT, headers=HEADERS)
+        self.assertNotEqual(first.get_json()["id"], second.get_json()["id"])
+        stats = self.client.get('/metrics', headers=HEADERS).get_json()["idempotency"]
+        self.assertGreater(stats["entries"], 0)
+        self.assertEqual(stats["in_flight"], 0)
+
+
+class PersistConfig(TestConfig):
+    IDEMPOTENCY_PERSIST = True
+
+
+class TestPersistedIdempotency(TestIdempotency):
+    config_class = PersistConfig
+
+    def test_replay_after_memory_eviction(self):
+        first = self.client.post('/payments-v1.3.1/', json=PAYMENT, headers=with_key("persisted"))
+        # Другой воркер / перезапуск: в памяти ответа нет, он читается из idempotency_keys
+        get_idempotency_store(self.app).clear()
+        retry = self.client.post('/payments-v1.3.1/', json=PAYMENT, headers=with_key("persisted"))
+        self.assertEqual(retry.headers['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.get_json(), first.get_json())
+
+    def test_persist_failure_releases_key(self):
+        broken = {"insert": "INSERT INTO missing_idempotency_keys VALUES (?, ?, ?, ?, ?, ?)"}
+        with mock.patch.dict(STATEMENTS["idempotency"], broken):
+            with self.assertRaises(sqlite3.OperationalError):
+                self.client.post('/payments-v1.3.1/', json=PAYMENT, headers=with_key("persist-failed"))
+        self.assertEqual(get_idempotency_store(self.app).stats()["in_flight"], 0)
+        retry = self.client.post('/payments-v1.3.1/', json=PAYMENT, headers=with_key("persist-failed"))
+        self.assertEqual(retry.status_code, 201)
+
+
+if __name__ == '__main__':
+    unittest.main()
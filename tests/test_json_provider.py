@@ -0,0 +1,38 @@
+import sqlite3
+import unittest
+from datetime import datetime
+from flask.json.provider import DefaultJSONProvider
+from app import create_app
+from app.config import TestConfig
+from app.utils import serialize_rows
+
+
+class TestFastJSONProvider(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app(config_class=TestConfig)
+        self.default = DefaultJSONProvider(self.app)
+
+    def test_same_output_as_default(self):
+        data = {"b": [1, 2.5, None], "a": "Иван", "when": datetime(2025, 1, 1, 10, 0)}
+        for fast in (True, False):
+            self.app.json.fast = fast and self.app.json.fast
+            self.assertEqual(self.app.json.loads(self.app.json.dumps(data)),
+                             self.default.loads(self.default.dumps(data)))
+
+    def test_response(self):
+        with self.app.app_context():
+            response = self.app.json.response({"b": 1, "a": "Иван"})
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertEqual(response.get_json(), {"a": "Иван", "b": 1})
+
+    def test_serialize_rows(self):
+        db = sqlite3.connect(':memory:')
+        db.row_factory = sqlite3.Row
+        rows = db.execute("SELECT 1 AS id, 'RUB' AS currency UNION ALL SELECT 2, 'USD'").fetchall()
+        self.assertEqual(serialize_rows(rows), [dict(row) for row in rows])
+        self.assertEqual(serialize_rows([]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
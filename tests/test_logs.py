@@ -0,0 +1,95 @@
+import json
+import logging
+import os
+import queue
+import tempfile
+import unittest
+from app import create_app
+from app.config import TestConfig
+from app.db import init_db
+from app.logs import DroppingQueueHandler, shutdown
+
+HEADERS = {"Authorization": "Bearer mock-token-123", "X-Request-ID": "log-test-1"}
+
+
+def make_app(**overrides):
+    config = type('LogTestConfig', (TestConfig,), overrides)
+    app = create_app(config)
+    with app.app_context():
+        init_db()
+    return app
+
+
+def read_records(path):
+    shutdown()  # дописывает очередь в файл
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class TestQueueLogging(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.log_file = tempfile.mkstemp(suffix='.log')
+        os.close(fd)
+
+    def tearDown(self):
+        shutdown()
+        os.remove(self.log_file)
+
+    def test_json_records_with_request_id_and_latency(self):
+        app = make_app(LOG_FILE=self.log_file)
+        app.test_client().get('/accounts-v1.3.3/', headers=HEADERS)
+        records = read_records(self.log_file)
+
+        access = [r for r in records if r["logger"] == "app.access"]
+        self.assertEqual(len(access), 1)
+        self.assertEqual(access[0]["request_id"], "log-test-1")
+        self.assertEqual(access[0]["status"], 200)
+        self.assertEqual(access[0]["endpoint"], "accounts.physical_accounts")
+        self.assertGreater(access[0]["latency_ms"], 0)
+
+        calls = [r for r in records if r["message"].startswith("Call physical_accounts")]
+        self.assertEqual(calls[0]["request_id"], "log-test-1")
+
+    def test_info_sampling_keeps_warnings(self):
+        app = make_app(LOG_FILE=self.log_file, LOG_INFO_SAMPLE_RATE=0.0)
+        client = app.test_client()
+        for _ in range(5):
+            client.get('/accounts-v1.3.3/', headers=HEADERS)
+        client.get('/no-such-route')
+        records = read_records(self.log_file)
+
+        self.assertFalse([r for r in records if r["logger"] == "app.access"])
+        self.assertFalse([r for r in records if r["message"].startswith("Call ")])
+        self.assertTrue([r for r in records if r["level"] == "WARNING" and "404" in r["message"]])
+
+    def test_exception_text(self):
+        make_app(LOG_FILE=self.log_file)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logging.getLogger("tests").exception("failed")
+        record = read_records(self.log_file)[-1]
+        self.assertEqual(record["level"], "ERROR")
+        self.assertIn("ValueError: boom", record["exception"])
+
+
+class TestDroppingQueueHandler(unittest.TestCase):
+
+    def test_full_queue_drops(self):
+        handler = DroppingQueueHandler(queue.Queue(2))
+        logger = logging.getLogger("tests.dropping")
+        logger.propagate = False
+        logger.addHandler(handler)
+        try:
+            for i in range(5):
+                logger.warning("record %s", i)
+        finally:
+            logger.removeHandler(handler)
+        self.assertEqual(handler.queue.qsize(), 2)
+        self.assertEqual(handler.dropped, 3)
+        self.assertEqual(handler.queue.get().msg, "record 0")
+
+
+if __name__ == '__main__':
+    unittest.main()
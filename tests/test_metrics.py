@@ -0,0 +1,87 @@
+import threading
+import unittest
+from app import create_app
+from app.config import TestConfig
+from app.db import init_db
+from app.metrics import RequestMetrics, add_db_time
+
+HEADERS = {"Authorization": "Bearer mock-token-123"}
+PROMETHEUS_ACCEPT = "application/openmetrics-text;version=1.0.0,text/plain;version=0.0.4;q=0.5,*/*;q=0.1"
+
+
+class TestRequestMetrics(unittest.TestCase):
+
+    def test_histogram_and_threads(self):
+        metrics = RequestMetrics(buckets=(0.1, 1.0))
+
+        def worker():
+            for _ in range(100):
+                metrics.start()
+                add_db_time(0.5)
+                metrics.finish("ep", "GET", 200)
+                metrics.done()
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        collected = metrics.collect()
+        self.assertEqual(collected["requests"][("ep", "GET", 200)], 400)
+        self.assertEqual(sum(collected["latency"][("ep", "GET")][:-1]), 400)
+        self.assertAlmostEqual(collected["db_seconds"][("ep", "GET")], 200.0)
+        self.assertEqual(collected["in_flight"], 0)
+
+    def test_finish_without_start_is_ignored(self):
+        metrics = RequestMetrics(buckets=(0.1,))
+        thread = threading.Thread(target=lambda: (metrics.finish("ep", "GET", 200), metrics.done()))
+        thread.start()
+        thread.join()
+        self.assertEqual(metrics.summary()["requests_total"], 0)
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app(TestConfig)
+        with cls.app.app_context():
+            init_db(fill_test_data=True)
+
+    def setUp(self):
+        self.client = self.app.test_client()
+
+    def test_requests_total_counts_requests(self):
+        before = self.client.get('/metrics').get_json()["requests_total"]
+        self.client.get('/accounts-v1.3.3/', headers=HEADERS)
+        self.client.get('/accounts-v1.3.3/', headers=HEADERS)
+        self.client.get('/no-such-route')
+        data = self.client.get('/metrics').get_json()
+        # +1 за предыдущий /metrics
+        self.assertEqual(data["requests_total"], before + 4)
+        self.assertIn("transactions_total", data)
+
+        stats = data["endpoints"]["accounts.physical_accounts"]["GET"]
+        self.assertGreaterEqual(stats["statuses"]["200"], 2)
+        self.assertGreater(stats["db_seconds"], 0)
+        self.assertGreater(stats["serialization_seconds"], 0)
+        self.assertIn("404", data["endpoints"]["unmatched"]["GET"]["statuses"])
+
+    def test_prometheus_format(self):
+        self.client.get('/accounts-v1.3.3/', headers=HEADERS)
+        response = self.client.get('/metrics', headers={"Accept": PROMETHEUS_ACCEPT})
+        self.assertTrue(response.content_type.startswith("text/plain; version=0.0.4"))
+        body = response.get_data(as_text=True)
+        self.assertIn("# TYPE http_request_duration_seconds histogram", body)
+        self.assertIn('http_request_duration_seconds_bucket{endpoint="accounts.physical_accounts",'
+                      'method="GET",le="+Inf"}', body)
+        self.assertIn('http_requests_total{endpoint="accounts.physical_accounts",method="GET",status="200"}', body)
+        self.assertIn("http_requests_in_flight 1", body)
+
+        self.assertEqual(self.client.get('/metrics?format=prometheus').get_data(as_text=True)[:6], "# HELP")
+        self.assertTrue(self.client.get('/metrics').is_json)
+
+
+if __name__ == '__main__':
+    unittest.main()
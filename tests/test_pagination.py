@@ -0,0 +1,84 @@
+import base64
+import unittest
+from app import create_app
+from app.config import TestConfig
+from app.db import init_db, get_db
+from app.statements import STATEMENTS
+
+HEADERS = {"Authorization": "Bearer mock-token-123"}
+
+
+class TestKeysetPagination(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Инициализация тестовой среды"""
+        cls.app = create_app(config_class=TestConfig)
+        with cls.app.app_context():
+            init_db()
+        # Две транзакции с одинаковой датой проверяют разрешение ничьей по id
+        transactions = [
+            {"id": f"page-tx-{i}", "date": f"2025-01-{i // 2 + 1:02d}T10:00:00", "amount": i,
+             "currency": "RUB", "account_id": "acc", "status": "SUCCESS"}
+            for i in range(7)
+        ]
+        client = cls.app.test_client()
+        response = client.post('/transaction-history-v1.0.0/batch', json=transactions, headers=HEADERS)
+        assert response.status_code == 201
+
+    def setUp(self):
+        self.client = self.app.test_client()
+
+    def test_cursor_walk_matches_offset_order(self):
+        url = '/transaction-history-v1.0.0/'
+        offset_ids = [tx["id"] for tx in self.client.get(
+            f'{url}?page=1&page_size=100', headers=HEADERS
+        ).get_json()["transactions"]]
+
+        cursor_ids = []
+        query = '?page_size=3'
+        while query:
+            body = self.client.get(url + query, headers=HEADERS).get_json()
+            cursor_ids += [tx["id"] for tx in body["transactions"]]
+            cursor = body["pagination"]["next_cursor"]
+            query = f'?page_size=3&cursor={cursor}' if cursor else None
+
+        self.assertEqual(len(cursor_ids), 7)
+        self.assertEqual(cursor_ids, offset_ids)
+
+    def test_page_mode_kept(self):
+        response = self.client.get('/transaction-history-v1.0.0/?page=2&page_size=3', headers=HEADERS)
+        pagination = response.get_json()["pagination"]
+        self.assertEqual(pagination["page"], 2)
+        self.assertEqual(pagination["next_page"], "?page=3&page_size=3")
+        self.assertIsNotNone(pagination["next_cursor"])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/transaction-history-v1.0.0/?cursor=not-a-cursor', headers=HEADERS)
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/vrp-v1.3.1/?cursor=WzFd', headers=HEADERS)
+        self.assertEqual(response.status_code, 400)
+        # base64 и JSON корректны, но значения не той формы: [{}, "x"], [1, "x"], [null, "x"]
+        for values in ('[{}, "x"]', '[1, "x"]', '[null, "x"]', '[["a"], "x"]'):
+            cursor = base64.urlsafe_b64encode(values.encode()).decode().rstrip('=')
+            for url in ('/transaction-history-v1.0.0/', '/vrp-v1.3.1/'):
+                response = self.client.get(f'{url}?cursor={cursor}', headers=HEADERS)
+                self.assertEqual(response.status_code, 400, (url, values))
+
+    def test_keyset_queries_use_index(self):
+        cases = (
+            ("transactions", ('2025-01-01', 'x', 10), 'idx_transactions_date_id'),
+            ("vrps", ('2030-01-01', 'x', 10), 'idx_vrps_valid_until_id'),
+        )
+        with self.app.app_context():
+            db = get_db()
+            for table, params, index in cases:
+                plan = ' '.join(row[3] for row in db.execute(
+                    f'EXPLAIN QUERY PLAN {STATEMENTS[table]["list_after"]}', params
+                ))
+                self.assertIn(index, plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+
+if __name__ == '__main__':
+    unittest.main()
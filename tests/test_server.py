@@ -0,0 +1,113 @@
+import os
+import unittest
+from unittest import mock
+from app import create_app
+from app.config import TestConfig
+from app.db import init_db, get_pool
+from app.asgi import WORKER_CONFIG_ENV, create_worker_app
+from app.cache import LRUCache, NullCache, get_cache
+from app.server import SERVER_BACKENDS, gunicorn_options, run_uvicorn
+
+
+class TestServeCommand(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app(TestConfig)
+        with cls.app.app_context():
+            init_db()
+
+    def serve(self, *args, env=None):
+        calls = []
+        fake = lambda app, settings: calls.append((app, settings))
+        with mock.patch.dict(SERVER_BACKENDS, {"gunicorn": fake, "waitress": fake}):
+            result = self.app.test_cli_runner().invoke(args=['serve', *args], env=env)
+        self.assertEqual(result.exit_code, 0, result.output)
+        return calls[0]
+
+    def test_options_override_config(self):
+        app, settings = self.serve('--workers', '3', '--keep-alive', '10')
+        self.assertIs(app, self.app)
+        self.assertEqual(settings["workers"], 3)
+        self.assertEqual(settings["keep_alive"], 10)
+        self.assertEqual(settings["threads"], TestConfig.SERVER_THREADS)
+        self.assertEqual(settings["backlog"], TestConfig.SERVER_BACKLOG)
+
+    def test_environment(self):
+        _, settings = self.serve(env={"SERVER_THREADS": "16", "SERVER_BIND": "127.0.0.1:8000"})
+        self.assertEqual(settings["threads"], 16)
+        self.assertEqual(settings["bind"], "127.0.0.1:8000")
+
+    def test_gunicorn_options(self):
+        options = gunicorn_options({"bind": ":5000", "workers": 4, "threads": 8,
+                                    "keep_alive": 5, "backlog": 64, "timeout": 30})
+        self.assertEqual(options["worker_class"], "gthread")
+        self.assertEqual(options["threads"], 8)
+        self.assertTrue(options["preload_app"])
+
+    def test_uvicorn_workers_get_serve_config(self):
+        settings = {"bind": ":5000", "workers": 2, "threads": 3, "keep_alive": 5, "backlog": 64, "timeout": 30}
+        with mock.patch('uvicorn.run') as run, mock.patch.dict(os.environ):
+            run_uvicorn(self.app, settings)
+            target, options = run.call_args.args[0], run.call_args.kwargs
+            self.assertEqual(target, "app.asgi:create_worker_app")
+            self.assertTrue(options["factory"])
+            worker = create_worker_app()
+        self.assertNotIn(WORKER_CONFIG_ENV, os.environ)
+        self.assertEqual(worker.wsgi_app.config['DATABASE'], TestConfig.DATABASE)
+        self.assertEqual(worker.wsgi_app.config['EXPIRY_SWEEP_INTERVAL'], 0)
+        self.assertEqual(worker.executor._max_workers, 3)
+        self.assertIsInstance(get_cache(worker.wsgi_app), NullCache)
+
+    def test_entity_cache_off_with_workers(self):
+        # (аргументы serve, RESPONSE_CACHE_MULTI_WORKER, кэш остаётся)
+        for args, multi_worker, cached in ((('--workers', '1'), False, True),
+                                           (('--workers', '4', '--backend', 'waitress'), False, True),
+                                           (('--workers', '4'), False, False),
+                                           (('--workers', '4'), True, True)):
+            with self.subTest(args=args, multi_worker=multi_worker):
+                app = create_app(type('ServeConfig', (TestConfig,), {"RESPONSE_CACHE_MULTI_WORKER": multi_worker}))
+                calls = []
+                fake = lambda app, settings: calls.append(settings)
+                with mock.patch.dict(SERVER_BACKENDS, {"gunicorn": fake, "waitress": fake}):
+                    result = app.test_cli_runner().invoke(args=['serve', *args])
+                self.assertEqual(result.exit_code, 0, result.output)
+                self.assertIsInstance(get_cache(app), LRUCache if cached else NullCache)
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), "нужен os.fork")
+class TestForkSafety(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app(TestConfig)
+        with cls.app.app_context():
+            init_db(fill_test_data=True)
+
+    def test_child_gets_own_pool(self):
+        with self.app.app_context():
+            parent_pool = get_pool()
+            parent_pool.release(parent_pool.acquire())
+
+            pid = os.fork()
+            if pid == 0:
+                code = 1
+                try:
+                    pool = get_pool()
+                    conn = pool.acquire()
+                    ok = conn.execute('SELECT COUNT(*) FROM accounts').fetchone()[0] > 0
+                    code = 0 if pool is not parent_pool and pool.pid == os.getpid() and ok else 1
+                finally:
+                    os._exit(code)
+
+            _, status = os.waitpid(pid, 0)
+            self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+            # Соединения родителя остались рабочими
+            self.assertIs(get_pool(), parent_pool)
+            conn = parent_pool.acquire()
+            self.assertGreater(conn.execute('SELECT COUNT(*) FROM accounts').fetchone()[0], 0)
+            parent_pool.release(conn)
+
+
+if __name__ == '__main__':
+    unittest.main()
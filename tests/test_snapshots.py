@@ -0,0 +1,112 @@
+import os
+import tempfile
+import unittest
+from app import create_app
+from app.config import TestConfig
+from app.db import init_db, get_pool
+
+HEADERS = {"Authorization": "Bearer mock-token-123"}
+PAYMENTS_URL = '/payments-v1.3.1/'
+PAYMENT = {"amount": 10, "currency": "RUB", "recipient": "Снимок", "account_id": "snap-acc"}
+
+
+class SnapshotTestMixin:
+    config_class = TestConfig
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+
+        class SnapshotConfig(cls.config_class):
+            DB_SNAPSHOT_DIR = os.path.join(cls.tmp.name, 'snapshots')
+
+        cls.app = create_app(SnapshotConfig)
+        with cls.app.app_context():
+            init_db(fill_test_data=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        self.client = self.app.test_client()
+
+    def payment_count(self):
+        # Счётчики ведутся триггерами и восстанавливаются вместе с таблицами
+        return self.client.get('/metrics', headers=HEADERS).get_json()["entities"]["payments"]
+
+    def create_payment(self):
+        response = self.client.post(PAYMENTS_URL, json=PAYMENT, headers=HEADERS)
+        self.assertEqual(response.status_code, 201)
+        return response.get_json()["id"]
+
+    def test_save_and_restore(self):
+        for compression in ("none", "gzip"):
+            with self.subTest(compression=compression):
+                response = self.client.post('/admin/db-snapshots/seed', json={"compression": compression},
+                                            headers=HEADERS)
+                self.assertEqual(response.status_code, 201)
+                self.assertEqual(response.get_json()["compression"], compression)
+                saved = self.payment_count()
+
+                payment_id = self.create_payment()
+                # Строка попадает в кэш сущностей и должна исчезнуть после восстановления
+                self.assertEqual(self.client.get(f'{PAYMENTS_URL}{payment_id}', headers=HEADERS).status_code, 200)
+
+                response = self.client.post('/admin/db-snapshots/seed/restore', headers=HEADERS)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(self.payment_count(), saved)
+                self.assertEqual(self.client.get(f'{PAYMENTS_URL}{payment_id}', headers=HEADERS).status_code, 404)
+
+        # Снимок в прежнем формате заменён новым
+        snapshots = self.client.get('/admin/db-snapshots', headers=HEADERS).get_json()
+        self.assertEqual([s["compression"] for s in snapshots if s["name"] == "seed"], ["gzip"])
+
+    def test_errors(self):
+        self.assertEqual(self.client.post('/admin/db-snapshots/missing/restore', headers=HEADERS).status_code, 404)
+        self.assertEqual(self.client.post('/admin/db-snapshots/..hidden', headers=HEADERS).status_code, 400)
+        self.assertEqual(self.client.post('/admin/db-snapshots/x', json={"compression": "zip"},
+                                          headers=HEADERS).status_code, 400)
+        self.assertEqual(self.client.post('/admin/db-snapshots/x').status_code, 401)
+
+    def test_cli(self):
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=['db-snapshot', 'save', 'cli', '--compression', 'gzip'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        payment_id = self.create_payment()
+        result = runner.invoke(args=['db-snapshot', 'restore', 'cli'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(self.client.get(f'{PAYMENTS_URL}{payment_id}', headers=HEADERS).status_code, 404)
+        self.assertIn('cli\tgzip', runner.invoke(args=['db-snapshot', 'list']).output)
+        self.assertNotEqual(runner.invoke(args=['db-snapshot', 'restore', 'nope']).exit_code, 0)
+
+
+class TestMemoryDatabaseSnapshots(SnapshotTestMixin, unittest.TestCase):
+    pass
+
+
+class FileConfig(TestConfig):
+    DATABASE = os.path.join(tempfile.gettempdir(), 'test_snapshots_live.db')
+
+
+class TestFileDatabaseSnapshots(SnapshotTestMixin, unittest.TestCase):
+    config_class = FileConfig
+
+    @classmethod
+    def setUpClass(cls):
+        if os.path.exists(FileConfig.DATABASE):
+            os.remove(FileConfig.DATABASE)
+        super().setUpClass()
+
+    def test_restore_keeps_pool_connections(self):
+        pool = get_pool(self.app)
+        self.client.post('/admin/db-snapshots/pool', headers=HEADERS)
+        before = pool.stats()["open"]
+        self.create_payment()
+        self.client.post('/admin/db-snapshots/pool/restore', headers=HEADERS)
+        self.assertEqual(pool.stats()["open"], before)
+        self.assertEqual(self.client.get('/health').get_json()["components"]["database"], "connected")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+import os
+import tempfile
+import threading
+import unittest
+from app import create_app
+from app.config import TestConfig
+from app.db import init_db, get_storage
+from app.services.data_service import DataService
+
+HEADERS = {"Authorization": "Bearer mock-token-123"}
+TX_URL = '/transaction-history-v1.0.0/'
+
+
+class MemoryConfig(TestConfig):
+    STORAGE_BACKEND = "memory"
+    DATABASE = os.path.join(tempfile.gettempdir(), 'memory-storage-never-created.db')
+
+
+TRANSACTIONS = [
+    {"id": f"mem-tx-{i}", "date": f"2025-03-{i % 5 + 1:02d}T12:00:00", "amount": 100 * (i + 1),
+     "currency": "RUB", "account_id": f"mem-acc-{i % 3}", "status": "SUCCESS" if i % 4 else "FAILED"}
+    for i in range(12)
+]
+
+
+class TestMemoryStorage(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app(MemoryConfig)
+        cls.sqlite_app = create_app(TestConfig)
+        for app in (cls.app, cls.sqlite_app):
+            with app.app_context():
+                init_db(fill_test_data=True)
+            response = app.test_client().post(f'{TX_URL}batch', json=TRANSACTIONS, headers=HEADERS)
+            assert response.status_code == 201
+
+    def setUp(self):
+        self.client = self.app.test_client()
+
+    def test_sqlite_not_touched(self):
+        self.assertEqual(self.app.extensions['storage'].name, "memory")
+        self.assertFalse(os.path.exists(MemoryConfig.DATABASE))
+
+    def test_account_crud(self):
+        data = {"balance": 1500, "currency": "USD", "owner": "Память", "status": "active"}
+        response = self.client.post('/accounts-v1.3.3/', json=data, headers=HEADERS)
+        self.assertEqual(response.status_code, 201)
+        account = response.get_json()
+        self.assertEqual(account["balance"], 1500.0)
+        self.assertEqual(account["type"], "physical_entity")
+        self.assertTrue(account["created_at"])
+
+        url = f'/accounts-v1.3.3/{account["id"]}'
+        self.assertEqual(self.client.get(url, headers=HEADERS).get_json()["owner"], "Память")
+        # Счёт физ. лица не виден через маршрут юр. лиц (индекс по type)
+        self.assertEqual(self.client.get(f'/accounts-le-v2.0.0/{account["id"]}', headers=HEADERS).status_code, 404)
+
+        response = self.client.put(url, json={**data, "owner": "Обновлён"}, headers=HEADERS)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(url, headers=HEADERS).get_json()["owner"], "Обновлён")
+
+        self.assertEqual(self.client.delete(url, headers=HEADERS).status_code, 204)
+        self.assertEqual(self.client.get(url, headers=HEADERS).status_code, 404)
+
+    def test_same_pages_as_sqlite(self):
+        queries = [
+            '', '?page_size=5', '?page=2&page_size=5', '?account_id=mem-acc-1',
+            '?status=FAILED', '?from=2025-03-02&to=2025-03-03', '?min_amount=300&max_amount=900',
+        ]
+        sqlite_client = self.sqlite_app.test_client()
+        for query in queries:
+            with self.subTest(query=query):
+                expected = sqlite_client.get(TX_URL + query, headers=HEADERS).get_json()
+                actual = self.client.get(TX_URL + query, headers=HEADERS).get_json()
+                self.assertEqual(actual, expected)
+
+        # Переход по курсору
+        cursor = self.client.get(f'{TX_URL}?page_size=4', headers=HEADERS).get_json()["pagination"]["next_cursor"]
+        query = f'?page_size=4&cursor={cursor}'
+        self.assertEqual(self.client.get(TX_URL + query, headers=HEADERS).get_json(),
+                         sqlite_client.get(TX_URL + query, headers=HEADERS).get_json())
+
+    def test_vrp_keyset_pages(self):
+        for day in (3, 1, 4, 2, 5):
+            response = self.client.post('/vrp-v1.3.1/', json={
+                "max_amount": 100 * day, "frequency": "DAILY",
+                "valid_until": f"2031-01-0{day}", "recipient_account": "RU0012345678"
+            }, headers=HEADERS)
+            self.assertEqual(response.status_code, 201)
+
+        seen, cursor = [], None
+        while True:
+            query = f'?page_size=2&cursor={cursor}' if cursor else '?page_size=2'
+            body = self.client.get(f'/vrp-v1.3.1/{query}', headers=HEADERS).get_json()
+            seen += [(vrp["valid_until"], vrp["id"]) for vrp in body["vrps"]]
+            cursor = body["pagination"]["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(seen, sorted(seen, reverse=True))
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual([until for until, _ in seen[:5]], [f"2031-01-0{day}" for day in (5, 4, 3, 2, 1)])
+
+    def test_batch_with_existing_id_rejected(self):
+        response = self.client.post(f'{TX_URL}batch', json=[
+            {**TRANSACTIONS[0], "id": "mem-tx-new"}, TRANSACTIONS[1]
+        ], headers=HEADERS)
+        self.assertEqual(response.status_code, 400)
+        # Пакет отклонён целиком
+        self.assertEqual(self.client.get(f'{TX_URL}mem-tx-new', headers=HEADERS).status_code, 404)
+
+    def test_consent_update(self):
+        payload = {"tpp_id": "tpp-mem", "permissions": ["read"], "account_id": "mem-acc-0",
+                   "subject": "Память", "scope": "accounts"}
+        response = self.client.post('/consent-pe-v2.0.0/', json=payload, headers=HEADERS)
+        self.assertEqual(response.status_code, 201)
+        consent = response.get_json()
+        response = self.client.put(f'/consent-pe-v2.0.0/{consent["id"]}',
+                                   json={**payload, "permissions": ["read", "payments"]}, headers=HEADERS)
+        self.assertEqual(response.status_code, 200)
+        updated = response.get_json()
+        self.assertEqual(updated["permissions"], ["read", "payments"])
+        self.assertEqual(updated["subject"], "Память")
+        self.assertEqual(self.client.get(f'/consent-le-v2.0.0/{consent["id"]}', headers=HEADERS).status_code, 404)
+
+    def test_health_and_metrics(self):
+        health = self.client.get('/health').get_json()
+        self.assertEqual(health["components"]["database"], "connected")
+        metrics = self.client.get('/metrics', headers=HEADERS).get_json()
+        self.assertEqual(metrics["db_pool"]["backend"], "memory")
+        with self.app.app_context():
+            tables = get_storage().stats()["tables"]
+        self.assertEqual(metrics["entities"]["transactions"], tables["transactions"])
+        self.assertEqual(metrics["accounts"]["physical"] + metrics["accounts"]["legal"], tables["accounts"])
+        prometheus = self.client.get('/metrics?format=prometheus', headers=HEADERS).get_data(as_text=True)
+        self.assertIn('entities{table="transactions"}', prometheus)
+        self.assertNotIn('db_pool_size', prometheus)
+
+
+class TestDataService(unittest.TestCase):
+
+    def test_indexes_follow_updates(self):
+        service = DataService(generate=False)
+        accounts = service.tables['accounts']
+        accounts.insert({"id": "a1", "balance": 1, "currency": "RUB", "type": "physical_entity", "status": "active"})
+        self.assertEqual(service.get_account("a1", "physical_entity")["balance"], 1.0)
+
+        accounts.update("a1", {"type": "legal_entity"})
+        self.assertEqual(service.get_accounts("physical_entity"), [])
+        self.assertEqual([row["id"] for row in service.get_accounts("legal_entity")], ["a1"])
+        service.delete_account("a1", "legal_entity")
+        self.assertIsNone(service.get_account("a1", "legal_entity"))
+        self.assertEqual(accounts.indexes["type"], {})
+
+    def test_concurrent_inserts(self):
+        payments = DataService(generate=False).tables['payments']
+
+        def insert(worker):
+            for i in range(500):
+                payments.insert({"id": f"{worker}-{i}", "status": "PENDING", "amount": 1,
+                                 "currency": "RUB", "recipient": "x", "account_id": f"acc-{i % 2}"})
+
+        threads = [threading.Thread(target=insert, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(payments), 2000)
+        self.assertEqual(len(payments.find("account_id", "acc-0")), 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import json
+import unittest
+from app import create_app
+from app.config import TestConfig
+from app.db import init_db, get_pool
+
+HEADERS = {"Authorization": "Bearer mock-token-123"}
+URL = '/accounts-le-v2.0.0/'
+
+
+class TestListStreaming(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Инициализация тестовой среды"""
+        cls.app = create_app(config_class=TestConfig)
+        cls.app.config['STREAM_CHUNK_SIZE'] = 2
+        with cls.app.app_context():
+            init_db()
+        accounts = [
+            {"balance": i, "currency": "RUB", "company": f"ООО {i}", "status": "active"}
+            for i in range(5)
+        ]
+        response = cls.app.test_client().post(f'{URL}batch', json=accounts, headers=HEADERS)
+        assert response.status_code == 201
+
+    def setUp(self):
+        self.client = self.app.test_client()
+
+    def test_page_with_link_header(self):
+        response = self.client.get(f'{URL}?page=2&page_size=2', headers=HEADERS)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([acc["balance"] for acc in response.get_json()], [2, 3])
+        self.assertEqual(response.headers['Link'], f'<{URL}?page=3&page_size=2>; rel="next"')
+
+        last = self.client.get(f'{URL}?page=3&page_size=2', headers=HEADERS)
+        self.assertEqual(len(last.get_json()), 1)
+        self.assertNotIn('Link', last.headers)
+
+    def test_stream_json_array(self):
+        response = self.client.get(f'{URL}?stream=json', headers=HEADERS)
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertEqual([acc["balance"] for acc in response.get_json()], [0, 1, 2, 3, 4])
+        self.assertEqual(get_pool(self.app).stats()["in_use"], 0)
+
+    def test_stream_ndjson(self):
+        response = self.client.get(URL, headers={**HEADERS, "Accept": "application/x-ndjson"})
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual([json.loads(line)["company"] for line in lines], [f"ООО {i}" for i in range(5)])
+        self.assertIn('X-Request-ID', response.headers)
+
+    def test_invalid_stream_format(self):
+        response = self.client.get(f'{URL}?stream=xml', headers=HEADERS)
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+from app import create_app
+from app.config import TestConfig
+from app.db import init_db, get_db
+from app.statements import transactions_list
+
+HEADERS = {"Authorization": "Bearer mock-token-123"}
+URL = '/transaction-history-v1.0.0/'
+
+
+class TestTransactionFilters(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Инициализация тестовой среды"""
+        cls.app = create_app(config_class=TestConfig)
+        with cls.app.app_context():
+            init_db()
+        transactions = [
+            {"id": f"filter-tx-{i}", "date": f"2025-02-{i + 1:02d}T12:00:00", "amount": 100 * (i + 1),
+             "currency": "RUB", "account_id": f"acc-{i % 2}", "status": "SUCCESS" if i < 4 else "FAILED"}
+            for i in range(6)
+        ]
+        response = cls.app.test_client().post(f'{URL}batch', json=transactions, headers=HEADERS)
+        assert response.status_code == 201
+
+    def setUp(self):
+        self.client = self.app.test_client()
+
+    def ids(self, query):
+        response = self.client.get(URL + query, headers=HEADERS)
+        self.assertEqual(response.status_code, 200)
+        return [tx["id"] for tx in response.get_json()["transactions"]]
+
+    def test_account_and_date_range(self):
+        self.assertEqual(
+            self.ids('?account_id=acc-0&from=2025-02-02&to=2025-02-05'),
+            ['filter-tx-4', 'filter-tx-2']
+        )
+
+    def test_status_and_amount(self):
+        self.assertEqual(self.ids('?status=FAILED'), ['filter-tx-5', 'filter-tx-4'])
+        self.assertEqual(self.ids('?min_amount=200&max_amount=300'), ['filter-tx-2', 'filter-tx-1'])
+
+    def test_filters_kept_across_pages(self):
+        body = self.client.get(f'{URL}?account_id=acc-1&page=1&page_size=2', headers=HEADERS).get_json()
+        self.assertIn('account_id=acc-1', body["pagination"]["next_page"])
+        self.assertEqual(self.ids(body["pagination"]["next_page"]), ['filter-tx-1'])
+        cursor = body["pagination"]["next_cursor"]
+        self.assertEqual(self.ids(f'?account_id=acc-1&page_size=2&cursor={cursor}'), ['filter-tx-1'])
+
+    def test_invalid_filter(self):
+        for query in ('?min_amount=abc', '?from=yesterday', '?from=2025-01-01T10:00:00%2B03:00',
+                      '?to=2025-01-02T00:00:00Z'):
+            response = self.client.get(URL + query, headers=HEADERS)
+            self.assertEqual(response.status_code, 400)
+
+    def test_account_history_uses_index(self):
+        with self.app.app_context():
+            db = get_db()
+            for filters, after in ((('account_id',), False), (('account_id', 'from', 'to'), True)):
+                query = transactions_list(filters, after=after)
+                plan = ' '.join(row[3] for row in db.execute(
+                    f'EXPLAIN QUERY PLAN {query}', ('x',) * query.count('?')
+                ))
+                self.assertIn('USING INDEX idx_transactions_account_date', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+import jsonschema
+from jsonschema import ValidationError
+from app.schemas import payment_schema, medical_schema
+from app.validation import validate, get_validator
+
+
+class TestCompiledValidation(unittest.TestCase):
+
+    def test_validator_compiled_once(self):
+        self.assertIs(get_validator(payment_schema), get_validator(payment_schema))
+
+    def test_same_error_as_jsonschema(self):
+        data = {"amount": 0, "currency": "GBP"}
+        with self.assertRaises(ValidationError) as expected:
+            jsonschema.validate(data, payment_schema)
+        with self.assertRaises(ValidationError) as actual:
+            validate(data, payment_schema)
+        self.assertEqual(str(actual.exception), str(expected.exception))
+
+    def test_format_checked(self):
+        person = {"name": "Иван Иванов", "policy_number": "POL1", "birth_date": "1990-01-01"}
+        validate(person, medical_schema)
+        with self.assertRaises(ValidationError):
+            validate({**person, "birth_date": "01.01.1990"}, medical_schema)
+
+
+if __name__ == '__main__':
+    unittest.main()
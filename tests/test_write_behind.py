@@ -0,0 +1,112 @@
+import threading
+import unittest
+from app import create_app
+from app.config import TestConfig
+from app.db import init_db, get_pool, get_writer
+from app.statements import STATEMENTS
+from app.writer import WriteBehindBuffer
+
+HEADERS = {"Authorization": "Bearer mock-token-123"}
+PAYMENT = {"amount": 10, "currency": "RUB", "recipient": "Отложенно", "account_id": "wb-acc"}
+
+
+class WriteBehindConfig(TestConfig):
+    WRITE_MODE = "write_behind"
+    # Фоновый сброс не успевает за тестом: очередь сбрасывается явно
+    WRITE_BEHIND_FLUSH_INTERVAL_MS = 60000
+    WRITE_BEHIND_BATCH_SIZE = 1000
+    WRITE_BEHIND_MAX_PENDING = 1000
+
+
+def sqlite_row(app, table, entity_id):
+    pool = get_pool(app)
+    conn = pool.acquire()
+    try:
+        return conn.execute(STATEMENTS[table]["select_by_id"], (entity_id,)).fetchone()
+    finally:
+        pool.release(conn)
+
+
+class TestWriteBehind(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app(WriteBehindConfig)
+        with cls.app.app_context():
+            init_db(fill_test_data=True)
+
+    def setUp(self):
+        self.client = self.app.test_client()
+
+    def test_post_served_from_memory_until_flush(self):
+        response = self.client.post('/payments-v1.3.1/', json=PAYMENT, headers=HEADERS)
+        self.assertEqual(response.status_code, 201)
+        payment = response.get_json()
+        self.assertEqual(payment["status"], "PENDING")
+        self.assertTrue(payment["created_at"])
+        self.assertIsNone(sqlite_row(self.app, "payments", payment["id"]))
+        self.assertEqual(self.client.get(f'/payments-v1.3.1/{payment["id"]}', headers=HEADERS).get_json(), payment)
+
+        metrics = self.client.get('/metrics', headers=HEADERS).get_json()
+        self.assertGreaterEqual(metrics["db_pool"]["write_behind"]["queue_depth"], 1)
+        prometheus = self.client.get('/metrics?format=prometheus', headers=HEADERS).get_data(as_text=True)
+        self.assertIn('write_behind_flush_lag_seconds', prometheus)
+
+        response = self.client.post('/admin/flush', headers=HEADERS)
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(response.get_json()["flushed"], 1)
+        # В SQLite та же строка, что вернул POST
+        self.assertEqual(dict(sqlite_row(self.app, "payments", payment["id"])), payment)
+        self.assertEqual(get_writer(self.app).stats()["queue_depth"], 0)
+
+    def test_update_after_pending_insert(self):
+        payload = {"tpp_id": "tpp-wb", "permissions": ["read"], "account_id": "wb-acc",
+                   "subject": "Отложенно", "scope": "accounts"}
+        consent = self.client.post('/consent-pe-v2.0.0/', json=payload, headers=HEADERS).get_json()
+        # UPDATE сначала сбрасывает очередь и находит строку в SQLite
+        response = self.client.put(f'/consent-pe-v2.0.0/{consent["id"]}',
+                                   json={**payload, "permissions": ["read", "payments"]}, headers=HEADERS)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["permissions"], ["read", "payments"])
+        self.assertEqual(self.client.delete(f'/consent-pe-v2.0.0/{consent["id"]}', headers=HEADERS).status_code, 204)
+        self.assertEqual(self.client.get(f'/consent-pe-v2.0.0/{consent["id"]}', headers=HEADERS).status_code, 404)
+
+    def test_background_flush_and_backpressure(self):
+        buffer = WriteBehindBuffer(get_pool(self.app).open_connection, interval=0.01, max_pending=5)
+        insert = STATEMENTS["payments"]["insert"]
+        depths = []
+
+        def worker(n):
+            for i in range(10):
+                buffer.insert(insert, (f"wb-bg-{n}-{i}", "PENDING", "2025-01-01T00:00:00", 1, "RUB", "x", "wb-acc"))
+                depths.append(buffer.stats()["queue_depth"])
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Очередь не растёт выше предела: писатели ждут фонового сброса
+        self.assertLessEqual(max(depths), 5)
+        buffer.close()
+        self.assertEqual(buffer.stats()["flushed"], 30)
+        self.assertIsNotNone(sqlite_row(self.app, "payments", "wb-bg-2-9"))
+
+    def test_rejected_row_counted(self):
+        buffer = get_writer(self.app)
+        buffer.flush()
+        failed = buffer.stats()["failed"]
+        existing = sqlite_row(self.app, "accounts", self.client.get(
+            '/accounts-v1.3.3/', headers=HEADERS).get_json()[0]["id"])
+        insert = STATEMENTS["accounts"]["insert"]
+        columns = insert.spec["columns"]
+        # Строка с id, уже записанным в SQLite, отвергается при сбросе, соседняя — нет
+        buffer.insert(insert, tuple(existing[column] for column in columns))
+        fresh = buffer.insert(insert, ("wb-fresh",) + tuple(existing[column] for column in columns[1:]))
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(buffer.stats()["failed"], failed + 1)
+        self.assertIsNotNone(sqlite_row(self.app, "accounts", fresh["id"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
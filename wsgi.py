@@ -0,0 +1,10 @@
+"""WSGI-точка входа для внешнего сервера.
+
+    gunicorn --workers 4 --threads 4 --worker-class gthread wsgi:app
+    waitress-serve --threads 8 wsgi:app
+
+Встроенный запуск с настройками из конфигурации — ``flask serve``.
+"""
+from app import create_app
+
+app = create_app()